@@ -0,0 +1,124 @@
+# coding: utf-8
+
+"""
+loading from and dumping to asynchronous streams
+"""
+
+import asyncio
+import io
+import pytest  # type: ignore  # NOQA
+
+from typing import Any
+
+multi_doc = """\
+a: 1  # one
+---
+- b
+- c
+--- {d: [e, f]}
+"""
+
+
+def make_yaml(**kw: Any) -> Any:
+    from ruamel.yaml import YAML
+
+    return YAML(**kw)
+
+
+class AsyncReader:
+    def __init__(self, data: Any, size: int) -> None:
+        self.data = data
+        self.size = size
+
+    async def read(self, size: int = -1) -> Any:
+        await asyncio.sleep(0)
+        res = self.data[: self.size]
+        self.data = self.data[self.size :]
+        return res
+
+
+class AsyncWriter:
+    def __init__(self) -> None:
+        self.parts: Any = []
+
+    async def write(self, data: Any) -> None:
+        await asyncio.sleep(0)
+        self.parts.append(data)
+
+
+async def collect(yaml: Any, stream: Any) -> Any:
+    return [doc async for doc in yaml.aload_all(stream)]
+
+
+class TestLoad:
+    def test_aload_all(self) -> None:
+        expected = list(make_yaml(typ='safe', pure=True).load_all(multi_doc))
+        for size in (1, 7, 1000):
+            yaml = make_yaml(typ='safe', pure=True)
+            data = multi_doc.encode('utf-8')
+            assert asyncio.run(collect(yaml, AsyncReader(data, size))) == expected
+
+    def test_stream_reader(self) -> None:
+        async def load() -> Any:
+            reader = asyncio.StreamReader()
+            reader.feed_data(multi_doc.encode('utf-8'))
+            reader.feed_eof()
+            return await collect(make_yaml(), reader)
+
+        res = asyncio.run(load())
+        assert res == [{'a': 1}, ['b', 'c'], {'d': ['e', 'f']}]
+        assert res[0].lc.key('a') == (0, 0)
+
+    def test_stop_early(self) -> None:
+        yaml = make_yaml()
+
+        async def first() -> Any:
+            async for doc in yaml.aload_all(AsyncReader(multi_doc, 5)):
+                return doc
+
+        assert asyncio.run(first()) == {'a': 1}
+        # the instance can be used again
+        assert yaml.load('x: 2') == {'x': 2}
+
+
+class TestDump:
+    def test_adump_all(self) -> None:
+        yaml = make_yaml()
+        docs = list(yaml.load_all(multi_doc))
+        writer = AsyncWriter()
+        asyncio.run(yaml.adump_all(docs, writer))
+        # written per document
+        assert len(writer.parts) == 3
+        expected = io.BytesIO()
+        yaml.dump_all(docs, expected)
+        assert b''.join(writer.parts) == expected.getvalue()
+
+    def test_async_iterable(self) -> None:
+        async def documents() -> Any:
+            for idx in range(3):
+                await asyncio.sleep(0)
+                yield {'idx': idx}
+
+        yaml = make_yaml(typ='safe', pure=True)
+        writer = AsyncWriter()
+        asyncio.run(yaml.adump_all(documents(), writer))
+        assert b''.join(writer.parts) == b'{idx: 0}\n--- {idx: 1}\n--- {idx: 2}\n'
+
+    def test_drain(self) -> None:
+        class Writer:
+            # write() is synchronous, as with asyncio.StreamWriter
+            def __init__(self) -> None:
+                self.buf = io.StringIO()
+                self.encoding = 'utf-8'
+                self.drained = 0
+
+            def write(self, data: Any) -> None:
+                self.buf.write(data)
+
+            async def drain(self) -> None:
+                self.drained += 1
+
+        writer = Writer()
+        asyncio.run(make_yaml().adump_all([{'a': 1}, [2]], writer))
+        assert writer.buf.getvalue() == 'a: 1\n---\n- 2\n'
+        assert writer.drained == 2
@@ -0,0 +1,140 @@
+# coding: utf-8
+
+"""
+tests for the implicit resolvers
+"""
+
+import re
+
+import pytest  # type: ignore  # NOQA
+
+from typing import Any
+
+
+def resolve(resolver: Any, value: str) -> str:
+    from ruamel.yaml.nodes import ScalarNode
+
+    return str(resolver.resolve(ScalarNode, value, (True, False)))
+
+
+class TestImplicitResolver:
+    @pytest.mark.parametrize(
+        'version, value, tag',
+        [
+            ((1, 2), '', 'null'),
+            ((1, 2), 'null', 'null'),
+            ((1, 2), '1_000', 'int'),
+            ((1, 2), '0o17', 'int'),
+            ((1, 2), '1e3', 'float'),
+            ((1, 2), '2001-12-14', 'timestamp'),
+            ((1, 2), '2001-12-14x', 'str'),
+            ((1, 2), 'yes', 'str'),
+            ((1, 2), '<<', 'merge'),
+            ((1, 1), 'yes', 'bool'),
+            ((1, 1), '190:20:30', 'int'),
+            ((1, 1), '190:20:30.15', 'float'),
+            ((1, 1), '017', 'int'),
+        ],
+    )
+    def test_versions(self, version: Any, value: str, tag: str) -> None:
+        from ruamel.yaml.resolver import VersionedResolver
+
+        resolver = VersionedResolver(version=version)
+        assert resolve(resolver, value) == 'tag:yaml.org,2002:' + tag
+        # again, from the cache
+        assert resolve(resolver, value) == 'tag:yaml.org,2002:' + tag
+
+    def test_combined_order(self) -> None:
+        from ruamel.yaml.resolver import implicit_resolver_matcher
+
+        matcher = implicit_resolver_matcher(
+            {
+                'a': [('!first', re.compile('a+$')), ('!second', re.compile('ab?$'))],
+                None: [('!any', re.compile('.*# comment', re.X))],
+            },
+        )
+        assert matcher('aa') == '!first'
+        assert matcher('ab') == '!second'
+        assert matcher('abc') == '!any'
+        assert matcher('b') == '!any'
+
+    def test_flags(self) -> None:
+        from ruamel.yaml.resolver import implicit_resolver_matcher
+
+        matcher = implicit_resolver_matcher(
+            {
+                'f': [('!foo', re.compile('^foo\\d+$', re.I))],
+                'F': [('!foo', re.compile('^foo\\d+$', re.I))],
+                'b': [('!bar', re.compile('bar \\d+ $  # comment', re.X))],
+            },
+        )
+        assert matcher('FOO1') == '!foo'
+        assert matcher('foo1') == '!foo'
+        assert matcher('foo') is None
+        assert matcher('bar1') == '!bar'
+        assert matcher('bar1x') is None
+
+    def test_flags_resolve(self) -> None:
+        from ruamel.yaml.resolver import BaseResolver
+
+        class FooResolver(BaseResolver):
+            pass
+
+        FooResolver.add_implicit_resolver_base(
+            'tag:example.com:foo', re.compile('^foo\\d+$', re.I), list('fF'),
+        )
+        resolver = FooResolver()
+        assert resolve(resolver, 'FOO1') == 'tag:example.com:foo'
+        assert resolve(resolver, 'foo') == 'tag:yaml.org,2002:str'
+
+    def test_not_combined(self) -> None:
+        from ruamel.yaml.resolver import implicit_resolver_matcher
+
+        # a numbered backreference cannot be combined, bytes patterns neither
+        matcher = implicit_resolver_matcher(
+            {
+                'a': [('!one', re.compile('(a)b\\1$')), ('!two', re.compile('a(b)*$'))],
+                'x': [('!three', re.compile(b'x'))],
+            },
+        )
+        assert matcher('aba') == '!one'
+        assert matcher('abb') == '!two'
+        assert matcher('ab') == '!two'
+
+    def test_first_none(self) -> None:
+        from ruamel.yaml.resolver import BaseResolver
+
+        class DiceResolver(BaseResolver):
+            pass
+
+        DiceResolver.add_implicit_resolver_base('!dice', re.compile('\\d+d\\d+$'), None)
+        resolver = DiceResolver()
+        assert resolve(resolver, '5d10') == '!dice'
+        assert resolve(resolver, 'x') == 'tag:yaml.org,2002:str'
+        # the resolvers for a first character are no longer extended on every resolve
+        assert DiceResolver.yaml_implicit_resolvers == {
+            None: [('!dice', re.compile('\\d+d\\d+$'))],
+        }
+        DiceResolver.add_implicit_resolver_base('!x', re.compile('x$'), ['x'])
+        assert resolve(resolver, 'x') == '!x'
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt'])
+    def test_version_per_document(self, typ: str) -> None:
+        from ruamel.yaml import YAML
+
+        yaml = YAML(typ=typ, pure=True)
+        data = 'a: yes\n...\n%YAML 1.1\n---\nb: yes\nc: 1:20\n...\n%YAML 1.2\n---\nd: yes\n'
+        assert [dict(d) for d in yaml.load_all(data)] == [
+            {'a': 'yes'}, {'b': True, 'c': 80}, {'d': 'yes'},
+        ]
+
+    def test_processing_version_cached(self) -> None:
+        from ruamel.yaml.resolver import VersionedResolver
+
+        resolver = VersionedResolver()
+        assert resolver.processing_version == (1, 2)
+        resolver._loader_version = (1, 1)
+        assert resolver.processing_version == (1, 2)
+        resolver.reset_processing_version()
+        assert resolver.processing_version == (1, 1)
+        assert resolve(resolver, 'yes') == 'tag:yaml.org,2002:bool'
@@ -0,0 +1,90 @@
+# coding: utf-8
+
+"""
+tests for YAML(typ='safe', lazy=True)
+"""
+
+import pytest  # type: ignore  # NOQA
+
+from typing import Any
+
+data = """\
+base: &base {x: 1, y: [1, 2]}
+a: {<<: *base, y: 3, z: !!set {q, r}}
+[1, 2]: tuple key
+t: 2001-12-14
+o: !!omap [{a: 1}, {b: {c: 2}}]
+"""
+
+
+def lazy_yaml() -> Any:
+    from ruamel.yaml import YAML
+
+    return YAML(typ='safe', pure=True, lazy=True)
+
+
+class TestLazy:
+    def test_equal(self) -> None:
+        from ruamel.yaml import YAML
+
+        assert lazy_yaml().load(data) == YAML(typ='safe', pure=True).load(data)
+        assert lazy_yaml().load('[1, [2, {a: 3}]]') == [1, [2, {'a': 3}]]
+
+    def test_on_access(self) -> None:
+        from ruamel.yaml.lazy import LazyMap, LazySeq, _unset
+
+        d = lazy_yaml().load(data)
+        assert isinstance(d, LazyMap)
+        assert d._index is None
+        assert list(d) == ['base', 'a', (1, 2), 't', 'o']
+        assert d._values == {}
+        base = d['base']
+        assert isinstance(base, LazyMap)
+        assert isinstance(base['y'], LazySeq)
+        assert base['y'][1] == 2
+        assert base['y']._items[0] is _unset
+        assert d['base'] is base
+        with pytest.raises(KeyError):
+            d['b']
+        with pytest.raises(TypeError):
+            d['c'] = 1  # type: ignore
+
+    def test_merge_and_alias(self) -> None:
+        d = lazy_yaml().load(data)
+        assert dict(d['a']) == {'x': 1, 'y': 3, 'z': {'q', 'r'}}
+        d = lazy_yaml().load('a: &a [1, *a]\nb: *a\n')
+        assert d['a'][1] is d['a']
+        assert d['b'] is d['a']
+        assert repr(d['a']) == 'LazySeq([1, ...])'
+
+    def test_error_on_access(self) -> None:
+        from ruamel.yaml.constructor import DuplicateKeyError
+
+        d = lazy_yaml().load('a: !!int x\nb: 1\n')
+        assert d['b'] == 1
+        with pytest.raises(ValueError):
+            d['a']
+        # the keys are checked when the mapping is first accessed
+        d = lazy_yaml().load('a: 1\nb: 1\nb: 2\n')
+        with pytest.raises(DuplicateKeyError):
+            d['a']
+        yaml = lazy_yaml()
+        yaml.allow_duplicate_keys = True
+        assert yaml.load('b: 1\nb: 2\n')['b'] == 1
+
+    def test_documents(self) -> None:
+        docs = list(lazy_yaml().load_all('- &x [1]\n- *x\n---\n- {a: 2}\n'))
+        assert docs[0][0] is docs[0][1]
+        assert docs[1][0]['a'] == 2
+
+    def test_version(self) -> None:
+        # values are accessed after the next document sets its own version
+        docs = list(lazy_yaml().load_all('a: [017, no]\n...\n%YAML 1.1\n---\nb: [017, no]\n'))
+        assert docs[0]['a'] == [17, 'no']
+        assert docs[1]['b'] == [15, False]
+
+    def test_typ(self) -> None:
+        from ruamel.yaml import YAML
+
+        with pytest.raises(ValueError, match='lazy loading is only available'):
+            YAML(typ='rt', lazy=True)
@@ -0,0 +1,268 @@
+# coding: utf-8
+
+"""
+tests for the Parser internals
+"""
+
+import pytest  # type: ignore  # NOQA
+
+from typing import Any
+
+
+def make_yaml(**kw: Any) -> Any:
+    from ruamel.yaml import YAML
+
+    yaml = YAML(**kw)
+    return yaml
+
+
+class TestEventKind:
+    def test_unique(self) -> None:
+        import ruamel.yaml.events as events
+
+        concrete = [
+            cls
+            for cls in vars(events).values()
+            if isinstance(cls, type) and issubclass(cls, events.Event) and cls.kind
+        ]
+        assert len(concrete) == 10
+        assert len({cls.kind for cls in concrete}) == 10
+        for cls in (events.Event, events.NodeEvent, events.CollectionStartEvent):
+            assert cls.kind == 0
+
+    def test_check_event(self) -> None:
+        from ruamel.yaml.events import (
+            NodeEvent,
+            CollectionStartEvent,
+            ScalarEvent,
+            SequenceStartEvent,
+            MappingStartEvent,
+        )
+
+        yaml = make_yaml(typ='safe', pure=True)
+        constructor, parser = yaml.get_constructor_parser('[a]\n')
+        parser.get_event()  # stream start
+        parser.get_event()  # document start
+        assert parser.check_event(SequenceStartEvent)
+        assert parser.check_event(MappingStartEvent, SequenceStartEvent)
+        assert not parser.check_event(MappingStartEvent, ScalarEvent)
+        # the abstract event classes are checked with isinstance()
+        assert parser.check_event(CollectionStartEvent)
+        assert parser.check_event(NodeEvent)
+        parser.get_event()
+        assert parser.check_event(ScalarEvent)
+        assert not parser.check_event(CollectionStartEvent)
+
+
+class TestPeekToken:
+    @staticmethod
+    def events(yaml: Any, data: str) -> Any:
+        return [event.compact_repr() for event in yaml.parse(data)]
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt'])
+    def test_node_content(self, typ: str) -> None:
+        data = (
+            'a: &x !!str b\nc: !!map &y\n  ? d\n  :\ne:\n- *x\n- [f, g: h, ? i]\n'
+            '- {j, k: }\n- |\n  l\n'
+        )
+        assert self.events(make_yaml(typ=typ, pure=True), data) == [
+            '+STR', '+DOC', '+MAP', '=VAL :a', '=VAL &x <tag:yaml.org,2002:str> :b',
+            '=VAL :c', '+MAP &y <tag:yaml.org,2002:map>', '=VAL :d', '=VAL :',
+            '-MAP', '=VAL :e', '+SEQ', '=ALI *x', '+SEQ []', '=VAL :f', '+MAP {}',
+            '=VAL :g', '=VAL :h', '-MAP', '+MAP {}', '=VAL :i', '=VAL :', '-MAP',
+            '-SEQ', '+MAP {}', '=VAL :j', '=VAL :', '=VAL :k', '=VAL :', '-MAP',
+            '=VAL |l\\n', '-SEQ', '-MAP', '-DOC', '-STR',
+        ]
+
+    def test_error(self) -> None:
+        from ruamel.yaml.parser import ParserError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        with pytest.raises(ParserError, match="expected <block end>, but found '-'"):
+            self.events(yaml, 'a:\n  b: 1\n  - c\n')
+        with pytest.raises(ParserError, match="expected <block end>, but found '?'"):
+            self.events(yaml, '- a\n- b\nc: d\n')
+        with pytest.raises(ParserError, match="expected ',' or '}', but got '<scalar>'"):
+            self.events(yaml, '{a: [b] c}\n')
+        with pytest.raises(ParserError, match="expected ',' or ']', but got '<scalar>'"):
+            self.events(yaml, '[a, [b] c]\n')
+
+
+class TestParsePath:
+    data = """\
+kind: Pod
+spec:
+  containers:
+  - name: a
+    image: nginx:1
+    env: &env [{name: X, value: '1'}]
+  - name: b
+    image: redis:7
+    env: *env
+  'x.y': {z: 0}
+---
+spec:
+  containers: [{image: busybox}]
+"""
+
+    def test_parse_path(self) -> None:
+        from ruamel.yaml.composer import parse_path
+
+        assert parse_path('spec.containers[*].image') == ('spec', 'containers', None, 'image')
+        assert parse_path("$.labels['app.io/name'][2].*") == ('labels', 'app.io/name', 2, None)
+        assert parse_path('$') == ()
+        assert parse_path(['a', 0, None]) == ('a', 0, None)
+        with pytest.raises(ValueError, match='invalid path selector'):
+            parse_path('a[-1]')
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt'])
+    def test_select(self, typ: str) -> None:
+        yaml = make_yaml(typ=typ, pure=True)
+        assert list(yaml.parse(self.data, 'spec.containers[*].image')) == [
+            'nginx:1', 'redis:7', 'busybox',
+        ]
+        assert list(yaml.parse(self.data, 'spec.containers[0].name')) == ['a']
+        assert list(yaml.parse(self.data, "spec['x.y'].z")) == [0]
+        assert list(yaml.parse(self.data, 'spec.*[2]')) == []
+        assert list(yaml.parse(self.data, 'kind.x')) == []
+        assert len(list(yaml.parse(self.data, '$'))) == 2
+
+    def test_alias(self) -> None:
+        # the anchored node in the skipped container is available for the alias
+        yaml = make_yaml(typ='safe', pure=True)
+        assert list(yaml.parse(self.data, 'spec.containers[1].env[0].name')) == ['X']
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt'])
+    def test_path_resolver(self, typ: str) -> None:
+        from ruamel.yaml.resolver import VersionedResolver
+
+        class UpperResolver(VersionedResolver):
+            pass
+
+        UpperResolver.add_path_resolver('!up', [(dict, 'spec'), (list, None), 'name'], str)
+        UpperResolver.add_path_resolver('!up', ['other', 'name'], str)
+        yaml = make_yaml(typ=typ, pure=True)
+        yaml.Resolver = UpperResolver
+        yaml.constructor.add_constructor('!up', lambda self, node: node.value.upper())
+        data = 'other: &o {name: q}\nspec:\n- {name: a}\n- *o\nname: b\n'
+        assert [item['name'] for item in yaml.load(data)['spec']] == ['A', 'Q']
+        # the selected nodes get the tags the path resolvers give them in the document
+        assert list(yaml.parse(data, 'spec[*].name')) == ['A', 'Q']
+        assert list(yaml.parse(data, 'spec[0]')) == [{'name': 'A'}]
+        assert list(yaml.parse(data, 'name')) == ['b']
+
+    def test_skipped(self, monkeypatch: Any) -> None:
+        from ruamel.yaml.composer import Composer
+
+        composed = []
+        compose_node = Composer.compose_node
+
+        def count(self: Any, parent: Any, index: Any) -> Any:
+            node = compose_node(self, parent, index)
+            composed.append(node)
+            return node
+
+        monkeypatch.setattr(Composer, 'compose_node', count)
+        yaml = make_yaml(typ='safe', pure=True)
+        assert list(yaml.parse('a: {b: [1, 2, 3], c: 4}\nd: [5]\n', 'a.c')) == [4]
+        # only the keys up to the one selected, and the selected value
+        assert [node.value for node in composed] == ['a', 'b', 'c', '4', 'd']
+
+
+class TestNesting:
+    @pytest.mark.parametrize('typ', ['safe', 'rt', 'base'])
+    def test_deep(self, typ: str) -> None:
+        # deeper than the recursion limit, for flow and block style
+        depth = 3000
+        yaml = make_yaml(typ=typ, pure=True)
+        data = yaml.load('[' * depth + ']' * depth)
+        for _ in range(depth - 1):
+            assert len(data) == 1
+            data = data[0]
+        assert data == []
+        # the size of a block style document grows with the square of its depth
+        depth = 1200
+        data = yaml.load(''.join(' ' * i + 'k:\n' for i in range(depth)) + ' ' * depth + 'v\n')
+        for _ in range(depth):
+            data = data['k']
+        assert data == 'v'
+
+    def test_max_depth(self) -> None:
+        from ruamel.yaml.composer import ComposerError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        yaml.max_depth = 3
+        assert yaml.load('[{a: [1]}]') == [{'a': [1]}]
+        with pytest.raises(ComposerError, match='deeper than the maximum depth of 3'):
+            yaml.load('a: [{b: [1]}]')
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt', 'base'])
+    def test_composer_hooks(self, typ: str) -> None:
+        from ruamel.yaml.composer import Composer, ComposerError
+
+        nodes = []
+        mappings = []
+
+        class TracingComposer(Composer):
+            def compose_node(self, parent: Any, index: Any) -> Any:
+                node = super().compose_node(parent, index)
+                nodes.append(node.id)
+                return node
+
+            def compose_mapping_node(self, anchor: Any) -> Any:
+                node = super().compose_mapping_node(anchor)
+                mappings.append(len(node.value))
+                return node
+
+        yaml = make_yaml(typ=typ, pure=True)
+        yaml.Composer = TracingComposer
+        assert yaml.load('a: [x, {b: c}]\n') == {'a': ['x', {'b': 'c'}]}
+        # the overridden methods are called for the nested nodes as well
+        assert nodes == ['scalar'] * 4 + ['mapping', 'sequence', 'mapping']
+        assert mappings == [1, 1]
+        yaml = make_yaml(typ=typ, pure=True)
+        yaml.Composer = TracingComposer
+        yaml.max_depth = 2
+        with pytest.raises(ComposerError, match='deeper than the maximum depth of 2'):
+            yaml.load('a: [{b: c}]\n')
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt', 'base'])
+    def test_constructor_hooks(self, typ: str) -> None:
+        yaml = make_yaml(typ=typ, pure=True)
+        nodes = []
+        mappings = []
+
+        class TracingConstructor(yaml.Constructor):  # type: ignore
+            def construct_object(self, node: Any, deep: bool = False) -> Any:
+                nodes.append(node)
+                return super().construct_object(node, deep=deep)
+
+            def construct_mapping(self, node: Any, *args: Any, **kw: Any) -> Any:
+                mappings.append(node)
+                return super().construct_mapping(node, *args, **kw)
+
+        yaml.Constructor = TracingConstructor
+        assert yaml.load('a: [x, {b: c}]\n') == {'a': ['x', {'b': 'c'}]}
+        assert len(set(nodes)) == 7
+        assert [node.value[0][0].value for node in mappings] == ['a', 'b']
+
+    def test_constructor_deep(self) -> None:
+        from ruamel.yaml.comments import CommentedMap
+
+        # the values of a round-trip mapping are filled in level by level, a constructor
+        # that needs the values of the items of its node constructs these deep
+        def construct_total(constructor: Any, node: Any) -> Any:
+            data = CommentedMap()
+            constructor.construct_mapping(node, data, deep=True)
+            return sum(data['v'])
+
+        yaml = make_yaml(typ='rt')
+        yaml.Constructor = type('TotalConstructor', (yaml.Constructor,), {})
+        yaml.Constructor.add_constructor('!total', construct_total)
+        assert yaml.load('a:\n  b: !total {v: [1, 2]}\n') == {'a': {'b': 3}}
+
+    def test_merge_deferred(self) -> None:
+        # the merged mapping is nested in an earlier value, so not yet filled in
+        yaml = make_yaml(typ='rt')
+        data = yaml.load('x: {base: &b {k: 1}}\ny: {<<: *b, z: 2}\n')
+        assert dict(data['y']) == {'z': 2, 'k': 1}
@@ -0,0 +1,102 @@
+# coding: utf-8
+
+"""
+tests for the path resolvers
+"""
+
+import pytest  # type: ignore  # NOQA
+
+from typing import Any
+
+
+def make_resolver(*path_resolvers: Any) -> Any:
+    from ruamel.yaml.resolver import VersionedResolver
+
+    class PathResolver(VersionedResolver):
+        pass
+
+    for args in path_resolvers:
+        PathResolver.add_path_resolver(*args)
+    return PathResolver
+
+
+def tags(resolver: Any, data: str, typ: str = 'safe') -> Any:
+    from ruamel.yaml import YAML
+
+    yaml = YAML(typ=typ, pure=True)
+    yaml.Resolver = resolver
+
+    def walk(node: Any) -> Any:
+        if node.id == 'scalar':
+            return [node.tag]
+        if node.id == 'sequence':
+            return [node.tag] + [tag for item in node.value for tag in walk(item)]
+        return [node.tag] + [tag for k, v in node.value for tag in walk(k) + walk(v)]
+
+    return [tag for tag in walk(yaml.compose(data)) if tag.startswith('!')]
+
+
+class TestPathResolver:
+    @pytest.mark.parametrize('typ', ['safe', 'rt'])
+    def test_paths(self, typ: str) -> None:
+        resolver = make_resolver(
+            ('!root', [], dict),
+            ('!image', ['spec', 'containers', None, 'image'], str),
+            ('!first', ['spec', 'containers', 0], dict),
+            ('!key', ['spec', (dict,)]),
+            ('!tagged', ['env', ('!env', 'x'), True]),
+        )
+        data = (
+            'spec:\n  containers:\n  - {name: a, image: b}\n  - {name: c, image: d}\n'
+            '  other: [{image: e}]\nenv: !env {x: {y: 1}}\n'
+        )
+        assert tags(resolver, data, typ) == [
+            '!root', '!key', '!first', '!image', '!image', '!key', '!env', '!tagged',
+        ]
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt'])
+    def test_key_value_strings(self, typ: str) -> None:
+        from ruamel.yaml.nodes import MappingNode, ScalarNode
+
+        # the keys 'key' and 'value' are not the checks for any key resp. any value
+        data = 'key: a\nvalue: b\nother: c\n'
+        resolver = make_resolver(('!K', [(MappingNode, 'key')], ScalarNode))
+        assert tags(resolver, data, typ) == ['!K']
+        resolver = make_resolver(('!V', [(MappingNode, 'value')], ScalarNode))
+        assert tags(resolver, data, typ) == ['!V']
+        resolver = make_resolver(('!any', [(MappingNode, None)], ScalarNode))
+        assert tags(resolver, data, typ) == ['!any', '!any', '!any']
+
+    def test_last_added(self) -> None:
+        # of the paths matching a node, the one added last determines the tag (adding a
+        # path again only changes its tag)
+        data = 'a: [x, y]\nb: [x, y]\n'
+        resolver = make_resolver(('!a', ['a', 1]), ('!any', [None, 1]))
+        assert tags(resolver, data) == ['!any', '!any']
+        resolver = make_resolver(('!any', [None, 1]), ('!a', ['a', 1]), ('!b', [None, 1]))
+        assert tags(resolver, data) == ['!a', '!b']
+
+    def test_added_later(self) -> None:
+        from ruamel.yaml import YAML
+
+        yaml = YAML(typ='safe', pure=True)
+        yaml.Resolver = make_resolver(('!a', ['a']))
+        assert yaml.compose('a: x\nb: y\n').value[1][1].tag == 'tag:yaml.org,2002:str'
+        yaml.Resolver.add_path_resolver('!b', ['b'])
+        assert yaml.compose('a: x\nb: y\n').value[1][1].tag == '!b'
+
+    def test_skip_subtree(self) -> None:
+        from ruamel.yaml.nodes import MappingNode, ScalarNode
+
+        resolver = make_resolver(('!a', ['a', 'b']))()
+        root = MappingNode('tag:yaml.org,2002:map', [], None, None)
+        resolver.descend_resolver(None, None)
+        resolver.descend_resolver(root, ScalarNode('tag:yaml.org,2002:str', 'x', None, None))
+        resolver.descend_resolver(root, 0)
+        # nothing is kept for the levels without path resolvers
+        assert len(resolver.resolver_exact_paths) == 1
+        assert resolver.resolve(ScalarNode, 'b', (True, False)) == 'tag:yaml.org,2002:str'
+        resolver.ascend_resolver()
+        resolver.ascend_resolver()
+        resolver.descend_resolver(root, ScalarNode('tag:yaml.org,2002:str', 'a', None, None))
+        assert len(resolver.resolver_exact_paths) == 2
@@ -0,0 +1,402 @@
+# coding: utf-8
+
+"""
+test the different ways the Reader gets its input
+"""
+
+import mmap
+import pytest  # type: ignore  # NOQA
+from pathlib import Path
+
+from typing import Any
+
+
+def make_yaml(**kw: Any) -> Any:
+    from ruamel.yaml import YAML
+
+    yaml = YAML(**kw)
+    return yaml
+
+
+big_doc = ''.join(f'k{idx}: [a, "é{idx}", {{x: {idx}}}]  # comment\n' for idx in range(2000))
+
+
+class TestMemoryMap:
+    def test_load_path(self, tmpdir: Any) -> None:
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text(big_doc, encoding='utf-8')
+        yaml = make_yaml(typ='safe', pure=True)
+        expected = yaml.load(fn)
+        yaml.memory_map = True
+        assert yaml.load(fn) == expected
+        assert yaml.load(fn)['k1999'] == ['a', 'é1999', {'x': 1999}]
+
+    def test_load_small_chunks(self, tmpdir: Any, monkeypatch: Any) -> None:
+        from ruamel.yaml.reader import Reader
+
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text(big_doc, encoding='utf-8')
+        yaml = make_yaml()
+        expected = yaml.load(fn)
+        # odd chunk size splits the multi-byte characters
+        monkeypatch.setattr(Reader, 'mapped_chunk_size', 7)
+        yaml.memory_map = True
+        assert yaml.load(fn) == expected
+
+    def test_load_mmap(self, tmpdir: Any) -> None:
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_bytes('a: ü\n'.encode('utf-16-le').join([b'\xff\xfe', b'']))
+        yaml = make_yaml(typ='safe', pure=True)
+        with fn.open('rb') as fp:
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            assert yaml.load(mm) == {'a': 'ü'}
+            mm.close()  # would raise BufferError if the reader did not release its view
+
+    def test_empty_file(self, tmpdir: Any) -> None:
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text('')
+        yaml = make_yaml()
+        yaml.memory_map = True
+        assert yaml.load(fn) is None
+
+    def test_error(self, tmpdir: Any) -> None:
+        from ruamel.yaml.reader import ReaderError
+
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_bytes(b'a: 1\nb: \x01\n')
+        yaml = make_yaml()
+        yaml.memory_map = True
+        with pytest.raises(ReaderError, match='position 8'):
+            yaml.load(fn)
+
+    def test_mark_name(self, tmpdir: Any) -> None:
+        from ruamel.yaml.parser import ParserError
+
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text('a: [1\nb: 2\n')
+        yaml = make_yaml(typ='safe', pure=True)
+        with pytest.raises(ParserError) as expected:
+            yaml.load(fn)
+        yaml.memory_map = True
+        with pytest.raises(ParserError) as excinfo:
+            yaml.load(fn)
+        assert str(fn) in str(excinfo.value)
+        assert str(excinfo.value) == str(expected.value)
+        # the name is not kept for other input
+        with pytest.raises(ParserError, match='<unicode string>'):
+            yaml.load('a: [1\nb: 2\n')
+
+
+class TestReadChunkSize:
+    def test_fixed_chunk_size(self) -> None:
+        import io
+
+        doc = ''.join(big_doc.splitlines(keepends=True)[:50])
+        yaml = make_yaml(read_chunk_size=1)
+        expected = make_yaml().load(doc)
+        # single byte reads split every multi-byte character
+        assert yaml.load(io.BytesIO(doc.encode('utf-8'))) == expected
+        assert yaml.load(io.StringIO(doc)) == expected
+
+    def test_invalid_chunk_size(self) -> None:
+        with pytest.raises(ValueError):
+            make_yaml(read_chunk_size=0)
+
+    def test_adaptive_chunk_size(self, monkeypatch: Any) -> None:
+        import io
+        from ruamel.yaml.reader import Reader
+
+        sizes = []
+
+        class Stream(io.BytesIO):
+            def read(self, size: Any = -1) -> bytes:
+                sizes.append(size)
+                return super().read(size)
+
+        monkeypatch.setattr(Reader, 'max_chunk_size', 0x10000)
+        data = ''.join(f'key{idx}: value {idx}\n' for idx in range(20000))
+        yaml = make_yaml(typ='safe', pure=True)
+        assert len(yaml.load(Stream(data.encode('utf-8')))) == 20000
+        assert sizes[0] == Reader.initial_chunk_size
+        assert sizes[1] == 2 * sizes[0]
+        assert max(sizes) == Reader.max_chunk_size
+        assert len(sizes) < 30
+
+
+class TestForward:
+    @staticmethod
+    def positions(data: str, steps: Any, version_1_1: bool = False) -> Any:
+        from ruamel.yaml.reader import Reader
+
+        reader = Reader(data)
+        forward = reader.forward_1_1 if version_1_1 else reader.forward
+        res = []
+        for step in steps:
+            forward(step)
+            res.append((reader.index, reader.line, reader.column))
+        return res
+
+    def test_line_breaks(self) -> None:
+        data = '\ufeffab\r\ncd\ref\ngh\r'
+        single = self.positions(data, [1] * len(data))
+        assert single[-1] == (len(data), 4, 0)
+        # forwarding over several characters at once ends up in the same positions
+        for step in range(2, len(data) + 1):
+            steps = [step] * (len(data) // step)
+            assert self.positions(data, steps) == single[step - 1 :: step][: len(steps)]
+
+    def test_cr_before_lf(self) -> None:
+        # a '\r' at the end of the forwarded range, followed by '\n', is not a line break
+        assert self.positions('a\rb\r\nc', [4, 1]) == [(4, 1, 2), (5, 2, 0)]
+
+    def test_line_breaks_1_1(self) -> None:
+        data = 'a\x85b\u2028c\u2029d\ne'
+        assert self.positions(data, [len(data)]) == [(9, 1, 1)]
+        assert self.positions(data, [len(data)], version_1_1=True) == [(9, 4, 1)]
+
+
+class TestPrintable:
+    def test_error_position(self) -> None:
+        import io
+        from ruamel.yaml.reader import ReaderError
+
+        # the position is in characters, not in bytes of the UTF-8 encoding
+        data = 'a: äöü\nb: \x85 \ufeff\x9f\n'.encode('utf-8')
+        yaml = make_yaml(typ='safe', pure=True)
+        for stream in (data, io.BytesIO(data)):
+            with pytest.raises(ReaderError, match='(?s)#x009f.*position 13'):
+                yaml.load(stream)
+
+    def test_non_characters(self) -> None:
+        from ruamel.yaml.reader import ReaderError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        assert yaml.load('a: \ufffd\U00010000'.encode('utf-8')) == {'a': '\ufffd\U00010000'}
+        with pytest.raises(ReaderError, match='#xffff'):
+            yaml.load('a: é\uffff'.encode('utf-8'))
+
+    def test_trusted_input(self) -> None:
+        from ruamel.yaml.reader import ReaderError
+
+        data = 'a: "\x07"\n'
+        with pytest.raises(ReaderError):
+            make_yaml(typ='safe', pure=True).load(data)
+        yaml = make_yaml(typ='safe', pure=True, trusted_input=True)
+        assert yaml.load(data) == {'a': '\x07'}
+        assert yaml.load(data.encode('utf-8')) == {'a': '\x07'}
+
+
+class TestIndexMark:
+    def test_line_column(self) -> None:
+        import io
+
+        data = '\ufeffa: 1\r\nb:\r  - x\n  - "y\n    z"\nc: 3\n'
+        for stream in (data, io.StringIO(data)):
+            res = make_yaml().load(stream)
+            assert res.lc.key('a') == (0, 0)
+            assert res.lc.key('b') == (1, 0)
+            assert res['b'].lc.item(1) == (3, 4)
+            assert res.lc.key('c') == (5, 0)
+
+    def test_mark(self) -> None:
+        from ruamel.yaml.reader import Reader
+        from ruamel.yaml.error import StringMark
+
+        reader = Reader('ab\ncd\n')
+        reader.forward(4)
+        mark = reader.get_mark()
+        assert (mark.name, mark.index, mark.line, mark.column) == ('<unicode string>', 4, 1, 1)
+        assert mark == StringMark('<unicode string>', 4, 1, 1, 'ab\ncd\n\0', 4)
+        assert mark.get_snippet() == '    cd\n     ^ (line: 2)'
+        mark.column = 5
+        assert mark.column == 5 and mark.line == 1
+
+
+class TestFeed:
+    @staticmethod
+    def feed(yaml: Any, chunks: Any) -> Any:
+        return [yaml.feed(chunk) for chunk in chunks] + [yaml.feed_end()]
+
+    def test_documents(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        chunks = ['a: 1\n', '---\n', 'b: 2\n', '--', '-\nc: 3\n', '...\n', '--- d\n']
+        assert self.feed(yaml, chunks) == [
+            [], [{'a': 1}], [], [], [{'b': 2}], [], [{'c': 3}], ['d'],
+        ]
+        # the instance can feed the next stream
+        assert self.feed(yaml, ['x\n---\n', 'y']) == [['x'], [], ['y']]
+
+    def test_bytes(self) -> None:
+        data = '\ufeff- é\n--- [ü]\n--- # c\n{k: ö}\n'.encode('utf-8')
+        yaml = make_yaml(typ='safe', pure=True)
+        expected = list(make_yaml(typ='safe', pure=True).load_all(data))
+        # split every multi-byte character
+        res = self.feed(yaml, [data[idx : idx + 1] for idx in range(len(data))])
+        assert [doc for docs in res for doc in docs] == expected
+
+    def test_round_trip(self) -> None:
+        import io
+
+        data = '# top\na: 1  # one\n--- # two\n- b  # three\n# four\n...\n---\nc: d\n'
+        yaml = make_yaml()
+        docs = [doc for docs in self.feed(yaml, data.splitlines(True)) for doc in docs]
+        buf = io.StringIO()
+        yaml.explicit_start = True
+        yaml.dump_all(docs, buf)
+        expected = io.StringIO()
+        yaml.dump_all(yaml.load_all(data), expected)
+        assert buf.getvalue() == expected.getvalue()
+
+    def test_error(self) -> None:
+        from ruamel.yaml.scanner import ScannerError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        assert yaml.feed('a: 1\n---\n') == [{'a': 1}]
+        with pytest.raises(ScannerError, match='(?s)separator.*line 4, column 1'):
+            yaml.feed('b: "x\n---\nc: 2\n')
+        # an error ends the stream
+        assert self.feed(yaml, ['e: 5\n']) == [[], [{'e': 5}]]
+
+    def test_classes_restored(self) -> None:
+        # the Reader set for feed() is not kept, so a later load() can use the C loader
+        yaml = make_yaml(typ='safe', pure=True)
+        parser = yaml.Parser
+        assert yaml.Reader is None
+        assert self.feed(yaml, ['a: 1\n']) == [[], [{'a': 1}]]
+        assert yaml.Reader is None and yaml.Parser is parser
+        assert yaml.load('b: 2') == {'b': 2}
+
+
+class TestParallel:
+    data = (
+        'a: 1\n---\n- b\n- c\n...\n%YAML 1.1\n%TAG !e! tag:yaml.org,2002:\n# comment\n---\n'
+        'd: yes\nx: !e!str 1\n'
+        '--- |\n  literal\n  --- not a marker\n---\n{e: [f, g]}\n'
+    )
+
+    def test_split_documents(self) -> None:
+        from ruamel.yaml.reader import split_documents
+
+        data = self.data
+        points = split_documents(data)
+        assert [pos for pos, line in points] == [
+            0, data.index('---'), data.index('%YAML'), data.index('--- |'),
+            data.rindex('---\n{'),
+        ]
+        assert [line for pos, line in points] == [0, 1, 5, 11, 14]
+
+    def test_load_all(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        expected = list(make_yaml(typ='safe', pure=True).load_all(self.data))
+        assert list(yaml.load_all(self.data, workers=2)) == expected
+        # loaded with the directives
+        assert expected[2] == {'d': True, 'x': '1'}
+        assert [doc_info.tags for doc_info in yaml.doc_infos] == [
+            [], [], [('!e!', 'tag:yaml.org,2002:')], [], [], [],
+        ]
+        assert list(yaml.load_all(self.data.encode('utf-16'), workers=2)) == expected
+
+    def test_version(self) -> None:
+        # the version of a %YAML directive applies to the documents following it as well
+        data = 'a: [017, no]\n...\n%YAML 1.1\n---\nb: [017, no]\n---\nc: [017, no]\n'
+        sequential = make_yaml(typ='safe', pure=True)
+        expected = list(sequential.load_all(data))
+        assert expected[2] == {'c': [15, False]}
+        yaml = make_yaml(typ='safe', pure=True)
+        assert list(yaml.load_all(data, workers=2)) == expected
+        assert [
+            (doc_info.requested_version, doc_info.doc_version) for doc_info in yaml.doc_infos
+        ] == [
+            (doc_info.requested_version, doc_info.doc_version)
+            for doc_info in sequential.doc_infos
+        ]
+
+    def test_error(self) -> None:
+        from ruamel.yaml.scanner import ScannerError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        docs = []
+        with pytest.raises(ScannerError, match='line 5, column 4'):
+            for doc in yaml.load_all('a: 1\n---\nb: 2\n---\nc: "\n', workers=2):
+                docs.append(doc)
+        # the documents before the error are loaded
+        assert docs == [{'a': 1}, {'b': 2}]
+
+
+class TestDocumentIndex:
+    data = (
+        '# head\na: 1\n---\n- b\n...\n# bare\nc: 2\n...\n%TAG !e! tag:yaml.org,2002:\n'
+        '---\nd: !e!str 3\n--- |\n  literal\n  --- not a marker\n---\ne: [f,\n  g]\n'
+    )
+
+    def test_positions(self) -> None:
+        from ruamel.yaml.reader import document_positions
+
+        data = self.data.encode('utf-8')
+        assert document_positions(data) == [
+            (0, 0, []),
+            (data.index(b'---'), 2, []),
+            (data.index(b'# bare'), 5, []),
+            (data.index(b'%TAG'), 8, ['%TAG !e! tag:yaml.org,2002:']),
+            (data.index(b'--- |'), 11, []),
+            (data.rindex(b'---'), 14, []),
+        ]
+        assert document_positions(b'\xef\xbb\xbf# c\n') == []
+
+    def test_load_document(self, tmpdir: Any) -> None:
+        from ruamel.yaml.docinfo import DocumentIndex
+
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text(self.data, encoding='utf-8')
+        yaml = make_yaml(typ='safe', pure=True)
+        expected = list(yaml.load_all(fn))
+        assert len(yaml.index_documents(fn)) == len(expected)
+        assert DocumentIndex.sidecar(fn).exists()
+        yaml = make_yaml(typ='safe', pure=True)
+        assert [yaml.load_document(fn, idx) for idx in range(6)] == expected
+        assert yaml.load_document(fn, -1) == {'e': ['f', 'g']}
+        with pytest.raises(IndexError):
+            yaml.load_document(fn, 6)
+
+    def test_version(self, tmpdir: Any) -> None:
+        import itertools
+        from ruamel.yaml.scanner import ScannerError
+
+        # the version of a %YAML directive applies to the documents following it as well
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text(
+            'a: [017, no]\n...\n%YAML 1.1\n---\nb: [017, no]\n--- [017, no]\n...\n'
+            '%YAML 1.2\n---\nc: 1\n...\n# bare\nd: [017, no]\n--- "\n',
+            encoding='utf-8',
+        )
+        yaml = make_yaml(typ='safe', pure=True)
+        expected = [{'a': [17, 'no']}, {'b': [15, False]}, [15, False], {'c': 1}]
+        expected.append({'d': [17, 'no']})
+        assert [yaml.load_document(fn, idx) for idx in range(5)] == expected
+        documents = make_yaml(typ='safe', pure=True).load_all(fn)
+        assert list(itertools.islice(documents, 5)) == expected
+        with pytest.raises(ScannerError, match='line 14, column 5'):
+            yaml.load_document(fn, 5)
+
+    def test_round_trip(self, tmpdir: Any) -> None:
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text(self.data, encoding='utf-8')
+        yaml = make_yaml()
+        doc = yaml.load_document(fn, 2)
+        # the comment before the implicit document is part of it
+        assert doc.ca.comment[1][0].value == '# bare\n'
+        assert doc.lc.line == 6
+        assert yaml.load_document(fn, 5)['e'].lc.item(1) == (16, 2)
+
+    def test_stale(self, tmpdir: Any) -> None:
+        from ruamel.yaml.scanner import ScannerError
+
+        fn = Path(str(tmpdir)) / 'test.yaml'
+        fn.write_text(self.data, encoding='utf-8')
+        yaml = make_yaml(typ='safe', pure=True)
+        assert yaml.load_document(fn, 3) == {'d': '3'}
+        fn.write_text(self.data.replace('c: 2', 'c: "2\n---\nx: 1'), encoding='utf-8')
+        # the changed file is indexed again, errors have the line number in the file
+        with pytest.raises(ScannerError, match='line 8, column 1'):
+            yaml.load_document(fn, 2)
+        assert yaml.load_document(fn, 3) == {'x': 1}
@@ -0,0 +1,237 @@
+# coding: utf-8
+
+"""
+tests for the Scanner internals
+"""
+
+import pytest  # type: ignore  # NOQA
+
+from typing import Any
+
+
+def make_yaml(**kw: Any) -> Any:
+    from ruamel.yaml import YAML
+
+    yaml = YAML(**kw)
+    return yaml
+
+
+def token_names(yaml: Any, data: str) -> Any:
+    return [type(token).__name__.replace('Token', '') for token in yaml.scan(data)]
+
+
+class TestFetchDispatch:
+    def test_indicators(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        assert token_names(yaml, '--- {a: [b, *c]}\n...\n') == [
+            'StreamStart', 'DocumentStart', 'FlowMappingStart', 'Key', 'Scalar', 'Value',
+            'FlowSequenceStart', 'Scalar', 'FlowEntry', 'Alias', 'FlowSequenceEnd',
+            'FlowMappingEnd', 'DocumentEnd', 'StreamEnd',
+        ]
+
+    def test_failing_check_is_plain(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        # '-' and '.' not starting a document marker/block entry, and
+        # '|' in flow context
+        assert yaml.load('-a: .b\n') == {'-a': '.b'}
+        with pytest.raises(Exception, match="found character '|'"):
+            yaml.load('[|]')
+
+    def test_extend_table(self) -> None:
+        from ruamel.yaml.scanner import Scanner, RoundTripScanner
+
+        class PercentScanner(RoundTripScanner):
+            # a '%' that doesn't start a directive starts a plain scalar
+            fetch_table = {
+                **RoundTripScanner.fetch_table,
+                '%': (('check_directive', 'fetch_directive'), (None, 'fetch_plain')),
+            }
+
+        assert '%' in Scanner._fetch_dispatch
+        yaml = make_yaml()
+        yaml.Scanner = PercentScanner
+        assert yaml.load('a: %b\n') == {'a': '%b'}
+
+
+class TestPlainScalar:
+    def test_plain(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        assert yaml.load('a: b:c d?e  # x\nf: [g:h, i?j, k]\n') == {
+            'a': 'b:c d?e',
+            'f': ['g:h', 'i?j', 'k'],
+        }
+
+    def test_flow_question_mark_1_1(self) -> None:
+        from ruamel.yaml.parser import ParserError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        assert yaml.load('[a?b]\n') == ['a?b']
+        with pytest.raises(ParserError, match="got '[?]'"):
+            yaml.load('%YAML 1.1\n---\n[a?b]\n')
+
+    def test_chunked_stream(self) -> None:
+        import io
+
+        # the plain scalars are split over the chunks read from the stream
+        data = ''.join(f'key{idx}: a:b c{idx}\nl{idx}: [d:e, f{idx}]\n' for idx in range(50))
+        expected = make_yaml(typ='safe', pure=True).load(data)
+        yaml = make_yaml(typ='safe', pure=True, read_chunk_size=3)
+        assert yaml.load(io.StringIO(data)) == expected
+
+
+class TestQuotedScalar:
+    def test_runs(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        data = 'a: "x  y\\t\\x41\\u00e9 \\"q\\" \'s\'"\nb: \'x  "y" \\\\ \'\'s\'\'\'\n'
+        assert yaml.load(data) == {'a': 'x  y\tAé "q" \'s\'', 'b': 'x  "y" \\\\ \'s\''}
+
+    def test_folding(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        assert yaml.load('"a  \n  b \t\n\n  c\\\n  d"') == 'a b\ncd'
+
+    def test_bad_escape(self) -> None:
+        from ruamel.yaml.scanner import ScannerError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        with pytest.raises(ScannerError, match="hexdecimal numbers, but found 'g'"):
+            yaml.load('"\\u00g0"')
+
+    def test_round_trip(self) -> None:
+        import io
+
+        yaml = make_yaml()
+        yaml.preserve_quotes = True
+        data = 'a: "x  y\\t"\nb: \'p \'\'q\'\'\'\n'
+        buf = io.StringIO()
+        yaml.dump(yaml.load(data), buf)
+        assert buf.getvalue() == data
+
+
+class TestBlockScalar:
+    def test_literal_folded(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        data = 'a: |\n  x\n   y\n\n  z\nb: >-\n  p\n  q\n    r\n  s\n\n  t\nc: 1\n'
+        assert yaml.load(data) == {'a': 'x\n y\n\nz\n', 'b': 'p q\n  r\ns\nt', 'c': 1}
+
+    def test_chunked_stream(self) -> None:
+        import io
+
+        data = 'a: |\n' + ''.join(f'  line {idx}\n' for idx in range(100)) + 'b: >\n'
+        data += ''.join(f'  word{idx}\n' for idx in range(100)) + 'c: 1\n'
+        expected = make_yaml(typ='safe', pure=True).load(data)
+        assert expected['b'].count(' ') == 99
+        yaml = make_yaml(typ='safe', pure=True, read_chunk_size=5)
+        assert yaml.load(io.StringIO(data)) == expected
+
+    def test_round_trip(self) -> None:
+        import io
+
+        yaml = make_yaml()
+        data = 'a: >  # comment\n  x\n  y\n\n  z\n\n# trailing\nb: |-\n  p\n  q\n'
+        buf = io.StringIO()
+        yaml.dump(yaml.load(data), buf)
+        assert buf.getvalue() == data
+
+
+class TestIndexMarks:
+    def test_simple_key_slots(self) -> None:
+        from ruamel.yaml.scanner import SimpleKey
+
+        key = SimpleKey(0, False, 0, 0, 0, None)
+        with pytest.raises(AttributeError):
+            key.extra = 1  # type: ignore
+
+    def test_index_marks(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        data = 'a: 1\nbc: [d]\n'
+        expected = [
+            (type(t), getattr(t, 'value', None), t.start_mark.index, t.end_mark.index)
+            for t in yaml.scan(data)
+        ]
+        res = []
+        for t in yaml.scan(data, index_marks=True):
+            assert isinstance(t.start_mark, int) and isinstance(t.end_mark, int)
+            assert yaml.reader.line_index.line_column(t.start_mark)[0] == data.count(
+                '\n', 0, t.start_mark,
+            )
+            res.append((type(t), getattr(t, 'value', None), t.start_mark, t.end_mark))
+        assert res == expected
+
+    def test_index_marks_error(self) -> None:
+        from ruamel.yaml.scanner import ScannerError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        with pytest.raises(ScannerError, match='line 2, column 8'):
+            list(yaml.scan('a: 1\nb: "abc', index_marks=True))
+
+    def test_index_marks_round_trip(self) -> None:
+        from ruamel.yaml.error import YAMLError
+
+        with pytest.raises(YAMLError):
+            list(make_yaml().scan('a: 1', index_marks=True))
+
+
+class TestTokenQueue:
+    def test_nested_flow(self) -> None:
+        yaml = make_yaml(typ='safe', pure=True)
+        depth = 50
+        data = '{a: ' * depth + 'x' + ', b: [1, {c: d}]}' * depth
+        res = yaml.load(data)
+        for _ in range(depth - 1):
+            assert res['b'] == [1, {'c': 'd'}]
+            res = res['a']
+        assert res == {'a': 'x', 'b': [1, {'c': 'd'}]}
+
+    def test_stale_required_key(self) -> None:
+        from ruamel.yaml.scanner import ScannerError
+
+        yaml = make_yaml(typ='safe', pure=True)
+        with pytest.raises(ScannerError, match="could not find expected ':'"):
+            yaml.load('a: 1\nb\nc: 2\n')
+
+    def test_round_trip_comments(self) -> None:
+        import io
+
+        yaml = make_yaml()
+        data = 'a: 1  # one\n# two\nb: [c, d]  # three\n  # four\ne: 5\n'
+        buf = io.StringIO()
+        yaml.dump(yaml.load(data), buf)
+        assert buf.getvalue() == data
+
+
+class TestComments:
+    @staticmethod
+    def round_trip(data: str, **kw: Any) -> str:
+        import io
+
+        yaml = make_yaml(**kw)
+        buf = io.StringIO()
+        yaml.dump(yaml.load(data), buf)
+        return buf.getvalue()
+
+    def test_comment_lines(self) -> None:
+        data = '# top\n\n\na: 1  # one\n\n  # two\n\n\n# three\nb:\n- c  # four\n# five\n- d\n'
+        assert self.round_trip(data) == data
+
+    def test_crlf(self) -> None:
+        data = 'a: 1  # one\r\n\r\n# two\r\nb: 2\r\n'
+        res = make_yaml().load(data)
+        assert res == {'a': 1, 'b': 2}
+        assert res.lc.key('b') == (3, 0)
+        assert res.ca.items['a'][2].value.startswith('# one')
+        assert '# two' in res.ca.items['a'][2].value
+
+    def test_comment_at_end(self) -> None:
+        assert self.round_trip('a: 1\n# last') == 'a: 1\n# last\n'
+        assert self.round_trip('a: 1  # last') == 'a: 1  # last\n'
+
+    def test_chunked_input(self) -> None:
+        import io
+
+        data = ''.join(f'k{idx}: {idx}  # c{idx}\n\n# line {idx}\n' for idx in range(200))
+        expected = self.round_trip(data)
+        # every comment and empty line is split over the reads
+        yaml = make_yaml(read_chunk_size=3)
+        buf = io.StringIO()
+        yaml.dump(yaml.load(io.BytesIO(data.encode('utf-8'))), buf)
+        assert buf.getvalue() == expected
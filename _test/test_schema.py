@@ -0,0 +1,161 @@
+# coding: utf-8
+
+"""
+tests for loading according to a schema
+"""
+
+import dataclasses
+import datetime
+import pytest  # type: ignore  # NOQA
+
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, TypedDict, Union
+
+
+@dataclasses.dataclass
+class Port:
+    port: int
+    protocol: str = 'tcp'
+
+
+@dataclasses.dataclass
+class Container:
+    name: str
+    image: str
+    ports: List[Port] = dataclasses.field(default_factory=list)
+    env: Dict[str, str] = dataclasses.field(default_factory=dict)
+    replicas: Optional[int] = None
+    ratio: float = 1.0
+    enabled: bool = True
+    extra: Any = None
+
+
+class Meta(TypedDict, total=False):
+    labels: Dict[str, str]
+    created: datetime.date
+
+
+@dataclasses.dataclass
+class Spec:
+    containers: List[Container]
+    meta: Meta
+    pair: Tuple[int, str] = (0, '')
+    tags: FrozenSet[str] = frozenset()
+    choice: Union[int, List[int], None] = None
+    base: Any = None
+
+
+def load(data: str, schema: Any, typ: str = 'safe') -> Any:
+    from ruamel.yaml import YAML
+
+    yaml = YAML(typ=typ, pure=True)
+    return yaml.load(data, schema=schema)
+
+
+class TestSchema:
+    data = """\
+meta: {labels: {app: web, version: 1.0}, created: 2024-01-02}
+base: &b {image: nginx, ratio: 2}
+containers:
+- name: a
+  <<: *b
+  ports: [{port: 80}, {port: 0x1bb, protocol: udp}]
+  env: {X: 1, Y: yes}
+  replicas: 3
+  extra: {any: [thing, 1]}
+- &c {name: b, image: redis, enabled: false, ratio: 1e3, replicas: ~}
+- *c
+pair: [1, x]
+tags: [p, q, p]
+choice: [1, 2]
+"""
+
+    @pytest.mark.parametrize('typ', ['safe', 'rt'])
+    def test_load(self, typ: str) -> None:
+        spec = load(self.data, Spec, typ)
+        first = Container(
+            name='a',
+            image='nginx',
+            ports=[Port(80), Port(443, 'udp')],
+            env={'X': '1', 'Y': 'yes'},
+            replicas=3,
+            ratio=2.0,
+            extra={'any': ['thing', 1]},
+        )
+        second = Container(name='b', image='redis', ratio=1000.0, enabled=False)
+        assert spec == Spec(
+            containers=[first, second, second],
+            meta={
+                'labels': {'app': 'web', 'version': '1.0'},
+                'created': datetime.date(2024, 1, 2),
+            },
+            pair=(1, 'x'),
+            tags=frozenset(['p', 'q']),
+            choice=[1, 2],
+            base={'image': 'nginx', 'ratio': 2},
+        )
+        assert type(spec.containers[0].ratio) is float
+        # the aliased node is loaded once
+        assert spec.containers[1] is spec.containers[2]
+
+    def test_scalars(self) -> None:
+        assert load('[1, 0o17, -2_000, .5, .inf, 2, ~]', List[Optional[float]])[:4] == [
+            1.0, 15.0, -2000.0, 0.5,
+        ]
+        assert load('[yes, true, "1", 1]', List[Union[bool, int, str]]) == [
+            'yes', True, '1', 1,
+        ]
+        assert load('2001-12-14 21:59:43.10', datetime.datetime) == datetime.datetime(
+            2001, 12, 14, 21, 59, 43, 100000,
+        )
+        assert load('!!str 12', str) == '12'
+        assert load('', Optional[Spec]) is None
+        assert load('', Any) is None
+
+    def test_version(self) -> None:
+        # the implicit resolvers of the version of the document are used
+        assert load('%YAML 1.1\n---\n[yes, 0b11, 1_0]', Tuple[bool, int, int]) == (
+            True, 3, 10,
+        )
+        assert load('[yes, 010]', Tuple[str, int]) == ('yes', 10)
+
+    @pytest.mark.parametrize(
+        'data, message',
+        [
+            ('containers: [{name: a}]\nmeta: {}\n', "missing required key(s) 'image'"),
+            ('containers: [{name: a, image: b, ports: [{port: x}]}]\nmeta: {}\n',
+             "expected int, found the scalar 'x'"),
+            ('containers: {}\nmeta: {}\n', 'expected List[Container], found a mapping'),
+            ('containers: []\nmeta: {}\npair: [1]\n', 'expected 2 items, found 1'),
+            ('containers: []\nmeta: {}\npair: [1, a, 3]\n', 'expected 2 items, found more'),
+            ('containers: []\nmeta: {created: 12}\n', "expected date, found the scalar '12'"),
+            ('containers: []\nmeta: !foo {}\n', 'expected Meta, found a mapping tagged !foo'),
+            ('containers: []\nmeta: {labels: {a: ~}}\n', "expected str, found the scalar '~'"),
+            ('containers: []\nmeta: {}\nx: 1\n', "found unexpected key 'x'"),
+            ('- 1\n', 'expected Spec, found a sequence'),
+            ('', 'expected Spec, found an empty stream'),
+        ],
+    )
+    def test_error(self, data: str, message: str) -> None:
+        from ruamel.yaml.schema import SchemaError
+
+        with pytest.raises(SchemaError) as excinfo:
+            load(data, Spec)
+        assert message in str(excinfo.value)
+        assert excinfo.value.problem_mark is not None
+
+    def test_document_error(self) -> None:
+        from ruamel.yaml.composer import ComposerError
+        from ruamel.yaml.constructor import DuplicateKeyError
+
+        with pytest.raises(DuplicateKeyError, match='found duplicate key "meta"'):
+            load('containers: []\nmeta: {}\nmeta: {}\n', Spec)
+        with pytest.raises(ComposerError, match='expected a single document'):
+            load('containers: []\nmeta: {}\n---\nx: 1\n', Spec)
+
+    def test_bad_schema(self) -> None:
+        with pytest.raises(TypeError, match='cannot load complex according to a schema'):
+            load('1', complex)
+        with pytest.raises(TypeError, match='the keys of .* should have a scalar type'):
+            load('{}', Dict[Tuple[int, int], int])
+        with pytest.raises(TypeError, match='more than one sequence type'):
+            load('[]', Union[List[int], Tuple[str, ...]])
@@ -217,3 +217,36 @@ class TestImplicitTaggedNodes:
         - !Sequence [a, b: 1, c: {d: 3}]
         """,
         )
+
+
+class TestInternedTag:
+    def test_shared(self) -> None:
+        from ruamel.yaml import YAML
+
+        yaml = YAML(typ='safe', pure=True)
+        node = yaml.compose('[1, 2, a, "b", !!int 3]')
+        one, two, a, b, three = [item.ctag for item in node.value]
+        assert one is two
+        assert a is b and a.tag_id is not None and a.tag_id != one.tag_id
+        assert three == one and three.tag_id is None
+        assert yaml.load('[1, 2, a, "b", !!int 3]') == [1, 2, 'a', 'b', 3]
+
+    def test_constructor_added(self) -> None:
+        from ruamel.yaml import YAML
+        from ruamel.yaml.constructor import SafeConstructor
+
+        class IntConstructor(SafeConstructor):
+            pass
+
+        yaml = YAML(typ='safe', pure=True)
+        yaml.Constructor = IntConstructor
+        assert yaml.load('[1, a]') == [1, 'a']
+
+        def construct_str(self: Any, node: Any) -> Any:
+            # a generator function is not called directly
+            data = [node.value]
+            yield data
+
+        IntConstructor.add_constructor('tag:yaml.org,2002:int', lambda self, node: -1)
+        IntConstructor.add_constructor('tag:yaml.org,2002:str', construct_str)
+        assert yaml.load('[1, a]') == [-1, ['a']]
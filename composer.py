@@ -1,6 +1,7 @@
 
 from __future__ import annotations
 
+import re
 import warnings
 
 from ruamel.yaml.error import MarkedYAMLError, ReusedAnchorWarning
@@ -9,25 +10,87 @@ from ruamel.yaml.compat import nprint, nprintf  # NOQA
 from ruamel.yaml.events import (
     StreamStartEvent,
     StreamEndEvent,
-    MappingStartEvent,
-    MappingEndEvent,
-    SequenceStartEvent,
-    SequenceEndEvent,
-    AliasEvent,
     ScalarEvent,
+    ALIAS,
+    SCALAR,
+    SEQUENCE_START,
+    SEQUENCE_END,
+    MAPPING_START,
+    MAPPING_END,
 )
 from ruamel.yaml.nodes import MappingNode, ScalarNode, SequenceNode
 
 if False:  # MYPY
-    from typing import Any, Dict, Optional, List  # NOQA
+    from typing import Any, Dict, Optional, List, Tuple, Iterator  # NOQA
 
-__all__ = ['Composer', 'ComposerError']
+__all__ = ['Composer', 'ComposerError', 'parse_path']
 
 
 class ComposerError(MarkedYAMLError):
     pass
 
 
+MAX_DEPTH = 10000
+
+
+_PATH_ELEMENT = re.compile(
+    '\\.(?P<key>[^.[\\]]+)'
+    '|\\[(?:(?P<index>[0-9]+)|(?P<any>\\*)|\'(?P<squoted>[^\']*)\'|"(?P<dquoted>[^"]*)")\\]',
+)
+
+
+def parse_path(path: Any) -> Tuple[Any, ...]:
+    """
+    convert a path selector, as given to YAML.parse(), to a tuple of mapping keys (str),
+    sequence indices (int) and None, which selects any key or index.
+    A str path is in a JSONPath like notation: an optional '$', followed by keys after a
+    '.' (the first one can leave out the '.'), or between quotes in brackets, and
+    indices in brackets, '*' for any key or [*] for any index,
+    e.g. 'spec.containers[*].image' or "$.metadata.labels['app.kubernetes.io/name']"
+    Any other path is taken to be a sequence of the elements of the tuple.
+    """
+    if not isinstance(path, str):
+        return tuple(path)
+    res: List[Any] = []
+    selector = path
+    if path.startswith('$'):
+        path = path[1:]
+    elif path and path[0] not in '.[':
+        path = '.' + path
+    pos = 0
+    while pos < len(path):
+        match = _PATH_ELEMENT.match(path, pos)
+        if match is None:
+            raise ValueError(f'invalid path selector {selector!r}')
+        kind = match.lastgroup
+        if kind == 'index':
+            res.append(int(match.group(kind)))
+        elif kind == 'any' or (kind == 'key' and match.group(kind) == '*'):
+            res.append(None)
+        else:
+            res.append(match.group(kind))
+        pos = match.end()
+    return tuple(res)
+
+
+def select_nodes(node: Any, path: Tuple[Any, ...]) -> Iterator[Any]:
+    """the nodes in a composed node (tree) selected by a tuple from parse_path()"""
+    if not path:
+        yield node
+        return
+    elem = path[0]
+    if isinstance(node, MappingNode) and not isinstance(elem, int):
+        for key_node, value_node in node.value:
+            if elem is None or (isinstance(key_node, ScalarNode) and key_node.value == elem):
+                for selected in select_nodes(value_node, path[1:]):
+                    yield selected
+    elif isinstance(node, SequenceNode) and (elem is None or isinstance(elem, int)):
+        for index, item_node in enumerate(node.value):
+            if elem is None or elem == index:
+                for selected in select_nodes(item_node, path[1:]):
+                    yield selected
+
+
 class Composer:
     def __init__(self, loader: Any = None) -> None:
         self.loader = loader
@@ -35,6 +98,10 @@ class Composer:
             self.loader._composer = self
         self.anchors: Dict[Any, Any] = {}
         self.warn_double_anchors = True
+        # the maximum nesting of collections in a document, None for no limit
+        self.max_depth: Optional[int] = MAX_DEPTH
+        # the number of collections open, only kept by compose_nested_items()
+        self.depth = 0
 
     @property
     def parser(self) -> Any:
@@ -99,38 +166,127 @@ class Composer:
 
         return node
 
+    def select_document(self, path: Tuple[Any, ...]) -> Iterator[Any]:
+        """
+        Generate the nodes of the next document selected by a tuple from parse_path().
+        The events of the subtrees that cannot contain a selected node are skipped
+        without composing nodes, except for the nodes with an anchor, which an alias in
+        a selected node can refer to. Keys are matched against the value of scalar keys.
+        """
+        self.anchors = {}
+        # Drop the DOCUMENT-START event.
+        self.parser.get_event()
+
+        for node in self.select_node(path, None, None):
+            yield node
+
+        # Drop the DOCUMENT-END event.
+        self.parser.get_event()
+
+    def select_node(self, path: Tuple[Any, ...], parent: Any, index: Any) -> Iterator[Any]:
+        if not path:
+            yield self.compose_node(parent, index)
+            return
+        event = self.parser.peek_event()
+        kind = event.kind
+        if kind == ALIAS or event.anchor is not None:
+            # the node is composed as a whole, an alias may refer to it
+            for node in select_nodes(self.compose_node(parent, index), path):
+                yield node
+            return
+        elem = path[0]
+        if kind == MAPPING_START and not isinstance(elem, int):
+            # the collection node is created without its items, as the parent for the
+            # path resolvers
+            self.resolver.descend_resolver(parent, index)
+            collection = self.start_mapping_node(None)
+            while self.parser.peek_event().kind != MAPPING_END:
+                key_node = self.compose_node(collection, None)
+                if elem is None or (
+                    isinstance(key_node, ScalarNode) and key_node.value == elem
+                ):
+                    for node in self.select_node(path[1:], collection, key_node):
+                        yield node
+                else:
+                    self.skip_node(collection, key_node)
+            self.parser.get_event()
+            self.resolver.ascend_resolver()
+        elif kind == SEQUENCE_START and (elem is None or isinstance(elem, int)):
+            self.resolver.descend_resolver(parent, index)
+            collection = self.start_sequence_node(None)
+            item_index = 0
+            while self.parser.peek_event().kind != SEQUENCE_END:
+                if elem is None or elem == item_index:
+                    for node in self.select_node(path[1:], collection, item_index):
+                        yield node
+                else:
+                    self.skip_node(collection, item_index)
+                item_index += 1
+            self.parser.get_event()
+            self.resolver.ascend_resolver()
+        else:
+            self.skip_node(parent, index)
+
+    def skip_node(self, parent: Any, index: Any) -> None:
+        # drop the events of a node, only composing the nodes with an anchor in it
+        if self.resolver.yaml_path_resolvers:
+            # an anchored node needs the tag given by the path resolvers for its position
+            self.compose_node(parent, index)
+            return
+        depth = 0
+        while True:
+            event = self.parser.peek_event()
+            kind = event.kind
+            if kind != ALIAS and getattr(event, 'anchor', None) is not None:
+                self.compose_node(None, None)
+            else:
+                self.parser.get_event()
+                if kind == SEQUENCE_START or kind == MAPPING_START:
+                    depth += 1
+                elif kind == SEQUENCE_END or kind == MAPPING_END:
+                    depth -= 1
+            if depth == 0:
+                return
+
     def return_alias(self, a: Any) -> Any:
         return a
 
     def compose_node(self, parent: Any, index: Any) -> Any:
-        if self.parser.check_event(AliasEvent):
-            event = self.parser.get_event()
-            alias = event.anchor
-            if alias not in self.anchors:
-                raise ComposerError(
-                    None, None, f'found undefined alias {alias!r}', event.start_mark,
-                )
-            return self.return_alias(self.anchors[alias])
         event = self.parser.peek_event()
+        kind = event.kind
+        if kind == ALIAS:
+            return self.compose_alias_node()
         anchor = event.anchor
         if anchor is not None:  # have an anchor
-            if self.warn_double_anchors and anchor in self.anchors:
-                ws = (
-                    f'\nfound duplicate anchor {anchor!r}\n'
-                    f'first occurrence {self.anchors[anchor].start_mark}\n'
-                    f'second occurrence {event.start_mark}'
-                )
-                warnings.warn(ws, ReusedAnchorWarning, stacklevel=2)
+            self.check_anchor(anchor, event)
         self.resolver.descend_resolver(parent, index)
-        if self.parser.check_event(ScalarEvent):
+        if kind == SCALAR:
             node = self.compose_scalar_node(anchor)
-        elif self.parser.check_event(SequenceStartEvent):
+        elif kind == SEQUENCE_START:
             node = self.compose_sequence_node(anchor)
-        elif self.parser.check_event(MappingStartEvent):
+        elif kind == MAPPING_START:
             node = self.compose_mapping_node(anchor)
         self.resolver.ascend_resolver()
         return node
 
+    def compose_alias_node(self) -> Any:
+        event = self.parser.get_event()
+        alias = event.anchor
+        if alias not in self.anchors:
+            raise ComposerError(
+                None, None, f'found undefined alias {alias!r}', event.start_mark,
+            )
+        return self.return_alias(self.anchors[alias])
+
+    def check_anchor(self, anchor: Any, event: Any) -> None:
+        if self.warn_double_anchors and anchor in self.anchors:
+            ws = (
+                f'\nfound duplicate anchor {anchor!r}\n'
+                f'first occurrence {self.anchors[anchor].start_mark}\n'
+                f'second occurrence {event.start_mark}'
+            )
+            warnings.warn(ws, ReusedAnchorWarning, stacklevel=3)
+
     def compose_scalar_node(self, anchor: Any) -> Any:
         event = self.parser.get_event()
         tag = event.ctag
@@ -152,6 +308,118 @@ class Composer:
         return node
 
     def compose_sequence_node(self, anchor: Any) -> Any:
+        node = self.start_sequence_node(anchor)
+        self.compose_collection_items(node)
+        return node
+
+    def compose_mapping_node(self, anchor: Any) -> Any:
+        node = self.start_mapping_node(anchor)
+        self.compose_collection_items(node)
+        return node
+
+    def compose_collection_items(self, collection: Any) -> None:
+        """
+        Compose the items of a sequence or mapping node, of which the start event has been
+        handled, up to and including its end event. Nested collections are kept on a
+        stack instead of composed by recursive calls, so the nesting depth is only
+        limited by .max_depth.
+        """
+        cls = type(self)
+        if (
+            cls.compose_node is not Composer.compose_node
+            or cls.compose_sequence_node is not Composer.compose_sequence_node
+            or cls.compose_mapping_node is not Composer.compose_mapping_node
+        ):
+            self.compose_nested_items(collection)
+            return
+        parser = self.parser
+        resolver = self.resolver
+        max_depth = self.max_depth
+        stack = [collection]
+        keys: List[Any] = [None]  # the key node waiting for its value, per mapping
+        while True:
+            top = stack[-1]
+            event = parser.peek_event()
+            kind = event.kind
+            if kind == SEQUENCE_END or kind == MAPPING_END:
+                if kind == SEQUENCE_END:
+                    self.end_sequence_node(top)
+                else:
+                    self.end_mapping_node(top)
+                stack.pop()
+                keys.pop()
+                if not stack:
+                    return
+                resolver.ascend_resolver()
+                node = top
+                top = stack[-1]
+            elif kind == ALIAS:
+                node = self.compose_alias_node()
+            else:
+                anchor = event.anchor
+                if anchor is not None:
+                    self.check_anchor(anchor, event)
+                if top.id == 'sequence':
+                    resolver.descend_resolver(top, len(top.value))
+                else:
+                    resolver.descend_resolver(top, keys[-1])
+                if kind == SCALAR:
+                    node = self.compose_scalar_node(anchor)
+                    resolver.ascend_resolver()
+                else:
+                    if max_depth is not None and len(stack) >= max_depth:
+                        raise ComposerError(
+                            'while composing a node',
+                            collection.start_mark,
+                            f'found nesting deeper than the maximum depth of {max_depth}',
+                            event.start_mark,
+                        )
+                    if kind == SEQUENCE_START:
+                        stack.append(self.start_sequence_node(anchor))
+                    else:
+                        stack.append(self.start_mapping_node(anchor))
+                    keys.append(None)
+                    continue
+            # add the completed node to the collection it is in
+            if top.id == 'sequence':
+                top.value.append(node)
+            elif keys[-1] is None:
+                keys[-1] = node
+            else:
+                top.value.append((keys[-1], node))
+                keys[-1] = None
+
+    def compose_nested_items(self, collection: Any) -> None:
+        """
+        compose_collection_items() for a subclass that overrides compose_node(),
+        compose_sequence_node() or compose_mapping_node(): these are called for every
+        nested node, so the nesting depth is limited by the recursion limit as well
+        """
+        if self.max_depth is not None and self.depth >= self.max_depth:
+            raise ComposerError(
+                None,
+                None,
+                f'found nesting deeper than the maximum depth of {self.max_depth}',
+                collection.start_mark,
+            )
+        self.depth += 1
+        try:
+            if collection.id == 'sequence':
+                index = 0
+                while self.parser.peek_event().kind != SEQUENCE_END:
+                    collection.value.append(self.compose_node(collection, index))
+                    index += 1
+                self.end_sequence_node(collection)
+            else:
+                while self.parser.peek_event().kind != MAPPING_END:
+                    item_key = self.compose_node(collection, None)
+                    item_value = self.compose_node(collection, item_key)
+                    collection.value.append((item_key, item_value))
+                self.end_mapping_node(collection)
+        finally:
+            self.depth -= 1
+
+    def start_sequence_node(self, anchor: Any) -> Any:
         start_event = self.parser.get_event()
         tag = start_event.ctag
         if tag is None or str(tag) == '!':
@@ -168,10 +436,9 @@ class Composer:
         )
         if anchor is not None:
             self.anchors[anchor] = node
-        index = 0
-        while not self.parser.check_event(SequenceEndEvent):
-            node.value.append(self.compose_node(node, index))
-            index += 1
+        return node
+
+    def end_sequence_node(self, node: Any) -> None:
         end_event = self.parser.get_event()
         if node.flow_style is True and end_event.comment is not None:
             if node.comment is not None:
@@ -183,9 +450,8 @@ class Composer:
             node.comment = end_event.comment
         node.end_mark = end_event.end_mark
         self.check_end_doc_comment(end_event, node)
-        return node
 
-    def compose_mapping_node(self, anchor: Any) -> Any:
+    def start_mapping_node(self, anchor: Any) -> Any:
         start_event = self.parser.get_event()
         tag = start_event.ctag
         if tag is None or str(tag) == '!':
@@ -202,22 +468,14 @@ class Composer:
         )
         if anchor is not None:
             self.anchors[anchor] = node
-        while not self.parser.check_event(MappingEndEvent):
-            # key_event = self.parser.peek_event()
-            item_key = self.compose_node(node, None)
-            # if item_key in node.value:
-            #     raise ComposerError("while composing a mapping",
-            #             start_event.start_mark,
-            #             "found duplicate key", key_event.start_mark)
-            item_value = self.compose_node(node, item_key)
-            # node.value[item_key] = item_value
-            node.value.append((item_key, item_value))
+        return node
+
+    def end_mapping_node(self, node: Any) -> None:
         end_event = self.parser.get_event()
         if node.flow_style is True and end_event.comment is not None:
             node.comment = end_event.comment
         node.end_mark = end_event.end_mark
         self.check_end_doc_comment(end_event, node)
-        return node
 
     def check_end_doc_comment(self, end_event: Any, node: Any) -> None:
         if end_event.comment and end_event.comment[1]:
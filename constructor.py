@@ -4,6 +4,7 @@ from __future__ import annotations
 import datetime
 from datetime import timedelta as TimeDelta
 import binascii
+import inspect
 import sys
 import types
 import warnings
@@ -18,7 +19,7 @@ from ruamel.yaml.compat import (builtins_module, # NOQA
                                 nprint, nprintf, version_tnf)
 from ruamel.yaml.compat import ordereddict
 
-from ruamel.yaml.tag import Tag
+from ruamel.yaml.tag import Tag, intern_tag
 from ruamel.yaml.comments import *                               # NOQA
 from ruamel.yaml.comments import (CommentedMap, CommentedOrderedMap, CommentedSet,
                                   CommentedKeySeq, CommentedSeq, TaggedScalar,
@@ -33,6 +34,7 @@ from ruamel.yaml.scalarint import ScalarInt, BinaryInt, OctalInt, HexInt, HexCap
 from ruamel.yaml.scalarfloat import ScalarFloat
 from ruamel.yaml.scalarbool import ScalarBoolean
 from ruamel.yaml.timestamp import TimeStamp
+from ruamel.yaml.lazy import LazyMap, LazyMemo, LazySeq
 from ruamel.yaml.util import timestamp_regexp, create_timestamp
 
 if False:  # MYPY
@@ -40,7 +42,7 @@ if False:  # MYPY
 
 
 __all__ = ['BaseConstructor', 'SafeConstructor', 'Constructor',
-           'ConstructorError', 'RoundTripConstructor']
+           'ConstructorError', 'RoundTripConstructor', 'LazyConstructor']
 # fmt: on
 
 
@@ -59,6 +61,16 @@ class DuplicateKeyError(MarkedYAMLError):
     pass
 
 
+# incremented whenever a constructor is added to a constructor class
+_constructors_changed = 0
+
+# the tags of the core schema scalars, constructed without the checks for generators,
+# multi constructors and recursion when their constructors are plain functions
+_core_scalar_tags = [
+    intern_tag('tag:yaml.org,2002:' + tag) for tag in ('str', 'int', 'float', 'bool', 'null')
+]
+
+
 class BaseConstructor:
 
     yaml_constructors = {}  # type: Dict[Any, Any]
@@ -74,7 +86,12 @@ class BaseConstructor:
         self.constructed_objects: Dict[Any, Any] = {}
         self.recursive_objects: Dict[Any, Any] = {}
         self.state_generators: List[Any] = []
+        # the generators in .state_generators by node, for construct_deferred()
+        self.deferred_generators: Dict[Any, Any] = {}
         self.deep_construct = False
+        # the constructors for _core_scalar_tags by .tag_id, see scalar_constructors()
+        self._scalar_constructors: Dict[Any, Any] = {}
+        self._scalar_constructors_changed = -1
         self._preserve_quotes = preserve_quotes
         self.allow_duplicate_keys = version_tnf((0, 15, 1), (0, 16))
 
@@ -96,6 +113,11 @@ class BaseConstructor:
             return self.loader.resolver
         return self.loader._resolver
 
+    @property
+    def construct_version(self) -> Any:
+        """the YAML version of the document being constructed"""
+        return self.resolver.processing_version
+
     @property
     def scanner(self) -> Any:
         # needed to get to the expanded comments
@@ -120,6 +142,8 @@ class BaseConstructor:
         return None
 
     def construct_document(self, node: Any) -> Any:
+        # the objects for the collections are filled in by their generators level by
+        # level, not depth first, so deeply nested documents need no recursion
         data = self.construct_object(node)
         while bool(self.state_generators):
             state_generators = self.state_generators
@@ -129,15 +153,33 @@ class BaseConstructor:
                     pass
         self.constructed_objects = {}
         self.recursive_objects = {}
+        self.deferred_generators = {}
         self.deep_construct = False
         return data
 
+    def construct_deferred(self, node: Any) -> None:
+        """
+        complete the construction of the object for node if it was constructed (not deep)
+        and its generator has not run yet, e.g. when it is merged into a mapping.
+        This doesn't include the items in the object.
+        """
+        generator = self.deferred_generators.pop(node, None)
+        if generator is not None and not generator.gi_running:
+            for _dummy in generator:
+                pass
+
     def construct_object(self, node: Any, deep: bool = False) -> Any:
         """deep is True when creating an object/mapping recursively,
         in that case want the underlying elements available during construction
         """
         if node in self.constructed_objects:
             return self.constructed_objects[node]
+        if self._scalar_constructors_changed != _constructors_changed:
+            self.scalar_constructors()
+        constructor = self._scalar_constructors.get(getattr(node.ctag, 'tag_id', None))
+        if constructor is not None:
+            data = self.constructed_objects[node] = constructor(self, node)
+            return data
         if deep:
             old_deep = self.deep_construct
             self.deep_construct = True
@@ -155,6 +197,20 @@ class BaseConstructor:
             self.deep_construct = old_deep
         return data
 
+    def scalar_constructors(self) -> Dict[Any, Any]:
+        """
+        the constructors of the core schema scalars that can be called directly, by the
+        .tag_id of their (interned) tag: the ones that are not generator functions
+        """
+        constructors = {}
+        for tag in _core_scalar_tags:
+            constructor = self.yaml_constructors.get(str(tag))
+            if constructor is not None and not inspect.isgeneratorfunction(constructor):
+                constructors[tag.tag_id] = constructor
+        self._scalar_constructors = constructors
+        self._scalar_constructors_changed = _constructors_changed
+        return constructors
+
     def construct_non_recursive_object(self, node: Any, tag: Optional[str] = None) -> Any:
         constructor: Any = None
         tag_suffix = None
@@ -177,9 +233,9 @@ class BaseConstructor:
                 elif isinstance(node, ScalarNode):
                     constructor = self.__class__.construct_scalar
                 elif isinstance(node, SequenceNode):
-                    constructor = self.__class__.construct_sequence
+                    constructor = self.__class__.construct_default_sequence
                 elif isinstance(node, MappingNode):
-                    constructor = self.__class__.construct_mapping
+                    constructor = self.__class__.construct_default_mapping
         if tag_suffix is None:
             data = constructor(self, node)
         else:
@@ -192,6 +248,7 @@ class BaseConstructor:
                     pass
             else:
                 self.state_generators.append(generator)
+                self.deferred_generators[node] = generator
         return data
 
     def construct_scalar(self, node: Any) -> Any:
@@ -201,6 +258,18 @@ class BaseConstructor:
             )
         return node.value
 
+    def construct_default_sequence(self, node: Any) -> Any:
+        # the items are constructed after the list is returned, level by level, like the
+        # collections of the safe constructor
+        data: List[Any] = self.yaml_base_list_type()
+        yield data
+        data.extend(self.construct_sequence(node))
+
+    def construct_default_mapping(self, node: Any) -> Any:
+        data: Dict[Any, Any] = self.yaml_base_dict_type()
+        yield data
+        data.update(self.construct_mapping(node))
+
     def construct_sequence(self, node: Any, deep: bool = False) -> Any:
         """deep is True when creating an object/mapping recursively,
         in that case want the underlying elements available during construction
@@ -320,12 +389,14 @@ class BaseConstructor:
     # instance variable once function load is dropped.
     @classmethod
     def add_constructor(cls, tag: Any, constructor: Any) -> Any:
+        global _constructors_changed
         if isinstance(tag, Tag):
             tag = str(tag)
         if 'yaml_constructors' not in cls.__dict__:
             cls.yaml_constructors = cls.yaml_constructors.copy()
         ret_val = cls.yaml_constructors.get(tag, None)
         cls.yaml_constructors[tag] = constructor
+        _constructors_changed += 1
         return ret_val
 
     @classmethod
@@ -452,6 +523,7 @@ class SafeConstructor(BaseConstructor):
             sign = -1
         if value_s[0] in '+-':
             value_s = value_s[1:]
+        version = self.construct_version
         if value_s == '0':
             return 0
         elif value_s.startswith('0b'):
@@ -460,9 +532,9 @@ class SafeConstructor(BaseConstructor):
             return sign * int(value_s[2:], 16)
         elif value_s.startswith('0o'):
             return sign * int(value_s[2:], 8)
-        elif self.resolver.processing_version == (1, 1) and value_s[0] == '0':
+        elif version == (1, 1) and value_s[0] == '0':
             return sign * int(value_s, 8)
-        elif self.resolver.processing_version == (1, 1) and ':' in value_s:
+        elif version == (1, 1) and ':' in value_s:
             digits = [int(part) for part in value_s.split(':')]
             digits.reverse()
             base = 1
@@ -491,7 +563,8 @@ class SafeConstructor(BaseConstructor):
             return sign * self.inf_value
         elif value_s == '.nan':
             return self.nan_value
-        elif self.resolver.processing_version != (1, 2) and ':' in value_s:
+        version = self.construct_version
+        if version != (1, 2) and ':' in value_s:
             digits = [float(part) for part in value_s.split(':')]
             digits.reverse()
             base = 1
@@ -501,7 +574,7 @@ class SafeConstructor(BaseConstructor):
                 base *= 60
             return sign * value
         else:
-            if self.resolver.processing_version != (1, 2) and 'e' in value_s:
+            if version != (1, 2) and 'e' in value_s:
                 # value_s is lower case independent of input
                 mantissa, exponent = value_s.split('e')
                 if '.' not in mantissa:
@@ -654,6 +727,100 @@ for tag in 'null bool int float binary timestamp omap pairs set str seq map'.spl
 SafeConstructor.add_constructor(None, SafeConstructor.construct_undefined)
 
 
+class LazyConstructor(SafeConstructor):
+    """constructs the mappings and sequences of a document when they are accessed:
+    these are LazyMap/LazySeq proxies for the composed nodes
+    """
+
+    def construct_document(self, node: Any) -> Any:
+        # every document gets its own anchored objects, kept by the proxies, and its
+        # values are constructed with its YAML version, whenever they are accessed
+        memo = LazyMemo()
+        memo.version = self.resolver.processing_version
+        return self.construct_lazy(node, memo)
+
+    _lazy_memo: Optional[LazyMemo] = None
+
+    @property
+    def construct_version(self) -> Any:
+        if self._lazy_memo is None:
+            return self.resolver.processing_version
+        return self._lazy_memo.version
+
+    def construct_lazy(self, node: Any, memo: LazyMemo, deep: bool = False) -> Any:
+        saved = (
+            self.constructed_objects,
+            self.recursive_objects,
+            self.state_generators,
+            self.deferred_generators,
+            self.deep_construct,
+            self._lazy_memo,
+        )
+        self.constructed_objects = memo
+        self._lazy_memo = memo
+        self.recursive_objects = {}
+        self.state_generators = []
+        self.deferred_generators = {}
+        self.deep_construct = False
+        try:
+            data = self.construct_object(node, deep=deep)
+            while bool(self.state_generators):
+                state_generators = self.state_generators
+                self.state_generators = []
+                for generator in state_generators:
+                    for _dummy in generator:
+                        pass
+        finally:
+            (
+                self.constructed_objects,
+                self.recursive_objects,
+                self.state_generators,
+                self.deferred_generators,
+                self.deep_construct,
+                self._lazy_memo,
+            ) = saved
+        return data
+
+    def construct_lazy_mapping(self, node: Any, memo: LazyMemo) -> Dict[Any, Any]:
+        """return the value nodes of a mapping node by key, the keys are constructed"""
+        self.flatten_mapping(node)
+        # without merged keys the first of duplicate keys is used, like construct_mapping
+        check = getattr(node, 'merge', None) is None
+        value_nodes: Dict[Any, Any] = {}
+        for key_node, value_node in node.value:
+            key = self.construct_lazy(key_node, memo, deep=True)
+            if isinstance(key, LazySeq):
+                key = tuple(key)
+            if not isinstance(key, Hashable):
+                raise ConstructorError(
+                    'while constructing a mapping',
+                    node.start_mark,
+                    'found unhashable key',
+                    key_node.start_mark,
+                )
+            if check and key in value_nodes:
+                original = {key: self.construct_lazy(value_nodes[key], memo)}
+                value = self.construct_lazy(value_node, memo)
+                self.check_mapping_key(node, key_node, original, key, value)
+                continue
+            value_nodes[key] = value_node
+        return value_nodes
+
+    def construct_yaml_seq(self, node: Any) -> Any:
+        if not isinstance(node, SequenceNode):
+            return SafeConstructor.construct_sequence(self, node)  # raises
+        return LazySeq(self, node, self.constructed_objects)
+
+    def construct_yaml_map(self, node: Any) -> Any:
+        if not isinstance(node, MappingNode):
+            return SafeConstructor.construct_mapping(self, node)  # raises
+        return LazyMap(self, node, self.constructed_objects)
+
+
+for tag in 'seq map'.split():
+    LazyConstructor.add_default_constructor(tag)
+
+
 class Constructor(SafeConstructor):
     def construct_python_str(self, node: Any) -> Any:
         return self.construct_scalar(node)
@@ -1019,8 +1186,9 @@ class RoundTripConstructor(SafeConstructor):
             if value_s[0] == '-':
                 sign = -1
             value_s = value_s[1:]
+        version = self.construct_version
         if value_s.startswith('0b'):
-            if self.resolver.processing_version > (1, 1) and value_s[2] == '0':
+            if version > (1, 1) and value_s[2] == '0':
                 width = len(value_s[2:])
             if underscore is not None:
                 underscore[1] = value_su[2] == '_'
@@ -1033,7 +1201,7 @@ class RoundTripConstructor(SafeConstructor):
             )
         elif value_s.startswith('0x'):
             # default to lower-case if no a-fA-F in string
-            if self.resolver.processing_version > (1, 1) and value_s[2] == '0':
+            if version > (1, 1) and value_s[2] == '0':
                 width = len(value_s[2:])
             hex_fun: Any = HexInt
             for ch in value_s[2:]:
@@ -1052,7 +1220,7 @@ class RoundTripConstructor(SafeConstructor):
                 anchor=node.anchor,
             )
         elif value_s.startswith('0o'):
-            if self.resolver.processing_version > (1, 1) and value_s[2] == '0':
+            if version > (1, 1) and value_s[2] == '0':
                 width = len(value_s[2:])
             if underscore is not None:
                 underscore[1] = value_su[2] == '_'
@@ -1064,14 +1232,14 @@ class RoundTripConstructor(SafeConstructor):
                 anchor=node.anchor,
             )
         elif (
-            self.resolver.processing_version != (1, 2)
+            version != (1, 2)
             and len(value_s) > 1
             and value_s[0] == '0'
         ):
             return OctalInt(
                 sign * int(value_s, 8), width=width, underscore=underscore, anchor=node.anchor,
             )
-        elif self.resolver.processing_version != (1, 2) and ':' in value_s:
+        elif version != (1, 2) and ':' in value_s:
             digits = [int(part) for part in value_s.split(':')]
             digits.reverse()
             base = 1
@@ -1080,7 +1248,7 @@ class RoundTripConstructor(SafeConstructor):
                 value += digit * base
                 base *= 60
             return sign * value
-        elif self.resolver.processing_version > (1, 1) and value_s[0] == '0':
+        elif version > (1, 1) and value_s[0] == '0':
             # not an octal, an integer with leading zero(s)
             if underscore is not None:
                 # cannot have a leading underscore
@@ -1126,7 +1294,8 @@ class RoundTripConstructor(SafeConstructor):
             return sign * self.inf_value
         if value_s == '.nan':
             return self.nan_value
-        if self.resolver.processing_version != (1, 2) and ':' in value_s:
+        version = self.construct_version
+        if version != (1, 2) and ':' in value_s:
             digits = [float(part) for part in value_s.split(':')]
             digits.reverse()
             base = 1
@@ -1142,7 +1311,7 @@ class RoundTripConstructor(SafeConstructor):
             except ValueError:
                 mantissa, exponent = value_so.split('E')
                 exp = 'E'
-            if self.resolver.processing_version != (1, 2):
+            if version != (1, 2):
                 # value_s is lower case independent of input
                 if '.' not in mantissa:
                     warnings.warn(MantissaNoDotYAML1_1Warning(node, value_so), stacklevel=1)
@@ -1237,6 +1406,7 @@ class RoundTripConstructor(SafeConstructor):
             # the existing object.
             if value_node in self.constructed_objects:
                 value = self.constructed_objects[value_node]
+                self.construct_deferred(value_node)
             else:
                 value = self.construct_object(value_node, deep=True)
             return value
@@ -1462,7 +1632,7 @@ class RoundTripConstructor(SafeConstructor):
         data = CommentedMap()
         data._yaml_set_line_col(node.start_mark.line, node.start_mark.column)
         yield data
-        self.construct_mapping(node, data, deep=True)
+        self.construct_mapping(node, data)
         self.set_collection_style(data, node)
 
     def set_collection_style(self, data: Any, node: Any) -> None:
@@ -15,8 +15,14 @@ DocInfo can be used by a yaml dumper to dump a class
 - if provided to the dumper?
 """
 
+import array
+import json
+import os
+import sys
+
 if False:  # MYPY
-    from typing import Optional, Tuple, Any
+    from typing import Optional, Tuple, Any, Dict, List, Text
+    from pathlib import Path
 
 # from dataclasses import dataclass, field, MISSING  # NOQA
 
@@ -128,3 +134,120 @@ class DocInfo:
         self.requested_version = requested_version
         self.doc_version = doc_version
         self.tags = [] if tags is None else tags
+
+
+class DocumentIndex:
+    """
+    The positions of the documents in a (multi-document) YAML file, see
+    YAML.index_documents(): the byte offset and line number of the start of every
+    document and the %YAML/%TAG directives given for it.
+    The size and modification time of the file are kept to detect that the index is
+    stale. The index can be saved to, and loaded from, a sidecar file next to the YAML
+    file: a JSON header line followed by the offsets and line numbers as 64 bit integers.
+    """
+
+    suffix = '.docindex'
+    format = 1
+
+    def __init__(
+        self,
+        size: int,
+        mtime_ns: int,
+        offsets: array.array,
+        lines: array.array,
+        directives: Optional[Dict[int, List[Text]]] = None,
+    ) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offsets = offsets
+        self.lines = lines
+        # only for the documents that have directives
+        self.directives = {} if directives is None else directives
+
+    @classmethod
+    def from_positions(cls, path: Path, positions: List[Tuple[int, int, List[Text]]]) -> Any:
+        stat = os.stat(path)
+        return cls(
+            stat.st_size,
+            stat.st_mtime_ns,
+            array.array('q', [pos[0] for pos in positions]),
+            array.array('q', [pos[1] for pos in positions]),
+            {idx: pos[2] for idx, pos in enumerate(positions) if pos[2]},
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def span(self, idx: int) -> Tuple[int, int]:
+        """the start and end byte offsets of document idx"""
+        if idx < 0:
+            idx += len(self.offsets)
+        if not 0 <= idx < len(self.offsets):
+            raise IndexError(f'document index {idx} out of range')
+        if idx + 1 < len(self.offsets):
+            return self.offsets[idx], self.offsets[idx + 1]
+        return self.offsets[idx], self.size
+
+    def version_directive(self, idx: int) -> Optional[Text]:
+        """
+        the %YAML directive of an earlier document that applies to document idx, as the
+        version of a directive also applies to the documents following its own, or None
+        """
+        if idx < 0:
+            idx += len(self.offsets)
+        for doc_idx in sorted(self.directives, reverse=True):
+            if doc_idx > idx:
+                continue
+            for directive in self.directives[doc_idx]:
+                if directive.split()[0] == '%YAML':
+                    return None if doc_idx == idx else directive
+        return None
+
+    def is_current(self, path: Path) -> bool:
+        """the file has the size and modification time it had when indexed"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    @classmethod
+    def sidecar(cls, path: Path) -> Path:
+        return path.with_name(path.name + cls.suffix)
+
+    def save(self, path: Path) -> None:
+        header = {
+            'format': self.format,
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'count': len(self.offsets),
+            'directives': {str(idx): val for idx, val in self.directives.items()},
+        }
+        with path.open('wb') as fp:
+            fp.write(json.dumps(header).encode('utf-8') + b'\n')
+            for values in (self.offsets, self.lines):
+                if sys.byteorder == 'big':
+                    values = array.array('q', values)
+                    values.byteswap()
+                values.tofile(fp)
+
+    @classmethod
+    def load(cls, path: Path) -> Any:
+        with path.open('rb') as fp:
+            header = json.loads(fp.readline())
+            if header.get('format') != cls.format:
+                raise ValueError(f'{path}: not a document index of format {cls.format}')
+            arrays = []
+            for _ in range(2):
+                values = array.array('q')
+                values.fromfile(fp, header['count'])
+                if sys.byteorder == 'big':
+                    values.byteswap()
+                arrays.append(values)
+        return cls(
+            header['size'],
+            header['mtime_ns'],
+            arrays[0],
+            arrays[1],
+            {int(idx): val for idx, val in header['directives'].items()},
+        )
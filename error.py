@@ -2,15 +2,17 @@
 from __future__ import annotations
 
 import warnings
+from bisect import bisect_left, bisect_right
 # import textwrap
 
 if False:  # MYPY
-    from typing import Any, Dict, Optional, List, Text  # NOQA
+    from typing import Any, Dict, Optional, List, Text, Tuple  # NOQA
 
 
 __all__ = [
     'FileMark',
     'StringMark',
+    'IndexMark',
     'CommentMark',
     'YAMLError',
     'MarkedYAMLError',
@@ -106,6 +108,104 @@ class StringMark(StreamMark):
         return where
 
 
+class LineIndex:
+    """
+    the start positions of the lines of a stream, and the positions of the BOMs in it
+    (which don't count for the column), filled in by the Reader as it moves forward and
+    shared by all IndexMarks on that stream. buffer is only set for string input.
+    first_line is the line number of the first line of the stream
+    """
+
+    __slots__ = 'name', 'buffer', 'line_starts', 'boms', 'first_line'
+
+    def __init__(self, name: Any, buffer: Any = None) -> None:
+        self.name = name
+        self.buffer = buffer
+        self.line_starts: List[int] = [0]
+        self.boms: List[int] = []
+        self.first_line = 0
+
+    def line_column(self, index: int) -> Tuple[int, int]:
+        line = bisect_right(self.line_starts, index) - 1
+        start = self.line_starts[line]
+        column = index - start
+        if self.boms:
+            column -= bisect_left(self.boms, index) - bisect_left(self.boms, start)
+        return self.first_line + line, column
+
+
+class IndexMark:
+    """
+    a mark that only stores the index in the stream, line and column are determined
+    from the LineIndex when needed (e.g. when formatting an error)
+    """
+
+    # _line and _column are only set when explicitly assigned to
+    __slots__ = 'line_index', 'index', '_line', '_column'
+
+    def __init__(self, line_index: LineIndex, index: int) -> None:
+        self.line_index = line_index
+        self.index = index
+
+    @property
+    def name(self) -> Any:
+        return self.line_index.name
+
+    @property
+    def line(self) -> int:
+        try:
+            return self._line
+        except AttributeError:
+            return self.line_index.line_column(self.index)[0]
+
+    @line.setter
+    def line(self, val: int) -> None:
+        self._line = val
+
+    @property
+    def column(self) -> int:
+        try:
+            return self._column
+        except AttributeError:
+            return self.line_index.line_column(self.index)[1]
+
+    @column.setter
+    def column(self, val: int) -> None:
+        self._column = val
+
+    @property
+    def buffer(self) -> Any:
+        return self.line_index.buffer
+
+    @property
+    def pointer(self) -> int:
+        return self.index
+
+    def to_mark(self) -> StreamMark:
+        if self.buffer is None:
+            return FileMark(self.name, self.index, self.line, self.column)
+        return StringMark(
+            self.name, self.index, self.line, self.column, self.buffer, self.pointer,
+        )
+
+    def get_snippet(self, indent: int = 4, max_length: int = 75) -> Any:
+        if self.buffer is None:
+            return None
+        return self.to_mark().get_snippet(indent, max_length)  # type: ignore
+
+    def __str__(self) -> Any:
+        return str(self.to_mark())
+
+    def __repr__(self) -> Any:
+        return repr(self.to_mark())
+
+    def __eq__(self, other: Any) -> bool:
+        return StreamMark.__eq__(self, other)  # type: ignore
+
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+
 class CommentMark:
     __slots__ = ('column',)
 
@@ -9,6 +9,21 @@ from ruamel.yaml.tag import Tag
 
 SHOW_LINES = False
 
+# the kind of an event, a class attribute of the concrete event classes, so that the
+# Parser and Composer can check the type of an event without going through isinstance()
+(
+    STREAM_START,
+    STREAM_END,
+    DOCUMENT_START,
+    DOCUMENT_END,
+    ALIAS,
+    SCALAR,
+    SEQUENCE_START,
+    SEQUENCE_END,
+    MAPPING_START,
+    MAPPING_END,
+) = range(1, 11)
+
 
 def CommentCheck() -> None:
     pass
@@ -17,6 +32,7 @@ def CommentCheck() -> None:
 class Event:
     __slots__ = 'start_mark', 'end_mark', 'comment'
     crepr = 'Unspecified Event'
+    kind = 0  # no concrete event
 
     def __init__(
         self, start_mark: Any = None, end_mark: Any = None, comment: Any = CommentCheck,
@@ -108,6 +124,7 @@ class CollectionEndEvent(Event):
 class StreamStartEvent(Event):
     __slots__ = ('encoding',)
     crepr = '+STR'
+    kind = STREAM_START
 
     def __init__(
         self,
@@ -123,11 +140,13 @@ class StreamStartEvent(Event):
 class StreamEndEvent(Event):
     __slots__ = ()
     crepr = '-STR'
+    kind = STREAM_END
 
 
 class DocumentStartEvent(Event):
     __slots__ = 'explicit', 'version', 'tags'
     crepr = '+DOC'
+    kind = DOCUMENT_START
 
     def __init__(
         self,
@@ -151,6 +170,7 @@ class DocumentStartEvent(Event):
 class DocumentEndEvent(Event):
     __slots__ = ('explicit',)
     crepr = '-DOC'
+    kind = DOCUMENT_END
 
     def __init__(
         self,
@@ -170,6 +190,7 @@ class DocumentEndEvent(Event):
 class AliasEvent(NodeEvent):
     __slots__ = 'style'
     crepr = '=ALI'
+    kind = ALIAS
 
     def __init__(
         self,
@@ -189,6 +210,7 @@ class AliasEvent(NodeEvent):
 class ScalarEvent(NodeEvent):
     __slots__ = 'ctag', 'implicit', 'value', 'style'
     crepr = '=VAL'
+    kind = SCALAR
 
     def __init__(
         self,
@@ -237,6 +259,7 @@ class ScalarEvent(NodeEvent):
 class SequenceStartEvent(CollectionStartEvent):
     __slots__ = ()
     crepr = '+SEQ'
+    kind = SEQUENCE_START
 
     def compact_repr(self) -> str:
         flow = ' []' if self.flow_style else ''
@@ -248,11 +271,13 @@ class SequenceStartEvent(CollectionStartEvent):
 class SequenceEndEvent(CollectionEndEvent):
     __slots__ = ()
     crepr = '-SEQ'
+    kind = SEQUENCE_END
 
 
 class MappingStartEvent(CollectionStartEvent):
     __slots__ = ()
     crepr = '+MAP'
+    kind = MAPPING_START
 
     def compact_repr(self) -> str:
         flow = ' {}' if self.flow_style else ''
@@ -264,3 +289,4 @@ class MappingStartEvent(CollectionStartEvent):
 class MappingEndEvent(CollectionEndEvent):
     __slots__ = ()
     crepr = '-MAP'
+    kind = MAPPING_END
@@ -0,0 +1,102 @@
+"""
+read-only proxies for the mappings and sequences of a document loaded with
+YAML(typ='safe', lazy=True)
+
+The proxies keep the composed node and construct a key or item only when it is first
+accessed (the keys of a mapping are all constructed when the mapping is first accessed),
+caching the result. Anchors are shared within a document: an alias node gives the same
+object as the anchored node. Merge keys are resolved when the mapping is first accessed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from reprlib import recursive_repr
+
+if False:  # MYPY
+    from typing import Any, Dict, Iterator, List  # NOQA
+
+__all__ = ['LazyMap', 'LazySeq']
+
+_unset = object()
+
+
+class LazyMemo(dict):  # type: ignore
+    """
+    the objects constructed for the nodes of a document, shared by its proxies, and the
+    YAML version of the document, that its values are constructed with
+    """
+
+    __slots__ = ('version',)
+
+
+class LazyMap(Mapping):  # type: ignore
+    __slots__ = '_constructor', '_node', '_memo', '_index', '_values'
+
+    def __init__(self, constructor: Any, node: Any, memo: LazyMemo) -> None:
+        self._constructor = constructor
+        self._node = node
+        self._memo = memo
+        self._index: Any = None  # key -> value node
+        self._values: Dict[Any, Any] = {}
+
+    def _value_nodes(self) -> Dict[Any, Any]:
+        if self._index is None:
+            self._index = self._constructor.construct_lazy_mapping(self._node, self._memo)
+        return self._index  # type: ignore
+
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        node = self._value_nodes()[key]
+        value = self._values[key] = self._constructor.construct_lazy(node, self._memo)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._value_nodes()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._value_nodes())
+
+    def __len__(self) -> int:
+        return len(self._value_nodes())
+
+    @recursive_repr()
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({dict(self)!r})'
+
+
+class LazySeq(Sequence):  # type: ignore
+    __slots__ = '_constructor', '_node', '_memo', '_items'
+
+    def __init__(self, constructor: Any, node: Any, memo: LazyMemo) -> None:
+        self._constructor = constructor
+        self._node = node
+        self._memo = memo
+        self._items: List[Any] = [_unset] * len(node.value)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(len(self._items)))]
+        value = self._items[index]
+        if value is _unset:
+            value = self._items[index] = self._constructor.construct_lazy(
+                self._node.value[index], self._memo,
+            )
+        return value
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (list, LazySeq)):
+            return NotImplemented
+        return len(self) == len(other) and all(x == y for x, y in zip(self, other))
+
+    __hash__ = None  # type: ignore
+
+    @recursive_repr()
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({list(self)!r})'
@@ -3,13 +3,19 @@ from __future__ import annotations
 
 import sys
 import os
+import codecs
+import inspect
+import itertools
+import mmap
 import warnings
 import glob
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from importlib import import_module
 
 
 import ruamel.yaml
-from ruamel.yaml.error import UnsafeLoaderWarning, YAMLError  # NOQA
+from ruamel.yaml.error import UnsafeLoaderWarning, YAMLError, MarkedYAMLError, IndexMark  # NOQA
 
 from ruamel.yaml.tokens import *  # NOQA
 from ruamel.yaml.events import *  # NOQA
@@ -33,7 +39,8 @@ from ruamel.yaml.constructor import (
 )
 from ruamel.yaml.loader import Loader as UnsafeLoader  # NOQA
 from ruamel.yaml.comments import CommentedMap, CommentedSeq, C_PRE
-from ruamel.yaml.docinfo import DocInfo, version, Version
+from ruamel.yaml.docinfo import DocInfo, DocumentIndex, version, Version
+import ruamel.yaml.schema  # NOQA
 
 if False:  # MYPY
     from typing import List, Set, Dict, Tuple, Union, Any, Callable, Optional, Text, Type  # NOQA
@@ -61,6 +68,9 @@ class YAML:
         pure: Any = False,
         output: Any = None,
         plug_ins: Any = None,
+        read_chunk_size: Optional[int] = None,
+        trusted_input: bool = False,
+        lazy: bool = False,
     ) -> None:  # input=None,
         """
         typ: 'rt'/None -> RoundTripLoader/RoundTripDumper,  (default)
@@ -72,10 +82,20 @@ class YAML:
         pure: if True only use Python modules
         input/output: needed to work as context manager
         plug_ins: a list of plug-in files
+        read_chunk_size: fixed number of bytes/characters to read from a stream at a
+                         time, if None start with 4096 and grow as long as the stream
+                         has data available
+        trusted_input: if True don't check the input for non-printable characters
+        lazy: if True (only for typ='safe') mappings and sequences are loaded as read-only
+              proxies, that construct their items when these are first accessed
         """
 
         self.typ = ['rt'] if typ is None else (typ if isinstance(typ, list) else [typ])
         self.pure = pure
+        if read_chunk_size is not None and read_chunk_size < 1:
+            raise ValueError(f'read_chunk_size should be positive, got {read_chunk_size}')
+        self.read_chunk_size = read_chunk_size
+        self.trusted_input = trusted_input
 
         # self._input = input
         self._output = output
@@ -105,7 +125,11 @@ class YAML:
             self.Representer = ruamel.yaml.representer.SafeRepresenter
             self.Parser = ruamel.yaml.parser.Parser if pure or CParser is None else CParser
             self.Composer = ruamel.yaml.composer.Composer
-            self.Constructor = ruamel.yaml.constructor.SafeConstructor
+            self.Constructor = (
+                ruamel.yaml.constructor.LazyConstructor
+                if lazy
+                else ruamel.yaml.constructor.SafeConstructor
+            )
         elif 'base' in self.typ:
             self.Emitter = ruamel.yaml.emitter.Emitter
             self.Representer = ruamel.yaml.representer.BaseRepresenter
@@ -160,6 +184,8 @@ class YAML:
             self.Composer = ruamel.yaml.composer.Composer
             self.Constructor = ruamel.yaml.constructor.RoundTripConstructor
         del setup_rt
+        if lazy and self.Constructor is not ruamel.yaml.constructor.LazyConstructor:
+            raise ValueError(f"lazy loading is only available for typ='safe', not {typ!r}")
         self.stream = None
         self.canonical = None
         self.old_indent = None
@@ -178,6 +204,19 @@ class YAML:
         self._version: Optional[Any] = None
         self.preserve_quotes: Optional[bool] = None
         self.allow_duplicate_keys = False  # duplicate keys in map, set
+        # maximum nesting of sequences/mappings in a loaded document, None for no limit
+        self.max_depth: Optional[int] = ruamel.yaml.composer.MAX_DEPTH
+        # memory map pathlib.Path input, instead of reading it in chunks
+        self.memory_map = False
+        # line number of the first line of the input, e.g. for a document split off from
+        # a larger stream
+        self.first_line = 0
+        # the name of the file that open_input() provides as an mmap.mmap
+        self.mapped_name: Optional[str] = None
+        # the DocumentIndex per path used by load_document()
+        self._document_indexes: Dict[Any, DocumentIndex] = {}
+        # FeedStream and load_all() generator while loading with feed()
+        self._feeding: Any = None
         self.encoding = 'utf-8'
         self.explicit_start: Union[bool, None] = None
         self.explicit_end: Union[bool, None] = None
@@ -242,7 +281,9 @@ class YAML:
     def composer(self) -> Any:
         attr = '_' + sys._getframe().f_code.co_name
         if not hasattr(self, attr):
-            setattr(self, attr, self.Composer(loader=self))
+            cmpsr = self.Composer(loader=self)
+            cmpsr.max_depth = self.max_depth
+            setattr(self, attr, cmpsr)
         return getattr(self, attr)
 
     @property
@@ -336,9 +377,16 @@ class YAML:
             setattr(self, attr, repres)
         return getattr(self, attr)
 
-    def scan(self, stream: StreamTextType) -> Any:
+    def scan(self, stream: StreamTextType, index_marks: bool = False) -> Any:
         """
         Scan a YAML stream and produce scanning tokens.
+
+        index_marks: give the tokens the character index in the stream as start_mark
+        and end_mark, instead of mark objects. This saves two allocations per token
+        when the tokens are only inspected and then discarded. The line and column
+        of an index can be looked up, while scanning, with
+        `yaml.reader.line_index.line_column(index)`. Not available for the round-trip
+        scanner, which needs the line numbers of the marks for comment handling
         """
         if not hasattr(stream, 'read') and hasattr(stream, 'open'):
             # pathlib.Path() instance
@@ -348,8 +396,28 @@ class YAML:
         self.tags = {}
         _, parser = self.get_constructor_parser(stream)
         try:
+            if index_marks:
+                round_trip_scanners = (
+                    ruamel.yaml.scanner.RoundTripScanner,
+                    ruamel.yaml.scanner.RoundTripScannerSC,
+                )
+                if isinstance(self.scanner, round_trip_scanners):
+                    raise YAMLError('index_marks cannot be used with the round-trip scanner')
+                self.reader.index_marks = True
+                for token in self.scanner.tokens:  # the already queued StreamStartToken
+                    token.start_mark = token.start_mark.index
+                    token.end_mark = token.end_mark.index
             while self.scanner.check_token():
                 yield self.scanner.get_token()
+        except MarkedYAMLError as exc:
+            if index_marks:
+                # make the error message show line and column
+                line_index = self.reader.line_index
+                for attr in ('context_mark', 'problem_mark'):
+                    mark = getattr(exc, attr)
+                    if isinstance(mark, int):
+                        setattr(exc, attr, IndexMark(line_index, mark))
+            raise
         finally:
             parser.dispose()
             for comp in ('reader', 'scanner'):
@@ -358,18 +426,35 @@ class YAML:
                 except AttributeError:
                     pass
 
-    def parse(self, stream: StreamTextType) -> Any:
+    def parse(self, stream: StreamTextType, path: Any = None) -> Any:
         """
         Parse a YAML stream and produce parsing events.
+        If a path selector is given (see composer.parse_path(), e.g.
+        'spec.containers[*].image'), produce the values it selects in the documents of
+        the stream instead. Only these are composed and constructed, the events of the
+        other subtrees are skipped.
         """
         if not hasattr(stream, 'read') and hasattr(stream, 'open'):
             # pathlib.Path() instance
             with stream.open('rb') as fp:
-                return self.parse(fp)
+                for x in self.parse(fp, path):
+                    yield x
+                return
         self.doc_infos.append(DocInfo(requested_version=version(self.version)))
         self.tags = {}
-        _, parser = self.get_constructor_parser(stream)
+        constructor, parser = self.get_constructor_parser(stream)
         try:
+            if path is not None:
+                path = ruamel.yaml.composer.parse_path(path)
+                composer = constructor.composer
+                if not isinstance(composer, ruamel.yaml.composer.Composer):
+                    # the combined C level parser composes its nodes itself
+                    composer = ruamel.yaml.composer.Composer(loader=constructor)
+                while composer.check_node():
+                    for node in composer.select_document(path):
+                        yield constructor.construct_document(node)
+                    self.doc_infos.append(DocInfo(requested_version=version(self.version)))
+                return
             while parser.check_event():
                 yield parser.get_event()
         finally:
@@ -387,7 +472,7 @@ class YAML:
         """
         if not hasattr(stream, 'read') and hasattr(stream, 'open'):
             # pathlib.Path() instance
-            with stream.open('rb') as fp:
+            with self.open_input(stream) as fp:
                 return self.compose(fp)
         self.doc_infos.append(DocInfo(requested_version=version(self.version)))
         self.tags = {}
@@ -434,22 +519,28 @@ class YAML:
     #         raise TypeError("Need a stream argument when not loading from context manager")
     #     return self.load_one(stream)
 
-    def load(self, stream: Union[Path, StreamTextType]) -> Any:
+    def load(self, stream: Union[Path, StreamTextType], schema: Any = None) -> Any:
         """
         at this point you either have the non-pure Parser (which has its own reader and
         scanner) or you have the pure Parser.
         If the pure Parser is set, then set the Reader and Scanner, if not already set.
         If either the Scanner or Reader are set, you cannot use the non-pure Parser,
             so reset it to the pure parser and set the Reader resp. Scanner if necessary
+
+        schema: a type (e.g. a dataclass) to load the document as, see ruamel.yaml.schema
         """
         if not hasattr(stream, 'read') and hasattr(stream, 'open'):
             # pathlib.Path() instance
-            with stream.open('rb') as fp:
-                return self.load(fp)
+            with self.open_input(stream) as fp:
+                return self.load(fp, schema)
+        if schema is not None:
+            plan = ruamel.yaml.schema.schema_plan(schema)
         self.doc_infos.append(DocInfo(requested_version=version(self.version)))
         self.tags = {}
         constructor, parser = self.get_constructor_parser(stream)
         try:
+            if schema is not None:
+                return ruamel.yaml.schema.SchemaLoader(constructor).get_single_data(plan)
             return constructor.get_single_data()
         finally:
             parser.dispose()
@@ -459,13 +550,23 @@ class YAML:
                 except AttributeError:
                     pass
 
-    def load_all(self, stream: Union[Path, StreamTextType]) -> Any:  # *, skip=None):
+    def load_all(
+        self, stream: Union[Path, StreamTextType], *, workers: Optional[int] = None,
+    ) -> Any:  # *, skip=None):
+        """
+        workers: if more than 1, split the stream into its documents and load these in a
+                 pool of that many processes, see load_all_parallel()
+        """
         if not hasattr(stream, 'read') and hasattr(stream, 'open'):
             # pathlib.Path() instance
-            with stream.open('r') as fp:
-                for d in self.load_all(fp):
+            with self.open_input(stream, mode='r') as fp:
+                for d in self.load_all(fp, workers=workers):
                     yield d
                 return
+        if workers is not None and workers > 1:
+            for d in self.load_all_parallel(stream, workers):
+                yield d
+            return
         # if skip is None:
         #     skip = []
         # elif isinstance(skip, int):
@@ -485,6 +586,251 @@ class YAML:
                 except AttributeError:
                     pass
 
+    def load_all_parallel(self, stream: StreamTextType, workers: int) -> Any:
+        """
+        Split the stream at the lines starting with a '---' marker (together with the
+        directives preceding such a line) and load the parts in a pool of worker processes.
+        The documents are returned in order, with their DocInfo appended to .doc_infos, and
+        their line numbers (in marks and errors) are those in the whole stream.
+        The processes load with YAML(typ=.typ, pure=.pure), with the same .version,
+        .preserve_quotes, .allow_duplicate_keys and .trusted_input as this instance, other
+        configuration of the instance (e.g. registered classes) is not available there.
+        A stream with a %YAML directive is loaded sequentially, as its version applies to
+        the following documents as well.
+        """
+        if hasattr(stream, 'read'):
+            stream = stream.read()
+        if not isinstance(stream, str):
+            data = bytes(stream)
+            encoding = 'utf-8'
+            if data.startswith(codecs.BOM_UTF16_LE):
+                encoding = 'utf-16-le'
+            elif data.startswith(codecs.BOM_UTF16_BE):
+                encoding = 'utf-16-be'
+            try:
+                stream = data.decode(encoding)
+            except UnicodeDecodeError as exc:
+                raise ruamel.yaml.reader.ReaderError(
+                    '<byte string>', exc.start, data[exc.start], exc.encoding, exc.reason,
+                )
+        if ruamel.yaml.reader.has_version_directive(stream):
+            for d in self.load_all(stream):
+                yield d
+            return
+        settings = (
+            tuple(self.typ),
+            self.pure,
+            self._version,
+            self.preserve_quotes,
+            self.allow_duplicate_keys,
+            self.trusted_input,
+        )
+        splits = ruamel.yaml.reader.split_documents(stream)
+        ends = [pos for pos, line in splits[1:]] + [len(stream)]
+        texts = [stream[pos:end] for (pos, line), end in zip(splits, ends)]
+        self.tags = {}
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            results = executor.map(
+                _load_split_documents,
+                itertools.repeat(settings),
+                texts,
+                [line for pos, line in splits],
+                [False] * (len(texts) - 1) + [True],
+                chunksize=max(1, len(texts) // (4 * workers)),
+            )
+            for documents, doc_infos, tags, error in results:
+                if tags:
+                    self.tags.update(tags)
+                for data, doc_info in zip(documents, doc_infos):
+                    self.doc_infos.append(doc_info)
+                    yield data
+                if error is not None:
+                    raise error
+            self.doc_infos.append(DocInfo(requested_version=version(self.version)))
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def index_documents(self, path: Path, *, save: bool = True) -> DocumentIndex:
+        """
+        Find the start of the documents in a UTF-8 encoded, multi-document YAML file,
+        without loading them, so that load_document() can load a single document. The
+        index is saved in a sidecar file (DocumentIndex.sidecar(path)), unless save is
+        False. A '%' at the start of a line is taken to be a directive, and lines to end
+        in '\\n'.
+        """
+        with path.open('rb') as fp:
+            try:
+                data: Any = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # empty file
+                data = fp.read()
+            try:
+                positions = ruamel.yaml.reader.document_positions(data)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+        doc_index = DocumentIndex.from_positions(path, positions)
+        if save:
+            doc_index.save(DocumentIndex.sidecar(path))
+        self._document_indexes[str(path)] = doc_index
+        return doc_index
+
+    def load_document(self, path: Path, idx: int) -> Any:
+        """
+        Load document idx (counting from 0, negative counts from the end) of a
+        multi-document YAML file, by reading and parsing only that document. The positions
+        of the documents are taken from the index made by index_documents(), loaded from
+        its sidecar file, if that index is current, otherwise the file is indexed.
+        Line numbers in marks and errors are those in the whole file.
+        """
+        doc_index = self._document_indexes.get(str(path))
+        if doc_index is None or not doc_index.is_current(path):
+            sidecar = DocumentIndex.sidecar(path)
+            doc_index = None
+            if sidecar.exists():
+                doc_index = DocumentIndex.load(sidecar)
+                self._document_indexes[str(path)] = doc_index
+            if doc_index is None or not doc_index.is_current(path):
+                doc_index = self.index_documents(path, save=sidecar.exists())
+        start, end = doc_index.span(idx)
+        with path.open('rb') as fp:
+            fp.seek(start)
+            data = fp.read(end - start)
+        if end < doc_index.size:
+            # as in the whole file the document is followed by the start of another
+            data += b'---\n'
+        line = doc_index.lines[idx]
+        directive = doc_index.version_directive(idx)
+        if directive is not None:
+            # the version applies as it does in the whole file: to the documents following
+            # the (empty) one it is given for
+            data = directive.encode('utf-8') + b'\n---\n...\n' + data
+            line -= 3
+        stream = BytesIO(data)
+        stream.name = str(path)
+        first_line = self.first_line
+        self.first_line = line
+        documents = self.load_all(stream)
+        try:
+            if directive is not None:
+                next(documents)
+            return next(documents)
+        finally:
+            documents.close()
+            self.first_line = first_line
+
+    def feed(self, data: Union[Text, bytes]) -> List[Any]:
+        """
+        Push-style loading: add data, e.g. as received from a socket, to the stream being
+        loaded and return a list of the documents that became complete. A document is
+        loaded once the line with the next '---' marker (or the content following a '...'
+        marker) has been fed, so the last document of the stream is only returned by
+        feed_end(). The round-trip loader, which looks ahead for comments, returns a
+        document once the one after it is complete as well. Bytes are taken to be UTF-8,
+        and may be split anywhere.
+        The stream is loaded as with load_all(), using the Reader, Scanner and Parser of
+        this instance, which continue where the previous document ended. Don't use the
+        instance to load anything else until feed_end() has been called.
+        """
+        if self._feeding is None:
+            # restored when the stream ends, see _stop_feeding()
+            classes = self.Reader, self.Parser
+            if self.Reader is None:
+                # the C based parser reads ahead, beyond the data fed
+                self.Reader = ruamel.yaml.reader.Reader
+            stream = ruamel.yaml.reader.FeedStream()
+            if self.Scanner in (
+                ruamel.yaml.scanner.RoundTripScanner,
+                ruamel.yaml.scanner.RoundTripScannerSC,
+            ):
+                # the round-trip scanner looks a token ahead for comments, that can be
+                # in the next document
+                stream.lookahead = 1
+            self._feeding = stream, self.load_all(stream), classes
+        self._feeding[0].feed(data)
+        return self._fed_documents()
+
+    def feed_end(self) -> List[Any]:
+        """
+        End the stream that was loaded with feed() and return its remaining documents.
+        """
+        if self._feeding is None:
+            return []
+        self._feeding[0].close()
+        return self._fed_documents()
+
+    def _fed_documents(self) -> List[Any]:
+        stream, documents, _classes = self._feeding
+        res = []
+        try:
+            while stream.complete > stream.lookahead or stream.closed:
+                res.append(next(documents))
+                stream.complete -= 1
+        except StopIteration:
+            self._stop_feeding()
+        except Exception:
+            # the load_all() generator is finished, the next feed() starts a new stream
+            self._stop_feeding()
+            raise
+        return res
+
+    def _stop_feeding(self) -> None:
+        """forget the stream loaded with feed(), and restore the Reader and Parser"""
+        self.Reader, self.Parser = self._feeding[2]
+        self._feeding = None
+
+    async def aload_all(self, stream: Any) -> Any:
+        """
+        Load all documents from an asynchronous stream, of which read(size) is a coroutine
+        (e.g. asyncio.StreamReader, aiohttp.StreamReader). Returns an asynchronous iterator
+        that provides each document as soon as the data read completes it (see feed()),
+        the event loop is not blocked while waiting for data.
+        """
+        size = self.read_chunk_size
+        if size is None:
+            size = ruamel.yaml.reader.Reader.max_chunk_size
+        try:
+            while True:
+                data = await stream.read(size)
+                if not data:
+                    break
+                for document in self.feed(data):
+                    yield document
+            for document in self.feed_end():
+                yield document
+        finally:
+            if self._feeding is not None:
+                # the iteration was stopped before the end of the stream
+                self._feeding[1].close()
+                self._stop_feeding()
+
+    @contextmanager
+    def open_input(self, path: Path, mode: str = 'rb') -> Any:
+        """
+        open a pathlib.Path for loading, if .memory_map is set and the file
+        can be mapped (i.e. is not empty, or a pipe), provide the Reader with
+        a read-only mmap.mmap of the file instead of the file object
+        """
+        with path.open(mode) as fp:
+            mm = None
+            if self.memory_map:
+                try:
+                    mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                except (ValueError, OSError):
+                    pass
+            if mm is None:
+                yield fp
+                return
+            # the name of the file for the marks, an mmap.mmap has none
+            self.mapped_name = fp.name
+            try:
+                yield mm
+            finally:
+                self.mapped_name = None
+                # the reader has released its memoryview when resetting
+                mm.close()
+
     def get_constructor_parser(self, stream: StreamTextType) -> Any:
         """
         the old cyaml needs special setup, and therefore the stream
@@ -609,6 +955,50 @@ class YAML:
         self._output = None
         self._context_manager = None
 
+    async def adump_all(self, documents: Any, stream: Any) -> None:
+        """
+        Dump documents, from an iterable or an asynchronous iterable, to an asynchronous
+        stream: either write() is a coroutine (e.g. aiohttp.StreamResponse), or it is not
+        and the stream has a drain() coroutine (asyncio.StreamWriter). The output of each
+        document is written once the document has been emitted. Bytes are written, unless
+        the stream has an encoding attribute, or .encoding is set to None.
+        """
+        if self._context_manager:
+            raise NotImplementedError
+        if self.encoding is None or hasattr(stream, 'encoding'):
+            buf: Any = StringIO()
+        else:
+            buf = BytesIO()
+        self._output = buf
+        self._context_manager = YAMLContextManager(self)
+        try:
+            if hasattr(documents, '__aiter__'):
+                async for data in documents:
+                    self._context_manager.dump(data)
+                    await self._write_async(stream, buf)
+            else:
+                for data in documents:
+                    self._context_manager.dump(data)
+                    await self._write_async(stream, buf)
+            self._context_manager.teardown_output()
+            await self._write_async(stream, buf)
+        finally:
+            self._output = None
+            self._context_manager = None
+
+    @staticmethod
+    async def _write_async(stream: Any, buf: Any) -> None:
+        data = buf.getvalue()
+        if not data:
+            return
+        buf.seek(0)
+        buf.truncate()
+        res = stream.write(data)
+        if inspect.isawaitable(res):
+            await res
+        elif hasattr(stream, 'drain'):
+            await stream.drain()
+
     def Xdump_all(self, documents: Any, stream: Any, *, transform: Any = None) -> Any:
         """
         Serialize a sequence of Python objects into a YAML stream.
@@ -879,6 +1269,38 @@ class YAML:
         self.compact_seq_map = seq_map
 
 
+# the YAML instances of a worker process of YAML.load_all_parallel(), per configuration
+_split_document_loaders: Dict[Any, Any] = {}
+
+
+def _load_split_documents(settings: Any, text: Text, first_line: int, last: bool) -> Any:
+    yaml = _split_document_loaders.get(settings)
+    if yaml is None:
+        typ, pure, version, preserve_quotes, allow_duplicate_keys, trusted_input = settings
+        yaml = YAML(typ=list(typ), pure=pure, trusted_input=trusted_input)
+        yaml.version = version
+        yaml.preserve_quotes = preserve_quotes
+        yaml.allow_duplicate_keys = allow_duplicate_keys
+        _split_document_loaders[settings] = yaml
+    yaml.first_line = first_line
+    yaml.doc_infos = []
+    documents = []
+    error = None
+    if not last:
+        # as in the whole stream the part is followed by a document start, the (empty)
+        # document that starts is not returned
+        text += '---\n'
+    try:
+        for data in yaml.load_all(text):
+            documents.append(data)
+        if not last:
+            documents.pop()
+    except YAMLError as exc:
+        # raised after the documents before it have been returned
+        error = exc
+    return documents, yaml.doc_infos[: len(documents)], yaml.tags, error
+
+
 class YAMLContextManager:
     def __init__(self, yaml: Any, transform: Any = None) -> None:
         # used to be: (Any, Optional[Callable]) -> None
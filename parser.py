@@ -142,8 +142,13 @@ class Parser:
         if self.current_event is not None:
             if not choices:
                 return True
+            kind = self.current_event.kind
             for choice in choices:
-                if isinstance(self.current_event, choice):
+                if choice.kind:
+                    if kind == choice.kind:
+                        return True
+                elif isinstance(self.current_event, choice):
+                    # one of the abstract event classes
                     return True
         return False
 
@@ -184,10 +189,11 @@ class Parser:
 
     def parse_implicit_document_start(self) -> Any:
         # Parse an implicit document.
-        if not self.scanner.check_token(DirectiveToken, DocumentStartToken, StreamEndToken):
+        self.resolver.reset_processing_version(document=True)
+        token = self.scanner.peek_token()
+        if not isinstance(token, (DirectiveToken, DocumentStartToken, StreamEndToken)):
             # don't need copy, as an implicit tag doesn't add tag_handles
             self.tag_handles = self.DEFAULT_TAGS
-            token = self.scanner.peek_token()
             start_mark = end_mark = token.start_mark
             event = DocumentStartEvent(start_mark, end_mark, explicit=False)
 
@@ -245,8 +251,8 @@ class Parser:
         token = self.scanner.peek_token()
         start_mark = end_mark = token.start_mark
         explicit = False
-        if self.scanner.check_token(DocumentEndToken):
-            token = self.scanner.get_token()
+        if isinstance(token, DocumentEndToken):
+            self.scanner.get_token()
             # if token.end_mark.line != self.peek_event().start_mark.line:
             pt = self.scanner.peek_token()
             if not isinstance(pt, StreamEndToken) and (
@@ -276,10 +282,11 @@ class Parser:
         return event
 
     def parse_document_content(self) -> Any:
-        if self.scanner.check_token(
-            DirectiveToken, DocumentStartToken, DocumentEndToken, StreamEndToken,
+        token = self.scanner.peek_token()
+        if isinstance(
+            token, (DirectiveToken, DocumentStartToken, DocumentEndToken, StreamEndToken),
         ):
-            event = self.process_empty_scalar(self.scanner.peek_token().start_mark)
+            event = self.process_empty_scalar(token.start_mark)
             self.state = self.states.pop()
             return event
         else:
@@ -327,6 +334,7 @@ class Parser:
         for key in self.DEFAULT_TAGS:
             if key not in self.tag_handles:
                 self.tag_handles[key] = self.DEFAULT_TAGS[key]
+        self.resolver.reset_processing_version(document=True)
         return value
 
     # block_node_or_indentless_sequence ::= ALIAS
@@ -363,8 +371,10 @@ class Parser:
         tag.select_transform(False)
 
     def parse_node(self, block: bool = False, indentless_sequence: bool = False) -> Any:
-        if self.scanner.check_token(AliasToken):
-            token = self.scanner.get_token()
+        # the next token is peeked once, and again after taking a token
+        token = self.scanner.peek_token()
+        if isinstance(token, AliasToken):
+            self.scanner.get_token()
             event: Any = AliasEvent(token.value, token.start_mark, token.end_mark)
             self.state = self.states.pop()
             return event
@@ -372,22 +382,24 @@ class Parser:
         anchor = None
         tag = None
         start_mark = end_mark = tag_mark = None
-        if self.scanner.check_token(AnchorToken):
-            token = self.scanner.get_token()
+        if isinstance(token, AnchorToken):
+            self.scanner.get_token()
             self.move_token_comment(token)
             start_mark = token.start_mark
             end_mark = token.end_mark
             anchor = token.value
-            if self.scanner.check_token(TagToken):
-                token = self.scanner.get_token()
+            token = self.scanner.peek_token()
+            if isinstance(token, TagToken):
+                self.scanner.get_token()
                 tag_mark = token.start_mark
                 end_mark = token.end_mark
                 # tag = token.value
                 tag = Tag(
                     handle=token.value[0], suffix=token.value[1], handles=self.tag_handles,
                 )
-        elif self.scanner.check_token(TagToken):
-            token = self.scanner.get_token()
+                token = self.scanner.peek_token()
+        elif isinstance(token, TagToken):
+            self.scanner.get_token()
             try:
                 self.move_token_comment(token)
             except NotImplementedError:
@@ -396,11 +408,13 @@ class Parser:
             end_mark = token.end_mark
             # tag = token.value
             tag = Tag(handle=token.value[0], suffix=token.value[1], handles=self.tag_handles)
-            if self.scanner.check_token(AnchorToken):
-                token = self.scanner.get_token()
+            token = self.scanner.peek_token()
+            if isinstance(token, AnchorToken):
+                self.scanner.get_token()
                 start_mark = tag_mark = token.start_mark
                 end_mark = token.end_mark
                 anchor = token.value
+                token = self.scanner.peek_token()
         if tag is not None:
             self.select_tag_transform(tag)
             if tag.check_handle():
@@ -411,31 +425,30 @@ class Parser:
                     tag_mark,
                 )
         if start_mark is None:
-            start_mark = end_mark = self.scanner.peek_token().start_mark
+            start_mark = end_mark = token.start_mark
         event = None
         implicit = tag is None or str(tag) == '!'
-        if indentless_sequence and self.scanner.check_token(BlockEntryToken):
+        if indentless_sequence and isinstance(token, BlockEntryToken):
             comment = None
-            pt = self.scanner.peek_token()
             if self.loader and self.loader.comment_handling is None:
-                if pt.comment and pt.comment[0]:
-                    comment = [pt.comment[0], []]
-                    pt.comment[0] = None
-                elif pt.comment and pt.comment[0] is None and pt.comment[1]:
-                    comment = [None, pt.comment[1]]
-                    pt.comment[1] = None
+                if token.comment and token.comment[0]:
+                    comment = [token.comment[0], []]
+                    token.comment[0] = None
+                elif token.comment and token.comment[0] is None and token.comment[1]:
+                    comment = [None, token.comment[1]]
+                    token.comment[1] = None
             elif self.loader:
-                if pt.comment:
-                    comment = pt.comment
-            end_mark = self.scanner.peek_token().end_mark
+                if token.comment:
+                    comment = token.comment
+            end_mark = token.end_mark
             event = SequenceStartEvent(
                 anchor, tag, implicit, start_mark, end_mark, flow_style=False, comment=comment,
             )
             self.state = self.parse_indentless_sequence_entry
             return event
 
-        if self.scanner.check_token(ScalarToken):
-            token = self.scanner.get_token()
+        if isinstance(token, ScalarToken):
+            self.scanner.get_token()
             # self.scanner.peek_token_same_line_comment(token)
             end_mark = token.end_mark
             if (token.plain and tag is None) or str(tag) == '!':
@@ -455,9 +468,8 @@ class Parser:
                 comment=token.comment,
             )
             self.state = self.states.pop()
-        elif self.scanner.check_token(FlowSequenceStartToken):
-            pt = self.scanner.peek_token()
-            end_mark = pt.end_mark
+        elif isinstance(token, FlowSequenceStartToken):
+            end_mark = token.end_mark
             event = SequenceStartEvent(
                 anchor,
                 tag,
@@ -465,12 +477,11 @@ class Parser:
                 start_mark,
                 end_mark,
                 flow_style=True,
-                comment=pt.comment,
+                comment=token.comment,
             )
             self.state = self.parse_flow_sequence_first_entry
-        elif self.scanner.check_token(FlowMappingStartToken):
-            pt = self.scanner.peek_token()
-            end_mark = pt.end_mark
+        elif isinstance(token, FlowMappingStartToken):
+            end_mark = token.end_mark
             event = MappingStartEvent(
                 anchor,
                 tag,
@@ -478,26 +489,25 @@ class Parser:
                 start_mark,
                 end_mark,
                 flow_style=True,
-                comment=pt.comment,
+                comment=token.comment,
             )
             self.state = self.parse_flow_mapping_first_key
-        elif block and self.scanner.check_token(BlockSequenceStartToken):
-            end_mark = self.scanner.peek_token().start_mark
+        elif block and isinstance(token, BlockSequenceStartToken):
+            end_mark = token.start_mark
             # should inserting the comment be dependent on the
             # indentation?
-            pt = self.scanner.peek_token()
-            comment = pt.comment
-            # nprint('pt0', type(pt))
+            comment = token.comment
+            # nprint('pt0', type(token))
             if comment is None or comment[1] is None:
-                comment = pt.split_old_comment()
+                comment = token.split_old_comment()
             # nprint('pt1', comment)
             event = SequenceStartEvent(
                 anchor, tag, implicit, start_mark, end_mark, flow_style=False, comment=comment,
             )
             self.state = self.parse_block_sequence_first_entry
-        elif block and self.scanner.check_token(BlockMappingStartToken):
-            end_mark = self.scanner.peek_token().start_mark
-            comment = self.scanner.peek_token().comment
+        elif block and isinstance(token, BlockMappingStartToken):
+            end_mark = token.start_mark
+            comment = token.comment
             event = MappingStartEvent(
                 anchor, tag, implicit, start_mark, end_mark, flow_style=False, comment=comment,
             )
@@ -512,7 +522,6 @@ class Parser:
                 node = 'block'
             else:
                 node = 'flow'
-            token = self.scanner.peek_token()
             raise ParserError(
                 f'while parsing a {node!s} node',
                 start_mark,
@@ -532,24 +541,24 @@ class Parser:
         return self.parse_block_sequence_entry()
 
     def parse_block_sequence_entry(self) -> Any:
-        if self.scanner.check_token(BlockEntryToken):
-            token = self.scanner.get_token()
+        token = self.scanner.peek_token()
+        if isinstance(token, BlockEntryToken):
+            self.scanner.get_token()
             self.move_token_comment(token)
-            if not self.scanner.check_token(BlockEntryToken, BlockEndToken):
+            if not isinstance(self.scanner.peek_token(), (BlockEntryToken, BlockEndToken)):
                 self.states.append(self.parse_block_sequence_entry)
                 return self.parse_block_node()
             else:
                 self.state = self.parse_block_sequence_entry
                 return self.process_empty_scalar(token.end_mark)
-        if not self.scanner.check_token(BlockEndToken):
-            token = self.scanner.peek_token()
+        if not isinstance(token, BlockEndToken):
             raise ParserError(
                 'while parsing a block collection',
                 self.marks[-1],
                 f'expected <block end>, but found {token.id!r}',
                 token.start_mark,
             )
-        token = self.scanner.get_token()  # BlockEndToken
+        self.scanner.get_token()  # BlockEndToken
         event = SequenceEndEvent(token.start_mark, token.end_mark, comment=token.comment)
         self.state = self.states.pop()
         self.marks.pop()
@@ -563,18 +572,19 @@ class Parser:
     #  - nested
 
     def parse_indentless_sequence_entry(self) -> Any:
-        if self.scanner.check_token(BlockEntryToken):
-            token = self.scanner.get_token()
+        token = self.scanner.peek_token()
+        if isinstance(token, BlockEntryToken):
+            self.scanner.get_token()
             self.move_token_comment(token)
-            if not self.scanner.check_token(
-                BlockEntryToken, KeyToken, ValueToken, BlockEndToken,
+            next_token = self.scanner.peek_token()
+            if not isinstance(
+                next_token, (BlockEntryToken, KeyToken, ValueToken, BlockEndToken),
             ):
                 self.states.append(self.parse_indentless_sequence_entry)
                 return self.parse_block_node()
             else:
                 self.state = self.parse_indentless_sequence_entry
                 return self.process_empty_scalar(token.end_mark)
-        token = self.scanner.peek_token()
         c = None
         if self.loader and self.loader.comment_handling is None:
             c = token.comment
@@ -597,27 +607,28 @@ class Parser:
         return self.parse_block_mapping_key()
 
     def parse_block_mapping_key(self) -> Any:
-        if self.scanner.check_token(KeyToken):
-            token = self.scanner.get_token()
+        token = self.scanner.peek_token()
+        if isinstance(token, KeyToken):
+            self.scanner.get_token()
             self.move_token_comment(token)
-            if not self.scanner.check_token(KeyToken, ValueToken, BlockEndToken):
+            next_token = self.scanner.peek_token()
+            if not isinstance(next_token, (KeyToken, ValueToken, BlockEndToken)):
                 self.states.append(self.parse_block_mapping_value)
                 return self.parse_block_node_or_indentless_sequence()
             else:
                 self.state = self.parse_block_mapping_value
                 return self.process_empty_scalar(token.end_mark)
-        if self.resolver.processing_version > (1, 1) and self.scanner.check_token(ValueToken):
+        if isinstance(token, ValueToken) and self.resolver.processing_version > (1, 1):
             self.state = self.parse_block_mapping_value
-            return self.process_empty_scalar(self.scanner.peek_token().start_mark)
-        if not self.scanner.check_token(BlockEndToken):
-            token = self.scanner.peek_token()
+            return self.process_empty_scalar(token.start_mark)
+        if not isinstance(token, BlockEndToken):
             raise ParserError(
                 'while parsing a block mapping',
                 self.marks[-1],
                 f'expected <block end>, but found {token.id!r}',
                 token.start_mark,
             )
-        token = self.scanner.get_token()
+        self.scanner.get_token()
         self.move_token_comment(token)
         event = MappingEndEvent(token.start_mark, token.end_mark, comment=token.comment)
         self.state = self.states.pop()
@@ -625,23 +636,25 @@ class Parser:
         return event
 
     def parse_block_mapping_value(self) -> Any:
-        if self.scanner.check_token(ValueToken):
-            token = self.scanner.get_token()
+        token = self.scanner.peek_token()
+        if isinstance(token, ValueToken):
+            self.scanner.get_token()
+            next_token = self.scanner.peek_token()
             # value token might have post comment move it to e.g. block
-            if self.scanner.check_token(ValueToken):
+            if isinstance(next_token, ValueToken):
                 self.move_token_comment(token)
             else:
-                if not self.scanner.check_token(KeyToken):
+                if not isinstance(next_token, KeyToken):
                     self.move_token_comment(token, empty=True)
                 # else: empty value for this key cannot move token.comment
-            if not self.scanner.check_token(KeyToken, ValueToken, BlockEndToken):
+            if not isinstance(next_token, (KeyToken, ValueToken, BlockEndToken)):
                 self.states.append(self.parse_block_mapping_key)
                 return self.parse_block_node_or_indentless_sequence()
             else:
                 self.state = self.parse_block_mapping_key
                 comment = token.comment
                 if comment is None:
-                    token = self.scanner.peek_token()
+                    token = next_token
                     comment = token.comment
                     if comment:
                         token._comment = [None, comment[1]]
@@ -649,7 +662,6 @@ class Parser:
                 return self.process_empty_scalar(token.end_mark, comment=comment)
         else:
             self.state = self.parse_block_mapping_key
-            token = self.scanner.peek_token()
             return self.process_empty_scalar(token.start_mark)
 
     # flow_sequence     ::= FLOW-SEQUENCE-START
@@ -669,12 +681,13 @@ class Parser:
         return self.parse_flow_sequence_entry(first=True)
 
     def parse_flow_sequence_entry(self, first: bool = False) -> Any:
-        if not self.scanner.check_token(FlowSequenceEndToken):
+        token = self.scanner.peek_token()
+        if not isinstance(token, FlowSequenceEndToken):
             if not first:
-                if self.scanner.check_token(FlowEntryToken):
+                if isinstance(token, FlowEntryToken):
                     self.scanner.get_token()
-                else:
                     token = self.scanner.peek_token()
+                else:
                     raise ParserError(
                         'while parsing a flow sequence',
                         self.marks[-1],
@@ -682,17 +695,16 @@ class Parser:
                         token.start_mark,
                     )
 
-            if self.scanner.check_token(KeyToken):
-                token = self.scanner.peek_token()
+            if isinstance(token, KeyToken):
                 event: Any = MappingStartEvent(
                     None, None, True, token.start_mark, token.end_mark, flow_style=True,
                 )
                 self.state = self.parse_flow_sequence_entry_mapping_key
                 return event
-            elif not self.scanner.check_token(FlowSequenceEndToken):
+            elif not isinstance(token, FlowSequenceEndToken):
                 self.states.append(self.parse_flow_sequence_entry)
                 return self.parse_flow_node()
-        token = self.scanner.get_token()
+        self.scanner.get_token()
         event = SequenceEndEvent(token.start_mark, token.end_mark, comment=token.comment)
         self.state = self.states.pop()
         self.marks.pop()
@@ -700,7 +712,9 @@ class Parser:
 
     def parse_flow_sequence_entry_mapping_key(self) -> Any:
         token = self.scanner.get_token()
-        if not self.scanner.check_token(ValueToken, FlowEntryToken, FlowSequenceEndToken):
+        if not isinstance(
+            self.scanner.peek_token(), (ValueToken, FlowEntryToken, FlowSequenceEndToken),
+        ):
             self.states.append(self.parse_flow_sequence_entry_mapping_value)
             return self.parse_flow_node()
         else:
@@ -708,9 +722,11 @@ class Parser:
             return self.process_empty_scalar(token.end_mark)
 
     def parse_flow_sequence_entry_mapping_value(self) -> Any:
-        if self.scanner.check_token(ValueToken):
-            token = self.scanner.get_token()
-            if not self.scanner.check_token(FlowEntryToken, FlowSequenceEndToken):
+        token = self.scanner.peek_token()
+        if isinstance(token, ValueToken):
+            self.scanner.get_token()
+            next_token = self.scanner.peek_token()
+            if not isinstance(next_token, (FlowEntryToken, FlowSequenceEndToken)):
                 self.states.append(self.parse_flow_sequence_entry_mapping_end)
                 return self.parse_flow_node()
             else:
@@ -718,7 +734,6 @@ class Parser:
                 return self.process_empty_scalar(token.end_mark)
         else:
             self.state = self.parse_flow_sequence_entry_mapping_end
-            token = self.scanner.peek_token()
             return self.process_empty_scalar(token.start_mark)
 
     def parse_flow_sequence_entry_mapping_end(self) -> Any:
@@ -738,46 +753,48 @@ class Parser:
         return self.parse_flow_mapping_key(first=True)
 
     def parse_flow_mapping_key(self, first: Any = False) -> Any:
-        if not self.scanner.check_token(FlowMappingEndToken):
+        token = self.scanner.peek_token()
+        if not isinstance(token, FlowMappingEndToken):
             if not first:
-                if self.scanner.check_token(FlowEntryToken):
+                if isinstance(token, FlowEntryToken):
                     self.scanner.get_token()
-                else:
                     token = self.scanner.peek_token()
+                else:
                     raise ParserError(
                         'while parsing a flow mapping',
                         self.marks[-1],
                         f"expected ',' or '}}', but got {token.id!r}",
                         token.start_mark,
                     )
-            if self.scanner.check_token(KeyToken):
-                token = self.scanner.get_token()
-                if not self.scanner.check_token(
-                    ValueToken, FlowEntryToken, FlowMappingEndToken,
+            if isinstance(token, KeyToken):
+                self.scanner.get_token()
+                next_token = self.scanner.peek_token()
+                if not isinstance(
+                    next_token, (ValueToken, FlowEntryToken, FlowMappingEndToken),
                 ):
                     self.states.append(self.parse_flow_mapping_value)
                     return self.parse_flow_node()
                 else:
                     self.state = self.parse_flow_mapping_value
                     return self.process_empty_scalar(token.end_mark)
-            elif self.resolver.processing_version > (1, 1) and self.scanner.check_token(
-                ValueToken,
-            ):
+            elif isinstance(token, ValueToken) and self.resolver.processing_version > (1, 1):
                 self.state = self.parse_flow_mapping_value
-                return self.process_empty_scalar(self.scanner.peek_token().end_mark)
-            elif not self.scanner.check_token(FlowMappingEndToken):
+                return self.process_empty_scalar(token.end_mark)
+            elif not isinstance(token, FlowMappingEndToken):
                 self.states.append(self.parse_flow_mapping_empty_value)
                 return self.parse_flow_node()
-        token = self.scanner.get_token()
+        self.scanner.get_token()
         event = MappingEndEvent(token.start_mark, token.end_mark, comment=token.comment)
         self.state = self.states.pop()
         self.marks.pop()
         return event
 
     def parse_flow_mapping_value(self) -> Any:
-        if self.scanner.check_token(ValueToken):
-            token = self.scanner.get_token()
-            if not self.scanner.check_token(FlowEntryToken, FlowMappingEndToken):
+        token = self.scanner.peek_token()
+        if isinstance(token, ValueToken):
+            self.scanner.get_token()
+            next_token = self.scanner.peek_token()
+            if not isinstance(next_token, (FlowEntryToken, FlowMappingEndToken)):
                 self.states.append(self.parse_flow_mapping_key)
                 return self.parse_flow_node()
             else:
@@ -785,7 +802,6 @@ class Parser:
                 return self.process_empty_scalar(token.end_mark)
         else:
             self.state = self.parse_flow_mapping_key
-            token = self.scanner.peek_token()
             return self.process_empty_scalar(token.start_mark)
 
     def parse_flow_mapping_empty_value(self) -> Any:
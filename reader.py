@@ -8,7 +8,9 @@ from __future__ import annotations
 #
 #   Mark(source, line, column)
 # It's just a record and its only use is producing nice error messages.
-# Parser does not use it for any other purposes.
+# Parser does not use it for any other purposes. The marks handed out by the
+# Reader (IndexMark) only store the index, line and column are derived from the
+# line start positions the Reader records in its LineIndex.
 #
 #   Reader(source, data)
 # Reader determines the encoding of `data` and converts it to unicode.
@@ -21,15 +23,17 @@ from __future__ import annotations
 #      character.
 
 import codecs
+import mmap
+import re
 
-from ruamel.yaml.error import YAMLError, FileMark, StringMark, YAMLStreamError
+from ruamel.yaml.error import YAMLError, IndexMark, LineIndex, YAMLStreamError
 from ruamel.yaml.util import RegExp
 
 if False:  # MYPY
     from typing import Any, Dict, Optional, List, Union, Text, Tuple, Optional  # NOQA
 # from ruamel.yaml.compat import StreamTextType  # NOQA
 
-__all__ = ['Reader', 'ReaderError']
+__all__ = ['Reader', 'ReaderError', 'FeedStream', 'split_documents', 'document_positions']
 
 
 class ReaderError(YAMLError):
@@ -66,10 +70,20 @@ class Reader:
     #  - a `bytes` object,
     #  - a `str` object,
     #  - a file-like object with its `read` method returning `str`,
-    #  - a file-like object with its `read` method returning `unicode`.
+    #  - a file-like object with its `read` method returning `unicode`,
+    #  - an `mmap.mmap` object, which is decoded lazily in chunks from the
+    #    mapped memory, without copying the raw bytes.
 
     # Yeah, it's ugly and slow.
 
+    # number of bytes decoded at a time from a memory mapped stream
+    mapped_chunk_size = 0x10000
+    # unless the loader has a fixed read_chunk_size, the size of stream.read() calls
+    # starts at initial_chunk_size and doubles, up to max_chunk_size, as long as each
+    # read returns as much data as was requested
+    initial_chunk_size = 4096
+    max_chunk_size = 0x100000
+
     def __init__(self, stream: Any, loader: Any = None) -> None:
         self.loader = loader
         if self.loader is not None and getattr(self.loader, '_reader', None) is None:
@@ -85,10 +99,26 @@ class Reader:
         self.pointer = 0
         self.raw_buffer: Any = None
         self.raw_decode = None
+        # memoryview on a memory mapped stream and the offset of the first undecoded byte
+        if getattr(self, 'raw_view', None) is not None:
+            self.release_view()
+        self.raw_view: Any = None
+        self.raw_offset = 0
+        self.chunk_size = self.initial_chunk_size
+        self.adaptive_chunk_size = True
+        # read from the stream before decoding the pending raw data, so the end of a short
+        # stream is found early. A FeedStream (YAML.feed()) cannot hand out data that has
+        # not been fed yet, for that the pending data is decoded first
+        self.read_ahead = True
+        self.check_input = True
         self.encoding: Optional[Text] = None
         self.index = 0
         self.line = 0
         self.column = 0
+        self.line_index = LineIndex(None)
+        self.line_starts = self.line_index.line_starts
+        # if set get_mark() returns the index instead of a mark object
+        self.index_marks = False
 
     @property
     def stream(self) -> Any:
@@ -102,22 +132,42 @@ class Reader:
         if val is None:
             return
         self._stream = None
+        read_chunk_size = getattr(self.loader, 'read_chunk_size', None)
+        if read_chunk_size is not None:
+            self.chunk_size = read_chunk_size
+            self.adaptive_chunk_size = False
+        self.check_input = not getattr(self.loader, 'trusted_input', False)
         if isinstance(val, str):
             self.name = '<unicode string>'
-            self.check_printable(val)
+            if self.check_input:
+                self.check_printable(val)
             self.buffer = val + '\0'
         elif isinstance(val, bytes):
             self.name = '<byte string>'
             self.raw_buffer = val
             self.determine_encoding()
+        elif isinstance(val, mmap.mmap):
+            self._stream = val
+            self.name = getattr(self.loader, 'mapped_name', None) or '<memory mapped file>'
+            self.eof = False
+            self.raw_view = memoryview(val)
+            self.raw_offset = 0
+            self.determine_mapped_encoding()
         else:
             if not hasattr(val, 'read'):
                 raise YAMLStreamError('stream argument needs to have a read() method')
             self._stream = val
             self.name = getattr(self.stream, 'name', '<file>')
             self.eof = False
+            self.read_ahead = not isinstance(val, FeedStream)
             self.raw_buffer = None
             self.determine_encoding()
+        # e.g. when loading a document split off from a larger stream
+        self.line = self.line_index.first_line = getattr(self.loader, 'first_line', 0)
+        # for string input the buffer holds all of the input and pointer equals index
+        self.line_index.name = self.name
+        if self._stream is None:
+            self.line_index.buffer = self.buffer
 
     def peek(self, index: int = 0) -> Text:
         try:
@@ -134,45 +184,70 @@ class Reader:
     def forward_1_1(self, length: int = 1) -> None:
         if self.pointer + length + 1 >= len(self.buffer):
             self.update(length + 1)
-        while length != 0:
-            ch = self.buffer[self.pointer]
-            self.pointer += 1
-            self.index += 1
-            if ch in '\n\x85\u2028\u2029' or (
-                ch == '\r' and self.buffer[self.pointer] != '\n'
-            ):
-                self.line += 1
-                self.column = 0
-            elif ch != '\uFEFF':
-                self.column += 1
-            length -= 1
+        self._advance(length, self.LINE_BREAK_1_1)
 
     def forward(self, length: int = 1) -> None:
         if self.pointer + length + 1 >= len(self.buffer):
             self.update(length + 1)
-        while length != 0:
-            ch = self.buffer[self.pointer]
-            self.pointer += 1
-            self.index += 1
-            if ch == '\n' or (ch == '\r' and self.buffer[self.pointer] != '\n'):
-                self.line += 1
+        if length != 1:
+            self._advance(length, self.LINE_BREAK)
+            return
+        ch = self.buffer[self.pointer]
+        self.pointer += 1
+        self.index += 1
+        if ch == '\n' or (ch == '\r' and self.buffer[self.pointer] != '\n'):
+            self.line += 1
+            self.column = 0
+            self.line_starts.append(self.index)
+        elif ch != '\uFEFF':
+            self.column += 1
+        else:
+            self.line_index.boms.append(self.index - 1)
+
+    # not lazily compiled (RegExp), these are used for almost every forward()
+    LINE_BREAK = re.compile('\n|\r(?!\n)')
+    LINE_BREAK_1_1 = re.compile('[\n\x85\u2028\u2029]|\r(?!\n)')
+
+    def _advance(self, length: int, line_break: Any) -> None:
+        # move forward over length characters, updating line and column from the line
+        # breaks found with a regex, instead of looking at every character
+        buffer = self.buffer
+        pointer = self.pointer
+        end = pointer + length
+        offset = self.index - pointer
+        start = pointer
+        if line_break.search(buffer, pointer, end) is not None:
+            # search up to and including buffer[end], so that a '\r' at end - 1 sees
+            # a following '\n', a break matched at end is not part of the range
+            line_starts = [
+                offset + m.end() for m in line_break.finditer(buffer, pointer, end + 1)
+                if m.start() < end
+            ]
+            if line_starts:
+                self.line += len(line_starts)
+                self.line_starts.extend(line_starts)
+                start = line_starts[-1] - offset
                 self.column = 0
-            elif ch != '\uFEFF':
-                self.column += 1
-            length -= 1
+        boms = buffer.count('\uFEFF', pointer, end)
+        if boms:
+            pos = buffer.find('\uFEFF', pointer, end)
+            while pos >= 0:
+                self.line_index.boms.append(offset + pos)
+                pos = buffer.find('\uFEFF', pos + 1, end)
+            boms = buffer.count('\uFEFF', start, end)
+        self.column += end - start - boms
+        self.index += length
+        self.pointer = end
 
     def get_mark(self) -> Any:
-        if self.stream is None:
-            return StringMark(
-                self.name, self.index, self.line, self.column, self.buffer, self.pointer,
-            )
-        else:
-            return FileMark(self.name, self.index, self.line, self.column)
+        if self.index_marks:
+            return self.index
+        return IndexMark(self.line_index, self.index)
 
     def determine_encoding(self) -> None:
         while not self.eof and (self.raw_buffer is None or len(self.raw_buffer) < 2):
             self.update_raw()
-        if isinstance(self.raw_buffer, bytes):
+        if isinstance(self.raw_buffer, (bytes, bytearray)):
             if self.raw_buffer.startswith(codecs.BOM_UTF16_LE):
                 self.raw_decode = codecs.utf_16_le_decode  # type: ignore
                 self.encoding = 'utf-16-le'
@@ -184,12 +259,32 @@ class Reader:
                 self.encoding = 'utf-8'
         self.update(1)
 
+    def determine_mapped_encoding(self) -> None:
+        head = self.raw_view[:2].tobytes()
+        if head == codecs.BOM_UTF16_LE:
+            self.raw_decode = codecs.utf_16_le_decode  # type: ignore
+            self.encoding = 'utf-16-le'
+        elif head == codecs.BOM_UTF16_BE:
+            self.raw_decode = codecs.utf_16_be_decode  # type: ignore
+            self.encoding = 'utf-16-be'
+        else:
+            self.raw_decode = codecs.utf_8_decode  # type: ignore
+            self.encoding = 'utf-8'
+        self.update(1)
+
     NON_PRINTABLE = RegExp(
         '[^\x09\x0A\x0D\x20-\x7E\x85' '\xA0-\uD7FF' '\uE000-\uFFFD' '\U00010000-\U0010FFFF' ']'  # NOQA
     )
 
     _printable_ascii = ('\x09\x0A\x0D' + "".join(map(chr, range(0x20, 0x7F)))).encode('ascii')
 
+    # the UTF-8 encoding of the characters matched by NON_PRINTABLE. Surrogates cannot be
+    # in (strictly decoded) UTF-8, and as \xC2 and \xEF are never continuation bytes,
+    # this doesn't match within the encoding of a printable character
+    NON_PRINTABLE_UTF8 = RegExp(
+        b'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]|\xC2[\x80-\x84\x86-\x9F]|\xEF\xBF[\xBE\xBF]'
+    )
+
     @classmethod
     def _get_non_printable_ascii(cls: Text, data: bytes) -> Optional[Tuple[int, Text]]:  # type: ignore # NOQA
         ascii_bytes = data.encode('ascii')  # type: ignore
@@ -208,10 +303,9 @@ class Reader:
 
     @classmethod
     def _get_non_printable(cls, data: Text) -> Optional[Tuple[int, Text]]:
-        try:
+        if data.isascii():
             return cls._get_non_printable_ascii(data)  # type: ignore
-        except UnicodeEncodeError:
-            return cls._get_non_printable_regex(data)
+        return cls._get_non_printable_regex(data)
 
     def check_printable(self, data: Any) -> None:
         non_printable_match = self._get_non_printable(data)
@@ -226,13 +320,28 @@ class Reader:
                 'special characters are not allowed',
             )
 
+    def check_printable_utf8(self, raw: Any, converted: int, data: Text) -> None:
+        # check the UTF-8 encoded bytes from which data was decoded, so that data doesn't
+        # have to be scanned (twice, for non-ASCII data) as unicode. Only when there is a
+        # non-printable character, data is checked to determine its (character) position
+        if raw.isascii():
+            if not raw.translate(None, self._printable_ascii):
+                return
+        elif self.NON_PRINTABLE_UTF8.search(raw, 0, converted) is None:
+            return
+        self.check_printable(data)
+
     def update(self, length: int) -> None:
+        if self.raw_view is not None:
+            self.update_mapped(length)
+            return
         if self.raw_buffer is None:
             return
         self.buffer = self.buffer[self.pointer :]
         self.pointer = 0
+        converted = -1
         while len(self.buffer) < length:
-            if not self.eof:
+            if not self.eof and (self.read_ahead or not self.raw_buffer or converted == 0):
                 self.update_raw()
             if self.raw_decode is not None:
                 try:
@@ -246,29 +355,315 @@ class Reader:
                     else:
                         position = exc.start
                     raise ReaderError(self.name, position, character, exc.encoding, exc.reason)
+                if self.check_input:
+                    if self.raw_decode is codecs.utf_8_decode:
+                        self.check_printable_utf8(self.raw_buffer, converted, data)
+                    else:
+                        self.check_printable(data)
             else:
                 data = self.raw_buffer
                 converted = len(data)
-            self.check_printable(data)
+                if self.check_input:
+                    self.check_printable(data)
             self.buffer += data
-            self.raw_buffer = self.raw_buffer[converted:]
+            if isinstance(self.raw_buffer, bytearray):
+                # deleting from the front of a bytearray doesn't move the remaining data
+                del self.raw_buffer[:converted]
+            else:
+                self.raw_buffer = self.raw_buffer[converted:]
             if self.eof:
                 self.buffer += '\0'
                 self.raw_buffer = None
                 break
 
+    def update_mapped(self, length: int) -> None:
+        # decode directly from (slices of) the memoryview on the mapped stream, the
+        # undecoded bytes are never copied into, or concatenated to, a raw_buffer
+        self.buffer = self.buffer[self.pointer :]
+        self.pointer = 0
+        view = self.raw_view
+        view_length = len(view)
+        while len(self.buffer) < length:
+            start = self.raw_offset
+            chunk_size = (
+                self.mapped_chunk_size if self.adaptive_chunk_size else self.chunk_size
+            )
+            end = min(start + max(length, chunk_size), view_length)
+            final = end == view_length
+            try:
+                data, converted = self.raw_decode(view[start:end], 'strict', final)
+                if self.check_input:
+                    if self.raw_decode is codecs.utf_8_decode:
+                        # memoryview has no isascii(), searching it doesn't copy
+                        if self.NON_PRINTABLE_UTF8.search(view, start, start + converted):
+                            self.check_printable(data)
+                    else:
+                        self.check_printable(data)
+            except UnicodeDecodeError as exc:
+                character = view[start + exc.start]
+                self.release_view()
+                raise ReaderError(
+                    self.name, start + exc.start, character, exc.encoding, exc.reason,
+                )
+            except ReaderError:
+                # the mmap cannot be closed as long as the view is not released
+                self.release_view()
+                raise
+            self.buffer += data
+            self.raw_offset += converted
+            self.stream_pointer = self.raw_offset
+            if final:
+                self.buffer += '\0'
+                self.eof = True
+                self.release_view()
+                break
+
+    def release_view(self) -> None:
+        if self.raw_view is not None:
+            self.raw_view.release()
+            self.raw_view = None
+
     def update_raw(self, size: Optional[int] = None) -> None:
         if size is None:
-            size = 4096
+            size = self.chunk_size
         data = self.stream.read(size)
         if self.raw_buffer is None:
-            self.raw_buffer = data
+            # appending to a bytearray doesn't copy the pending, undecoded, data
+            self.raw_buffer = bytearray(data) if isinstance(data, bytes) else data
         else:
             self.raw_buffer += data
         self.stream_pointer += len(data)
         if not data:
             self.eof = True
+        elif (
+            self.adaptive_chunk_size
+            and len(data) == size == self.chunk_size
+            and size < self.max_chunk_size
+        ):
+            self.chunk_size = min(size * 2, self.max_chunk_size)
+
+
+class FeedStream:
+    """
+    stream for push-style loading (YAML.feed()): data is added, as str or as UTF-8
+    encoded bytes, when it arrives and read() only hands out what has been added.
+
+    The lines added are classified to count the documents that can be loaded without
+    reading beyond the data added (complete). That is the case for a document followed
+    by a line starting with '---', for a document ended by a '...' line only once the
+    token after the marker is available.
+    Lines are taken to end in '\\n', the start of a line is not recognised after any of the
+    other line breaks, which only delays the documents until close().
+    """
+
+    marker_pattern = '^(?:(?P<start>---)|(?P<end>\\.\\.\\.))(?=[ \\t\\r\\n])'
+    # a marker, a directive or a line that is not empty and not a comment
+    line_pattern = (
+        '^(?:(?:(?P<start>---)|(?P<end>\\.\\.\\.))(?=[ \\t\\r\\n])'
+        '|(?P<directive>%)|(?![ \\t\\r]*[#\\r\\n]))'
+    )
 
+    def __init__(self) -> None:
+        self.name = '<feed>'
+        self.chunks: List[Any] = []
+        self.empty: Any = None  # '' or b'', depending on the first data added
+        self.newline: Any = None
+        self.line: List[Any] = []  # the data after the last '\n'
+        self.in_document = False
+        self.pending = 0  # documents ended by '...', waiting for the token after it
+        self.complete = 0
+        # the number of complete documents to keep, as the scanner may look into them
+        self.lookahead = 0
+        self.closed = False
+
+    def feed(self, data: Any) -> None:
+        if self.closed:
+            raise YAMLStreamError('cannot feed data to a closed stream')
+        if self.empty is None:
+            if isinstance(data, str):
+                self.empty, self.newline, bom = '', '\n', '\ufeff'
+                self.marker_regex = re.compile(self.marker_pattern, re.M)
+                self.line_regex = re.compile(self.line_pattern, re.M)
+            else:
+                self.empty, self.newline, bom = b'', b'\n', codecs.BOM_UTF8
+                self.marker_regex = re.compile(self.marker_pattern.encode(), re.M)
+                self.line_regex = re.compile(self.line_pattern.encode(), re.M)
+            if data.startswith(bom):
+                # a marker can start the stream after the byte order mark
+                self.chunks.append(bom)
+                data = data[len(bom) :]
+        elif isinstance(data, str) != isinstance(self.empty, str):
+            raise YAMLStreamError('cannot mix str and bytes data when feeding a stream')
+        if not data:
+            return
+        self.chunks.append(data)
+        idx = data.rfind(self.newline) + 1
+        if idx == 0:
+            self.line.append(data)
+            return
+        if self.line:
+            self.line.append(data[:idx])
+            self.classify(self.empty.join(self.line))
+        else:
+            self.classify(data[:idx])
+        self.line = [data[idx:]] if idx < len(data) else []
+
+    def classify(self, text: Any) -> None:
+        # text consists of complete lines
+        pos = 0
+        end = len(text)
+        while pos < end:
+            if self.in_document:
+                # only a marker can end the document
+                match = self.marker_regex.search(text, pos)
+            else:
+                match = self.line_regex.search(text, pos)
+            if match is None or match.start() == end:
+                break
+            pos = text.index(self.newline, match.start()) + 1
+            kind = match.lastgroup
+            if kind == 'start':
+                # the token after a '...' is this marker, the document before it ends here
+                self.complete += self.pending + self.in_document
+                self.pending = 0
+                self.in_document = True
+            elif kind == 'end':
+                self.complete += self.pending
+                self.pending = 0
+                if self.in_document:
+                    self.pending = 1
+                    self.in_document = False
+            elif kind == 'directive':
+                # scanning a directive goes past its line end, the document(s) before it
+                # are complete with the '---' that has to follow
+                pass
+            else:
+                # the first token of an implicit document, after a '...', can be a
+                # multi-line scalar, any pending documents have to wait for its end
+                self.in_document = True
+
+    def close(self) -> None:
+        self.closed = True
+
+    def read(self, size: int = -1) -> Any:
+        if not self.chunks:
+            if not self.closed:
+                raise YAMLStreamError('read past the data fed to the stream')
+            return b'' if self.empty is None else self.empty
+        data = self.empty.join(self.chunks)
+        if 0 <= size < len(data):
+            self.chunks = [data[size:]]
+            return data[:size]
+        self.chunks = []
+        return data
+
+
+# a '---' marker, or a directive, at the start of a line
+_SPLIT_POINT = re.compile('^(?:(?P<start>---)(?=[ \\t\\r\\n]|\\Z)|(?P<directive>%))', re.M)
+_COMMENT_LINES = re.compile('(?:[ \\t]*(?:#[^\\n]*)?\\r?\\n)*')
+_VERSION_DIRECTIVE = re.compile('^\\ufeff?%YAML(?=[ \\t])', re.M)
+
+
+def split_documents(text: Text) -> List[Tuple[int, int]]:
+    """
+    find the positions where the documents in text can be split off, so that they can be
+    loaded separately: the start of a line with a '---' marker, or of the directives
+    preceding that. Returns a list of (position, line number) tuples, starting with (0, 0).
+    (A '%' at the start of a line is taken to be a directive, even though it could continue
+    a multi-line plain scalar at the root level of a document)
+    """
+    res = [(0, 0)]
+    prev = line = 0
+    # start of a run of directives, and the end of its last line
+    directives = directives_end = -1
+    for match in _SPLIT_POINT.finditer(text):
+        pos = match.start()
+        # only comments and empty lines between the directives and this line
+        follows = directives >= 0 and _COMMENT_LINES.match(text, directives_end).end() == pos
+        if match.lastgroup == 'directive':
+            if not follows:
+                directives = pos
+            directives_end = text.find('\n', pos) + 1
+            if directives_end == 0:
+                break
+            continue
+        if follows:
+            pos = directives
+        directives = -1
+        if pos > prev:
+            line += len(Reader.LINE_BREAK.findall(text, prev, pos))
+            res.append((pos, line))
+            prev = pos
+    return res
+
+
+def has_version_directive(text: Text) -> bool:
+    """
+    whether there is a %YAML directive in text, the version it sets (also) applies to the
+    documents following the one it precedes, so these cannot be loaded separately
+    """
+    return _VERSION_DIRECTIVE.search(text) is not None
+
+
+# the lines of a UTF-8 encoded stream that matter for finding the start of its documents,
+# within a document only markers and directives (a '%' at the start of a line always is one)
+_MARKER_OR_DIRECTIVE = (
+    b'(?:(?P<start>---)|(?P<end>\\.\\.\\.))(?=[ \\t\\r\\n]|\\Z)|(?P<directive>%)'
+)
+_DOCUMENT_LINE = _MARKER_OR_DIRECTIVE + b'|(?P<content>(?![ \\t\\r]*(?:#|\\n|\\Z)))'
+_IN_DOCUMENT = re.compile(b'^(?:' + _MARKER_OR_DIRECTIVE + b')', re.M)
+_OUTSIDE_DOCUMENT = re.compile(b'^(?:' + _DOCUMENT_LINE + b')', re.M)
+_FIRST_LINE = re.compile(_DOCUMENT_LINE)
+
+
+def document_positions(data: Any) -> List[Tuple[int, int, List[Text]]]:
+    """
+    find the documents in UTF-8 encoded data (bytes or an mmap.mmap), without scanning
+    their content. Returns a (byte offset, line number, directives) tuple for every
+    document. A document starts where the one before it ended: after its '...' line, or
+    at the directives or the '---' line ending it implicitly. So the comments before an
+    implicit document, or before the directives of a document, are part of it.
+    Lines are taken to end in '\\n'.
+    """
+    if data[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+        raise YAMLStreamError('cannot find the documents in a UTF-16 encoded stream')
+    res: List[Tuple[int, int, List[Text]]] = []
+    end = len(data)
+    pos = len(codecs.BOM_UTF8) if data[:3] == codecs.BOM_UTF8 else 0
+    match = _FIRST_LINE.match(data, pos)  # the line after a byte order mark
+    line = 0
+    in_document = False
+    boundary = 0  # the end of the previous document, if not in_document
+    directives: List[Text] = []
+    while True:
+        if match is None:
+            match = (_IN_DOCUMENT if in_document else _OUTSIDE_DOCUMENT).search(data, pos)
+            if match is None:
+                break
+        start = match.start()
+        if start == end:
+            break
+        pos = data.find(b'\n', start) + 1 or end
+        kind = match.lastgroup
+        match = None
+        if kind == 'directive':
+            if in_document:
+                boundary = start
+                in_document = False
+            directives.append(data[start:pos].rstrip(b'\r\n').decode('utf-8'))
+            continue
+        if kind == 'end':
+            boundary = pos
+            in_document = False
+            continue
+        # a marker, or the first line of an implicit document
+        if not in_document:
+            start = boundary
+        line += data[res[-1][0] if res else 0 : start].count(b'\n')
+        res.append((start, line, directives))
+        directives = []
+        in_document = True
+    return res
 
 # try:
 #     import psyco
@@ -1,13 +1,14 @@
 
 from __future__ import annotations
 
+import functools
 import re
 
 if False:  # MYPY
     from typing import Any, Dict, List, Union, Text, Optional  # NOQA
     from ruamel.yaml.compat import VersionType  # NOQA
 
-from ruamel.yaml.tag import Tag
+from ruamel.yaml.tag import intern_tag
 from ruamel.yaml.compat import _DEFAULT_YAML_VERSION  # NOQA
 from ruamel.yaml.error import *  # NOQA
 from ruamel.yaml.nodes import MappingNode, ScalarNode, SequenceNode  # NOQA
@@ -103,11 +104,184 @@ class ResolverError(YAMLError):
     pass
 
 
+# number of (short) scalar values per resolver table for which the tag is cached
+IMPLICIT_CACHE_SIZE = 4096
+IMPLICIT_CACHE_MAX_LENGTH = 128
+
+# incremented whenever an implicit resolver is added to a resolver class
+_implicit_resolvers_changed = 0
+_implicit_matchers: Dict[Any, Any] = {}
+_numbered_reference = re.compile('\\\\[1-9]|\\(\\?\\(')
+
+
+def _regexp_matcher(resolvers: List[Any]) -> Any:
+    """
+    combine the regexps of a list of (tag, regexp) into one alternation with a named group
+    for each, so that one match gives the tag of the first that matches. If a regexp
+    cannot be combined (e.g. it refers to its groups by number), they are tried in turn
+    """
+    if not resolvers:
+        return lambda value: None
+    patterns = []
+    tags = {}
+    try:
+        for idx, (tag, regexp) in enumerate(resolvers):
+            pattern = regexp.pattern
+            flags = regexp.flags & ~re.UNICODE
+            if (
+                not isinstance(pattern, str)
+                or flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE)
+                or _numbered_reference.search(pattern)
+            ):
+                raise ValueError
+            scoped = ''.join(
+                ch
+                for flag, ch in (
+                    (re.IGNORECASE, 'i'),
+                    (re.MULTILINE, 'm'),
+                    (re.DOTALL, 's'),
+                    (re.VERBOSE, 'x'),
+                )
+                if flags & flag
+            )
+            name = f'_r{idx}'
+            if flags & re.VERBOSE:
+                # the newline ends a comment at the end of a verbose pattern
+                pattern += '\n'
+            if scoped:
+                pattern = f'(?{scoped}:{pattern})'
+            patterns.append(f'(?P<{name}>{pattern})')
+            tags[name] = tag
+        match = re.compile('|'.join(patterns)).match
+    except (AttributeError, ValueError, re.error):
+
+        def sequential(value: Text) -> Any:
+            for tag, regexp in resolvers:
+                if regexp.match(value):
+                    return tag
+            return None
+
+        return sequential
+
+    def combined(value: Text) -> Any:
+        m = match(value)
+        if m is None:
+            return None
+        return tags[m.lastgroup]
+
+    return combined
+
+
+def implicit_resolver_matcher(resolvers: Dict[Any, List[Any]]) -> Any:
+    """
+    return a function that gives the tag of the first implicit resolver, in a dict of
+    (tag, regexp) lists by first character, that matches a scalar value, or None. The tag
+    is the interned Tag (see intern_tag()), that compares equal to the tag string.
+    The tags of short values are cached, and the functions are shared between resolvers
+    with the same implicit resolvers.
+    """
+    key = tuple((ch, tuple(lst)) for ch, lst in resolvers.items())
+    try:
+        return _implicit_matchers[key]
+    except KeyError:
+        pass
+    generic = resolvers.get(None, [])
+    by_first = {ch: _regexp_matcher(lst + generic) for ch, lst in resolvers.items()}
+    default = _regexp_matcher(generic)
+
+    def match(value: Text) -> Any:
+        tag = by_first.get(value[:1], default)(value)
+        return None if tag is None else intern_tag(tag)
+
+    cached = functools.lru_cache(maxsize=IMPLICIT_CACHE_SIZE)(match)
+
+    def matcher(value: Text) -> Any:
+        if len(value) > IMPLICIT_CACHE_MAX_LENGTH:
+            return match(value)
+        return cached(value)
+
+    if len(_implicit_matchers) > 64:
+        _implicit_matchers.clear()
+    _implicit_matchers[key] = matcher
+    return matcher
+
+
+# incremented whenever a path resolver is added to a resolver class
+_path_resolvers_changed = 0
+
+# the index checks of path resolver elements, other than a key string or sequence index
+# (objects, so they differ from any key string)
+_MAPPING_KEY = object()
+_ANY_VALUE = object()
+
+
+class PathResolverTrie:
+    """
+    a node in the trie of the path resolvers of a resolver class, for the paths that
+    start with the same elements. Each element leads to a child by a (node check, index
+    check) pair: the node check is None, the .id of the parent node ('sequence',
+    'mapping') or a (tag,) tuple, the index check _MAPPING_KEY, _ANY_VALUE, a key string
+    or a sequence index.
+    """
+
+    __slots__ = 'children', 'exact', 'tagged'
+
+    def __init__(self) -> None:
+        self.children: Dict[Any, Dict[Any, PathResolverTrie]] = {}
+        self.exact: Dict[Any, Any] = {}  # node kind -> (position, tag) of a path ending here
+        self.tagged = False  # any of the children checks the tag of the parent node
+
+    def child(self, node_check: Any, index_check: Any) -> PathResolverTrie:
+        if isinstance(node_check, str):
+            node_check = (node_check,)
+            self.tagged = True
+        elif node_check is not None:
+            node_check = node_check.id
+        if index_check is True:
+            index_check = _MAPPING_KEY
+        elif index_check is None or index_check is False:
+            index_check = _ANY_VALUE
+        children = self.children.setdefault(node_check, {})
+        trie = children.get(index_check)
+        if trie is None:
+            trie = children[index_check] = PathResolverTrie()
+        return trie
+
+    def descend(self, current_node: Any, index_checks: Any, tries: List[Any]) -> None:
+        """append the children for a node in current_node with the given index checks"""
+        children = self.children
+        if self.tagged:
+            node_checks: Any = (None, current_node.id, (current_node.tag,))
+        else:
+            node_checks = (None, current_node.id)
+        for node_check in node_checks:
+            by_index = children.get(node_check)
+            if by_index is not None:
+                for index_check in index_checks:
+                    trie = by_index.get(index_check)
+                    if trie is not None:
+                        tries.append(trie)
+
+
+def path_resolver_trie(path_resolvers: Dict[Any, Any]) -> PathResolverTrie:
+    """
+    compile a dict of path resolvers, {(path, kind): tag}, into a trie. When several
+    paths match a node, the tag of the one added last is used for each kind.
+    """
+    root = PathResolverTrie()
+    for position, ((path, kind), tag) in enumerate(path_resolvers.items()):
+        trie = root
+        for node_check, index_check in path:
+            trie = trie.child(node_check, index_check)
+        trie.exact[kind] = (position, tag)
+    return root
+
+
 class BaseResolver:
 
-    DEFAULT_SCALAR_TAG = Tag(suffix='tag:yaml.org,2002:str')
-    DEFAULT_SEQUENCE_TAG = Tag(suffix='tag:yaml.org,2002:seq')
-    DEFAULT_MAPPING_TAG = Tag(suffix='tag:yaml.org,2002:map')
+    DEFAULT_SCALAR_TAG = intern_tag('tag:yaml.org,2002:str')
+    DEFAULT_SEQUENCE_TAG = intern_tag('tag:yaml.org,2002:seq')
+    DEFAULT_MAPPING_TAG = intern_tag('tag:yaml.org,2002:map')
 
     yaml_implicit_resolvers: Dict[Any, Any] = {}
     yaml_path_resolvers: Dict[Any, Any] = {}
@@ -117,8 +291,15 @@ class BaseResolver:
         if self.loadumper is not None and getattr(self.loadumper, '_resolver', None) is None:
             self.loadumper._resolver = self.loadumper
         self._loader_version: Any = None
+        # per level of the nodes with a path resolver for their subtree: the path resolvers
+        # ending at, and the tries for the paths going through, the node
         self.resolver_exact_paths: List[Any] = []
         self.resolver_prefix_paths: List[Any] = []
+        self._path_trie: Any = None
+        self._path_trie_changed = -1
+        self._path_skip = 0  # depth in a subtree without path resolvers
+        self._implicit_matcher: Any = None
+        self._implicit_matcher_changed = -1
 
     @property
     def parser(self) -> Any:
@@ -130,6 +311,8 @@ class BaseResolver:
 
     @classmethod
     def add_implicit_resolver_base(cls, tag: Any, regexp: Any, first: Any) -> None:
+        global _implicit_resolvers_changed
+        _implicit_resolvers_changed += 1
         if 'yaml_implicit_resolvers' not in cls.__dict__:
             # deepcopy doesn't work here
             cls.yaml_implicit_resolvers = {
@@ -142,6 +325,8 @@ class BaseResolver:
 
     @classmethod
     def add_implicit_resolver(cls, tag: Any, regexp: Any, first: Any) -> None:
+        global _implicit_resolvers_changed
+        _implicit_resolvers_changed += 1
         if 'yaml_implicit_resolvers' not in cls.__dict__:
             # deepcopy doesn't work here
             cls.yaml_implicit_resolvers = {
@@ -170,6 +355,7 @@ class BaseResolver:
         # a mapping value that corresponds to a scalar key which content is
         # equal to the `index_check` value.  An integer `index_check` matches
         # against a sequence value with the index equal to `index_check`.
+        global _path_resolvers_changed
         if 'yaml_path_resolvers' not in cls.__dict__:
             cls.yaml_path_resolvers = cls.yaml_path_resolvers.copy()
         new_path: List[Any] = []
@@ -208,77 +394,88 @@ class BaseResolver:
             kind = MappingNode
         elif kind not in [ScalarNode, SequenceNode, MappingNode] and kind is not None:
             raise ResolverError(f'Invalid node kind: {kind!s}')
+        _path_resolvers_changed += 1
         cls.yaml_path_resolvers[tuple(new_path), kind] = tag
 
     def descend_resolver(self, current_node: Any, current_index: Any) -> None:
+        """
+        called before a node is composed or serialized, with its parent node (None for the
+        root) and index in that: None for a mapping key, the key node for a mapping value,
+        the position for a sequence item
+        """
         if not self.yaml_path_resolvers:
             return
-        exact_paths = {}
-        prefix_paths = []
-        if current_node:
-            depth = len(self.resolver_prefix_paths)
-            for path, kind in self.resolver_prefix_paths[-1]:
-                if self.check_resolver_prefix(depth, path, kind, current_node, current_index):
-                    if len(path) > depth:
-                        prefix_paths.append((path, kind))
-                    else:
-                        exact_paths[kind] = self.yaml_path_resolvers[path, kind]
+        if not current_node:
+            if self._path_trie_changed != _path_resolvers_changed:
+                self._path_trie = path_resolver_trie(self.yaml_path_resolvers)
+                self._path_trie_changed = _path_resolvers_changed
+            self._path_skip = 0
+            tries = [self._path_trie]
+        elif self._path_skip:
+            # no path resolver for the parent's subtree
+            self._path_skip += 1
+            return
         else:
-            for path, kind in self.yaml_path_resolvers:
-                if not path:
-                    exact_paths[kind] = self.yaml_path_resolvers[path, kind]
-                else:
-                    prefix_paths.append((path, kind))
+            if current_index is None:
+                index_checks: Any = (_MAPPING_KEY,)
+            elif isinstance(current_index, int):
+                index_checks = (_ANY_VALUE, current_index)
+            elif isinstance(current_index, ScalarNode):
+                index_checks = (_ANY_VALUE, current_index.value)
+            else:
+                index_checks = (_ANY_VALUE,)
+            tries = []
+            for trie in self.resolver_prefix_paths[-1]:
+                trie.descend(current_node, index_checks, tries)
+            if not tries:
+                self._path_skip = 1
+                return
+        if len(tries) == 1:
+            exact_paths = tries[0].exact
+        else:
+            exact_paths = {}
+            for trie in tries:
+                for kind, (position, tag) in trie.exact.items():
+                    if kind not in exact_paths or position > exact_paths[kind][0]:
+                        exact_paths[kind] = (position, tag)
         self.resolver_exact_paths.append(exact_paths)
-        self.resolver_prefix_paths.append(prefix_paths)
+        self.resolver_prefix_paths.append(tries)
 
     def ascend_resolver(self) -> None:
         if not self.yaml_path_resolvers:
             return
+        if self._path_skip:
+            self._path_skip -= 1
+            return
         self.resolver_exact_paths.pop()
         self.resolver_prefix_paths.pop()
 
-    def check_resolver_prefix(
-        self, depth: int, path: Any, kind: Any, current_node: Any, current_index: Any,
-    ) -> bool:
-        node_check, index_check = path[depth - 1]
-        if isinstance(node_check, str):
-            if current_node.tag != node_check:
-                return False
-        elif node_check is not None:
-            if not isinstance(current_node, node_check):
-                return False
-        if index_check is True and current_index is not None:
-            return False
-        if (index_check is False or index_check is None) and current_index is None:
-            return False
-        if isinstance(index_check, str):
-            if not (
-                isinstance(current_index, ScalarNode) and index_check == current_index.value
-            ):
-                return False
-        elif isinstance(index_check, int) and not isinstance(index_check, bool):
-            if index_check != current_index:
-                return False
-        return True
+    def exact_path_tag(self, kind: Any) -> Any:
+        """the tag of a path resolver for the current node, if any, else None"""
+        if self._path_skip:
+            return None
+        exact_paths = self.resolver_exact_paths[-1]
+        if kind in exact_paths:
+            return intern_tag(exact_paths[kind][1])
+        if None in exact_paths:
+            return intern_tag(exact_paths[None][1])
+        return None
 
     def resolve(self, kind: Any, value: Any, implicit: Any) -> Any:
         if kind is ScalarNode and implicit[0]:
-            if value == "":
-                resolvers = self.yaml_implicit_resolvers.get("", [])
-            else:
-                resolvers = self.yaml_implicit_resolvers.get(value[0], [])
-            resolvers += self.yaml_implicit_resolvers.get(None, [])
-            for tag, regexp in resolvers:
-                if regexp.match(value):
-                    return Tag(suffix=tag)
+            if self._implicit_matcher_changed != _implicit_resolvers_changed:
+                self._implicit_matcher = implicit_resolver_matcher(
+                    self.yaml_implicit_resolvers,
+                )
+                self._implicit_matcher_changed = _implicit_resolvers_changed
+            tag = self._implicit_matcher(value)
+            if tag is not None:
+                return tag
             implicit = implicit[1]
         if bool(self.yaml_path_resolvers):
-            exact_paths = self.resolver_exact_paths[-1]
-            if kind in exact_paths:
-                return Tag(suffix=exact_paths[kind])
-            if None in exact_paths:
-                return Tag(suffix=exact_paths[None])
+            tag = self.exact_path_tag(kind)
+            if tag is not None:
+                return tag
         if kind is ScalarNode:
             return self.DEFAULT_SCALAR_TAG
         elif kind is SequenceNode:
@@ -290,6 +487,10 @@ class BaseResolver:
     def processing_version(self) -> Any:
         return None
 
+    def reset_processing_version(self, document: bool = False) -> None:
+        # nothing cached, as the version doesn't matter
+        pass
+
 
 class Resolver(BaseResolver):
     pass
@@ -316,6 +517,10 @@ class VersionedResolver(BaseResolver):
         BaseResolver.__init__(self, loader)
         self._loader_version = self.get_loader_version(version)
         self._version_implicit_resolver: Dict[Any, Any] = {}
+        self._version_implicit_matcher: Dict[Any, Any] = {}
+        # determined once per document, see reset_processing_version()
+        self._processing_version: Any = None
+        self._versioned_matcher: Any = None
 
     def add_version_implicit_resolver(
         self, version: VersionType, tag: Any, regexp: Any, first: Any,
@@ -323,6 +528,8 @@ class VersionedResolver(BaseResolver):
         if first is None:
             first = [None]
         impl_resolver = self._version_implicit_resolver.setdefault(version, {})
+        self._version_implicit_matcher.pop(version, None)
+        self._versioned_matcher = None
         for ch in first:
             impl_resolver.setdefault(ch, []).append((tag, regexp))
 
@@ -343,29 +550,43 @@ class VersionedResolver(BaseResolver):
         version = self.processing_version
         if isinstance(version, str):
             version = tuple(map(int, version.split('.')))
+        return self.version_resolver(version)
+
+    def version_resolver(self, version: Any) -> Any:
         if version not in self._version_implicit_resolver:
             for x in implicit_resolvers:
                 if version in x[0]:
                     self.add_version_implicit_resolver(version, x[1], x[2], x[3])
         return self._version_implicit_resolver[version]
 
+    @property
+    def versioned_matcher(self) -> Any:
+        """
+        the function giving the implicit tag of a value for the version we are parsing
+        """
+        if self._versioned_matcher is not None:
+            return self._versioned_matcher
+        version = self.processing_version
+        if isinstance(version, str):
+            version = tuple(map(int, version.split('.')))
+        matcher = self._version_implicit_matcher.get(version)
+        if matcher is None:
+            matcher = self._version_implicit_matcher[version] = implicit_resolver_matcher(
+                self.version_resolver(version),
+            )
+        self._versioned_matcher = matcher
+        return matcher
+
     def resolve(self, kind: Any, value: Any, implicit: Any) -> Any:
         if kind is ScalarNode and implicit[0]:
-            if value == "":
-                resolvers = self.versioned_resolver.get("", [])
-            else:
-                resolvers = self.versioned_resolver.get(value[0], [])
-            resolvers += self.versioned_resolver.get(None, [])
-            for tag, regexp in resolvers:
-                if regexp.match(value):
-                    return Tag(suffix=tag)
+            tag = self.versioned_matcher(value)
+            if tag is not None:
+                return tag
             implicit = implicit[1]
         if bool(self.yaml_path_resolvers):
-            exact_paths = self.resolver_exact_paths[-1]
-            if kind in exact_paths:
-                return Tag(suffix=exact_paths[kind])
-            if None in exact_paths:
-                return Tag(suffix=exact_paths[None])
+            tag = self.exact_path_tag(kind)
+            if tag is not None:
+                return tag
         if kind is ScalarNode:
             return self.DEFAULT_SCALAR_TAG
         elif kind is SequenceNode:
@@ -375,6 +596,20 @@ class VersionedResolver(BaseResolver):
 
     @property
     def processing_version(self) -> Any:
+        if self._processing_version is None:
+            self._processing_version = self.get_processing_version()
+        return self._processing_version
+
+    def reset_processing_version(self, document: bool = False) -> None:
+        """
+        Determine the version again the next time it is needed, or right away at the start
+        of a document (as the scanner may read the %YAML directive of the next document
+        before everything in this one is constructed).
+        """
+        self._versioned_matcher = None
+        self._processing_version = self.get_processing_version() if document else None
+
+    def get_processing_version(self) -> Any:
         try:
             version = self.loadumper._scanner.yaml_version
         except AttributeError:
@@ -29,13 +29,16 @@ from __future__ import annotations
 # Read comments in the Scanner code for more details.
 #
 
+import re
+from collections import deque
+
 from ruamel.yaml.error import MarkedYAMLError
 import ruamel.yaml.tokens as tokens
 from ruamel.yaml.docinfo import Version  # NOQA
 from ruamel.yaml.compat import check_anchorname_char, _debug, nprint, nprintf  # NOQA
 
 if False:  # MYPY
-    from typing import Any, Dict, Optional, List, Union, Text, Tuple  # NOQA
+    from typing import Any, Deque, Dict, Optional, List, Union, Text, Tuple  # NOQA
 
 __all__ = ['Scanner', 'RoundTripScanner', 'ScannerError']
 
@@ -44,6 +47,35 @@ _THE_END = '\n\0\r\x85\u2028\u2029'
 _THE_END_SPACE_TAB = ' \n\0\t\r\x85\u2028\u2029'
 _SPACE_TAB = ' \t'
 
+# The regexes used while scanning are compiled on import, the attribute access through
+# util.LazyEval (RegExp) costs about as much as matching the typical short runs.
+
+# the longest run of characters that can continue a plain scalar on the current line,
+# a ':' only when followed by a non-space. In the flow context ',[]{}' end the run, as
+# does '?' for YAML 1.1
+_PLAIN_BLOCK = re.compile(
+    '(?:[^: \n\0\t\r\x85\u2028\u2029]|:(?=[^ \n\0\t\r\x85\u2028\u2029]))*'
+)
+_PLAIN_FLOW = re.compile(
+    '(?:[^:,\\[\\]{} \n\0\t\r\x85\u2028\u2029]|:(?=[^ \n\0\t\r\x85\u2028\u2029]))*'
+)
+_PLAIN_FLOW_1_1 = re.compile(
+    '(?:[^:?,\\[\\]{} \n\0\t\r\x85\u2028\u2029]|:(?=[^ \n\0\t\r\x85\u2028\u2029]))*'
+)
+# the characters of a quoted scalar that are taken over as is, up to the closing quote,
+# an escape, or a line break. Spaces and tabs only when not followed by a line break, as
+# those are folded
+_DOUBLE_QUOTED_RUN = re.compile(
+    '(?:[^"\\\\ \n\0\t\r\x85\u2028\u2029]|[ \t]+(?=[^ \t\n\0\r\x85\u2028\u2029]))*'
+)
+_SINGLE_QUOTED_RUN = re.compile(
+    "(?:[^' \n\0\t\r\x85\u2028\u2029]|[ \t]+(?=[^ \t\n\0\r\x85\u2028\u2029]))*"
+)
+_HEX_DIGITS = re.compile('[0-9A-Fa-f]*')
+_LINE_END = re.compile('[\0\r\n\x85\u2028\u2029]')
+# consecutive line breaks, and the same including spaces and tabs (empty lines)
+_LINE_BREAKS = re.compile('[\r\n\x85\u2028\u2029]*')
+_EMPTY_LINES = re.compile('[ \t\r\n\x85\u2028\u2029]*')
 
 if _debug != 0:
     def xprintf(*args: Any, **kw: Any) -> Any:
@@ -56,6 +88,7 @@ class ScannerError(MarkedYAMLError):
 
 class SimpleKey:
     # See below simple keys treatment.
+    __slots__ = 'token_number', 'required', 'index', 'line', 'column', 'mark'
 
     def __init__(
         self, token_number: Any, required: Any, index: int, line: int, column: int, mark: Any,
@@ -86,6 +119,52 @@ class Scanner:
         self.reset_scanner()
         self.first_time = False
 
+    # Maps the first character of a token to a sequence of (check, fetch) method names,
+    # a check of None always succeeds. Characters for which no check succeeds start a
+    # plain scalar. Subclasses can extend this (e.g. `{**Scanner.fetch_table, ...}`), the
+    # methods are looked up once per class in _fetch_dispatch.
+    fetch_table: Dict[Text, Tuple[Tuple[Optional[Text], Text], ...]] = {
+        '\0': ((None, 'fetch_stream_end'),),
+        '%': (('check_directive', 'fetch_directive'),),
+        '-': (
+            ('check_document_start', 'fetch_document_start'),
+            ('check_block_entry', 'fetch_block_entry'),
+        ),
+        '.': (('check_document_end', 'fetch_document_end'),),
+        # TODO: support for BOM within a stream.
+        # '\uFEFF': ((None, 'fetch_bom'),),    <-- issue BOMToken
+        '[': ((None, 'fetch_flow_sequence_start'),),
+        '{': ((None, 'fetch_flow_mapping_start'),),
+        ']': ((None, 'fetch_flow_sequence_end'),),
+        '}': ((None, 'fetch_flow_mapping_end'),),
+        ',': ((None, 'fetch_flow_entry'),),
+        '?': (('check_key', 'fetch_key'),),
+        ':': (('check_value', 'fetch_value'),),
+        '*': ((None, 'fetch_alias'),),
+        '&': ((None, 'fetch_anchor'),),
+        '!': ((None, 'fetch_tag'),),
+        '|': (('check_block_scalar', 'fetch_literal'),),
+        '>': (('check_block_scalar', 'fetch_folded'),),
+        "'": ((None, 'fetch_single'),),
+        '"': ((None, 'fetch_double'),),
+    }
+
+    _fetch_dispatch: Dict[Text, Tuple[Tuple[Any, Any], ...]] = {}
+
+    def __init_subclass__(cls, **kw: Any) -> None:
+        super().__init_subclass__(**kw)
+        cls._fetch_dispatch = cls.build_fetch_dispatch()
+
+    @classmethod
+    def build_fetch_dispatch(cls) -> Dict[Text, Tuple[Tuple[Any, Any], ...]]:
+        return {
+            ch: tuple(
+                (None if check is None else getattr(cls, check), getattr(cls, fetch))
+                for check, fetch in entries
+            )
+            for ch, entries in cls.fetch_table.items()
+        }
+
     @property
     def flow_level(self) -> int:
         return len(self.flow_context)
@@ -98,8 +177,8 @@ class Scanner:
         # for each unclosed flow context. If empty list that means block context
         self.flow_context: List[Text] = []
 
-        # List of processed tokens that are not yet emitted.
-        self.tokens: List[Any] = []
+        # Queue of processed tokens that are not yet emitted.
+        self.tokens: Deque[Any] = deque()
 
         # Add the STREAM-START token.
         self.fetch_stream_start()
@@ -143,6 +222,7 @@ class Scanner:
         # '[', or '{' tokens.
         self.possible_simple_keys: Dict[Any, Any] = {}
         self.yaml_version: Any = None
+        self.scanner_reset_processing_version()
         self.tag_directives: List[Tuple[Any, Any]] = []
 
     @property
@@ -162,6 +242,15 @@ class Scanner:
             return self.loader.resolver.processing_version
         return self.loader.processing_version
 
+    def scanner_reset_processing_version(self) -> None:
+        # the resolver caches the version, that depends on the %YAML directive read
+        if hasattr(self.loader, 'typ'):
+            resolver = getattr(self.loader, '_resolver', None)
+        else:
+            resolver = self.loader
+        if hasattr(resolver, 'reset_processing_version'):
+            resolver.reset_processing_version()
+
     # Public methods.
 
     def check_token(self, *choices: Any) -> bool:
@@ -189,7 +278,7 @@ class Scanner:
             self.fetch_more_tokens()
         if len(self.tokens) > 0:
             self.tokens_taken += 1
-            return self.tokens.pop(0)
+            return self.tokens.popleft()
 
     # Private methods.
 
@@ -220,90 +309,14 @@ class Scanner:
         # and decrease the current indentation level.
         self.unwind_indent(self.reader.column)
 
-        # Peek the next character.
+        # Peek the next character and look up what token it could start, the
+        # first check that succeeds determines which token gets fetched.
+        # Note: the order of the entries for the different characters is NOT
+        # significant.
         ch = self.reader.peek()
-
-        # Is it the end of stream?
-        if ch == '\0':
-            return self.fetch_stream_end()
-
-        # Is it a directive?
-        if ch == '%' and self.check_directive():
-            return self.fetch_directive()
-
-        # Is it the document start?
-        if ch == '-' and self.check_document_start():
-            return self.fetch_document_start()
-
-        # Is it the document end?
-        if ch == '.' and self.check_document_end():
-            return self.fetch_document_end()
-
-        # TODO: support for BOM within a stream.
-        # if ch == '\uFEFF':
-        #     return self.fetch_bom()    <-- issue BOMToken
-
-        # Note: the order of the following checks is NOT significant.
-
-        # Is it the flow sequence start indicator?
-        if ch == '[':
-            return self.fetch_flow_sequence_start()
-
-        # Is it the flow mapping start indicator?
-        if ch == '{':
-            return self.fetch_flow_mapping_start()
-
-        # Is it the flow sequence end indicator?
-        if ch == ']':
-            return self.fetch_flow_sequence_end()
-
-        # Is it the flow mapping end indicator?
-        if ch == '}':
-            return self.fetch_flow_mapping_end()
-
-        # Is it the flow entry indicator?
-        if ch == ',':
-            return self.fetch_flow_entry()
-
-        # Is it the block entry indicator?
-        if ch == '-' and self.check_block_entry():
-            return self.fetch_block_entry()
-
-        # Is it the key indicator?
-        if ch == '?' and self.check_key():
-            return self.fetch_key()
-
-        # Is it the value indicator?
-        if ch == ':' and self.check_value():
-            return self.fetch_value()
-
-        # Is it an alias?
-        if ch == '*':
-            return self.fetch_alias()
-
-        # Is it an anchor?
-        if ch == '&':
-            return self.fetch_anchor()
-
-        # Is it a tag?
-        if ch == '!':
-            return self.fetch_tag()
-
-        # Is it a literal scalar?
-        if ch == '|' and not self.flow_level:
-            return self.fetch_literal()
-
-        # Is it a folded scalar?
-        if ch == '>' and not self.flow_level:
-            return self.fetch_folded()
-
-        # Is it a single quoted scalar?
-        if ch == "'":
-            return self.fetch_single()
-
-        # Is it a double quoted scalar?
-        if ch == '"':
-            return self.fetch_double()
+        for check, fetch in self._fetch_dispatch.get(ch, ()):
+            if check is None or check(self):
+                return fetch(self)
 
         # It must be a plain scalar then.
         if self.check_plain():
@@ -320,19 +333,13 @@ class Scanner:
     # Simple keys treatment.
 
     def next_possible_simple_key(self) -> Any:
-        # Return the number of the nearest possible simple key. Actually we
-        # don't need to loop through the whole dictionary. We may replace it
-        # with the following code:
-        #   if not self.possible_simple_keys:
-        #       return None
-        #   return self.possible_simple_keys[
-        #           min(self.possible_simple_keys.keys())].token_number
-        min_token_number = None
-        for level in self.possible_simple_keys:
-            key = self.possible_simple_keys[level]
-            if min_token_number is None or key.token_number < min_token_number:
-                min_token_number = key.token_number
-        return min_token_number
+        # Return the number of the nearest possible simple key. A key can only be
+        # saved at the current flow level and the keys at deeper levels are removed
+        # when leaving those, so the keys in possible_simple_keys are in order of
+        # increasing flow level, and token number; the first key is the nearest.
+        for key in self.possible_simple_keys.values():
+            return key.token_number
+        return None
 
     def stale_possible_simple_keys(self) -> None:
         # Remove entries that are no longer possible simple keys. According to
@@ -341,17 +348,22 @@ class Scanner:
         # - should be no longer than 1024 characters.
         # Disabling this procedure will allow simple keys of any length and
         # height (may cause problems if indentation is broken though).
-        for level in list(self.possible_simple_keys):
-            key = self.possible_simple_keys[level]
-            if key.line != self.reader.line or self.reader.index - key.index > 1024:
-                if key.required:
-                    raise ScannerError(
-                        'while scanning a simple key',
-                        key.mark,
-                        "could not find expected ':'",
-                        self.reader.get_mark(),
-                    )
-                del self.possible_simple_keys[level]
+        # As the keys are in order of their position in the stream, the stale keys
+        # are all at the start of possible_simple_keys.
+        possible_simple_keys = self.possible_simple_keys
+        while possible_simple_keys:
+            level = next(iter(possible_simple_keys))
+            key = possible_simple_keys[level]
+            if key.line == self.reader.line and self.reader.index - key.index <= 1024:
+                break
+            if key.required:
+                raise ScannerError(
+                    'while scanning a simple key',
+                    key.mark,
+                    "could not find expected ':'",
+                    self.reader.get_mark(),
+                )
+            del possible_simple_keys[level]
 
     def save_possible_simple_key(self) -> None:
         # The next token may start a simple key. We check if it's possible
@@ -766,6 +778,10 @@ class Scanner:
         # VALUE(block context): ':' (' '|'\n')
         return self.reader.peek(1) in _THE_END_SPACE_TAB
 
+    def check_block_scalar(self) -> Any:
+        # LITERAL or FOLDED:  '|' or '>' (block context only)
+        return not self.flow_level
+
     def check_plain(self) -> Any:
         # A plain scalar may start with any non-space character except:
         #   '-', '?', ':', ',', '[', ']', '{', '}',
@@ -1133,14 +1149,52 @@ class Scanner:
             indent = min_indent + increment - 1
             breaks, end_mark = self.scan_block_scalar_breaks(indent)
         line_break = ""
+        reader = self.reader
+        # lines followed by a '\n' and the indentation of a next, non-empty, line
+        # are handled in bulk, unless document markers need to be checked for
+        bulk = min_indent != 0
+        next_line = '\n' + ' ' * indent
 
         # Scan the inner part of the block scalar.
         while self.reader.column == indent and srp() != '\0':
             chunks.extend(breaks)
             leading_non_space = srp() not in ' \t'
-            length = 0
-            while srp(length) not in _THE_END:
-                length += 1
+            if bulk:
+                buffer = reader.buffer
+                pointer = start = reader.pointer
+                while True:
+                    match = _LINE_END.search(buffer, pointer)
+                    if match is None:
+                        break
+                    pos = match.start()
+                    nxt = pos + len(next_line)
+                    if (
+                        nxt >= len(buffer)
+                        or not buffer.startswith(next_line, pos)
+                        or buffer[nxt] in _THE_END
+                    ):
+                        break
+                    # same as the per line processing below, with line_break '\n'
+                    # and no breaks
+                    chunks.append(buffer[pointer:pos])
+                    ch = buffer[nxt]
+                    if rt and folded:
+                        chunks.append('\a')
+                    if folded and leading_non_space and ch not in ' \t':
+                        chunks.append(' ')
+                    else:
+                        chunks.append('\n')
+                    leading_non_space = ch not in ' \t'
+                    pointer = nxt
+                if pointer != start:
+                    reader.forward(pointer - start)
+            match = _LINE_END.search(reader.buffer, reader.pointer)
+            if match is not None:
+                length = match.start() - reader.pointer
+            else:
+                length = 0
+                while srp(length) not in _THE_END:
+                    length += 1
             chunks.append(self.reader.prefix(length))
             self.reader.forward(length)
             line_break = self.scan_line_break()
@@ -1325,17 +1379,20 @@ class Scanner:
         # See the specification for details.
         chunks = []
         srp = self.reader.peek
-        srf = self.reader.forward
         end_mark = self.reader.get_mark()
-        while self.reader.column < indent and srp() == ' ':
-            srf()
+        self.skip_block_scalar_indent(indent)
         while srp() in '\r\n\x85\u2028\u2029':
             chunks.append(self.scan_line_break())
             end_mark = self.reader.get_mark()
-            while self.reader.column < indent and srp() == ' ':
-                srf()
+            self.skip_block_scalar_indent(indent)
         return chunks, end_mark
 
+    def skip_block_scalar_indent(self, indent: int) -> None:
+        # move forward over spaces, up to column indent
+        if self.reader.column < indent:
+            text = self.reader.prefix(indent - self.reader.column)
+            self.reader.forward(len(text) - len(text.lstrip(' ')))
+
     def scan_flow_scalar(self, style: Any) -> Any:
         # See the specification for details.
         # Note that we loose indentation rules for quoted scalars. Quoted
@@ -1388,10 +1445,15 @@ class Scanner:
         chunks: List[Any] = []
         srp = self.reader.peek
         srf = self.reader.forward
+        reader = self.reader
+        run = _DOUBLE_QUOTED_RUN if double else _SINGLE_QUOTED_RUN
         while True:
-            length = 0
-            while srp(length) not in ' \n\'"\\\0\t\r\x85\u2028\u2029':
-                length += 1
+            match = run.match(reader.buffer, reader.pointer)
+            length = match.end() - reader.pointer
+            if match.end() >= len(reader.buffer):
+                # the run might continue beyond the data read so far
+                while srp(length) not in ' \n\'"\\\0\t\r\x85\u2028\u2029':
+                    length += 1
             if length != 0:
                 chunks.append(self.reader.prefix(length))
                 srf(length)
@@ -1411,16 +1473,17 @@ class Scanner:
                 elif ch in self.ESCAPE_CODES:
                     length = self.ESCAPE_CODES[ch]
                     srf()
-                    for k in range(length):
-                        if srp(k) not in '0123456789ABCDEFabcdef':
-                            raise ScannerError(
-                                'while scanning a double-quoted scalar',
-                                start_mark,
-                                f'expected escape sequence of {length:d} '
-                                f'hexdecimal numbers, but found {srp(k)!r}',
-                                self.reader.get_mark(),
-                            )
-                    code = int(self.reader.prefix(length), 16)
+                    digits = self.reader.prefix(length)
+                    k = _HEX_DIGITS.match(digits).end()
+                    if k < length:
+                        raise ScannerError(
+                            'while scanning a double-quoted scalar',
+                            start_mark,
+                            f'expected escape sequence of {length:d} '
+                            f'hexdecimal numbers, but found {srp(k)!r}',
+                            self.reader.get_mark(),
+                        )
+                    code = int(digits, 16)
                     chunks.append(chr(code))
                     srf(length)
                 elif ch in '\n\r\x85\u2028\u2029':
@@ -1505,29 +1568,40 @@ class Scanner:
         # if indent == 0:
         #     indent = 1
         spaces: List[Any] = []
+        if not self.flow_level:
+            plain_run = _PLAIN_BLOCK
+        elif self.scanner_processing_version == (1, 1):
+            plain_run = _PLAIN_FLOW_1_1
+        else:
+            plain_run = _PLAIN_FLOW
+        reader = self.reader
         while True:
-            length = 0
             if srp() == '#':
                 break
-            while True:
-                ch = srp(length)
-                if False and ch == ':' and srp(length + 1) == ',':
-                    break
-                elif ch == ':' and srp(length + 1) not in _THE_END_SPACE_TAB:
-                    pass
-                elif ch == '?' and self.scanner_processing_version != (1, 1):
-                    pass
-                elif (
-                    ch in _THE_END_SPACE_TAB
-                    or (
-                        not self.flow_level
-                        and ch == ':'
-                        and srp(length + 1) in _THE_END_SPACE_TAB
-                    )
-                    or (self.flow_level and ch in ',:?[]{}')
-                ):
-                    break
-                length += 1
+            match = plain_run.match(reader.buffer, reader.pointer)
+            length = match.end() - reader.pointer
+            if match.end() + 1 < len(reader.buffer):
+                ch = reader.buffer[match.end()]
+            else:
+                # the run might continue beyond the data read so far, check
+                # character by character, from where the match ended
+                while True:
+                    ch = srp(length)
+                    if ch == ':' and srp(length + 1) not in _THE_END_SPACE_TAB:
+                        pass
+                    elif ch == '?' and self.scanner_processing_version != (1, 1):
+                        pass
+                    elif (
+                        ch in _THE_END_SPACE_TAB
+                        or (
+                            not self.flow_level
+                            and ch == ':'
+                            and srp(length + 1) in _THE_END_SPACE_TAB
+                        )
+                        or (self.flow_level and ch in ',:?[]{}')
+                    ):
+                        break
+                    length += 1
             # It's not clear what we should do with ':' in the flow context.
             if (
                 self.flow_level
@@ -1729,6 +1803,9 @@ class Scanner:
         return ""
 
 
+Scanner._fetch_dispatch = Scanner.build_fetch_dispatch()
+
+
 class RoundTripScanner(Scanner):
     def check_token(self, *choices: Any) -> bool:
         # Check if the next token is one of the given types.
@@ -1757,20 +1834,21 @@ class RoundTripScanner(Scanner):
         comments: List[Any] = []
         if not self.tokens:
             return comments
+        # the callers have just fetched tokens until no more were needed, so there is
+        # only something to gather if the first token is a comment
         if isinstance(self.tokens[0], tokens.CommentToken):
-            comment = self.tokens.pop(0)
+            comment = self.tokens.popleft()
             self.tokens_taken += 1
             comments.append(comment)
-        while self.need_more_tokens():
-            self.fetch_more_tokens()
-            if not self.tokens:
-                return comments
-            if isinstance(self.tokens[0], tokens.CommentToken):
-                self.tokens_taken += 1
-                comment = self.tokens.pop(0)
-                # nprint('dropping2', comment)
-                comments.append(comment)
-        if len(comments) >= 1:
+            while self.need_more_tokens():
+                self.fetch_more_tokens()
+                if not self.tokens:
+                    return comments
+                if isinstance(self.tokens[0], tokens.CommentToken):
+                    self.tokens_taken += 1
+                    comment = self.tokens.popleft()
+                    # nprint('dropping2', comment)
+                    comments.append(comment)
             self.tokens[0].add_pre_comments(comments)
         # pull in post comment on e.g. ':'
         if not self.done and len(self.tokens) < 2:
@@ -1798,13 +1876,10 @@ class RoundTripScanner(Scanner):
                 and self.tokens[0].end_mark.line == self.tokens[1].start_mark.line
             ):
                 self.tokens_taken += 1
-                c = self.tokens.pop(1)
+                c = self.tokens[1]
+                del self.tokens[1]
                 self.fetch_more_tokens()
-                while len(self.tokens) > 1 and isinstance(self.tokens[1], tokens.CommentToken):
-                    self.tokens_taken += 1
-                    c1 = self.tokens.pop(1)
-                    c.value = c.value + (' ' * c1.start_mark.column) + c1.value
-                    self.fetch_more_tokens()
+                c.value = ''.join(self._gather_post_comments([c.value]))
                 self.tokens[0].add_post_comment(c)
             elif (
                 len(self.tokens) > 1
@@ -1813,23 +1888,32 @@ class RoundTripScanner(Scanner):
                 and self.tokens[0].end_mark.line != self.tokens[1].start_mark.line
             ):
                 self.tokens_taken += 1
-                c = self.tokens.pop(1)
-                c.value = (
+                c = self.tokens[1]
+                del self.tokens[1]
+                value = (
                     '\n' * (c.start_mark.line - self.tokens[0].end_mark.line)
                     + (' ' * c.start_mark.column)
                     + c.value
                 )
                 self.tokens[0].add_post_comment(c)
                 self.fetch_more_tokens()
-                while len(self.tokens) > 1 and isinstance(self.tokens[1], tokens.CommentToken):
-                    self.tokens_taken += 1
-                    c1 = self.tokens.pop(1)
-                    c.value = c.value + (' ' * c1.start_mark.column) + c1.value
-                    self.fetch_more_tokens()
+                c.value = ''.join(self._gather_post_comments([value]))
             self.tokens_taken += 1
-            return self.tokens.pop(0)
+            return self.tokens.popleft()
         return None
 
+    def _gather_post_comments(self, values: List[Text]) -> List[Text]:
+        # append the values of the comments directly following the first token, each
+        # indented to its column, to values (joined once by the caller)
+        while len(self.tokens) > 1 and isinstance(self.tokens[1], tokens.CommentToken):
+            self.tokens_taken += 1
+            c1 = self.tokens[1]
+            del self.tokens[1]
+            values.append(' ' * c1.start_mark.column)
+            values.append(c1.value)
+            self.fetch_more_tokens()
+        return values
+
     def fetch_comment(self, comment: Any) -> None:
         value, start_mark, end_mark = comment
         while value and value[-1] == ' ':
@@ -1871,19 +1955,9 @@ class RoundTripScanner(Scanner):
             ch = srp()
             if ch == '#':
                 start_mark = self.reader.get_mark()
-                comment = ch
-                srf()
-                while ch not in _THE_END:
-                    ch = srp()
-                    if ch == '\0':  # don't gobble the end-of-stream character
-                        # but add an explicit newline as "YAML processors should terminate
-                        # the stream with an explicit line break
-                        # https://yaml.org/spec/1.2/spec.html#id2780069
-                        comment += '\n'
-                        break
-                    comment += ch
-                    srf()
+                comment = self.scan_comment_line()
                 # gather any blank lines following the comment
+                comment += self.scan_line_breaks(_LINE_BREAKS)
                 ch = self.scan_line_break()
                 while len(ch) > 0:
                     comment += ch
@@ -1899,7 +1973,7 @@ class RoundTripScanner(Scanner):
                 ch = srp()
                 if ch == '\n':  # empty toplevel lines
                     start_mark = self.reader.get_mark()
-                    comment = ""
+                    comment = self.scan_line_breaks(_EMPTY_LINES)
                     while ch:
                         ch = self.scan_line_break(empty_line=True)
                         comment += ch
@@ -1912,6 +1986,50 @@ class RoundTripScanner(Scanner):
                 found = True
         return None
 
+    def scan_comment_line(self) -> Text:
+        # scan a comment up to and including the line break that ends it (which
+        # is not converted), a '\0' is not included, an explicit '\n' is added
+        # instead as "YAML processors should terminate the stream with an explicit
+        # line break" https://yaml.org/spec/1.2/spec.html#id2780069
+        reader = self.reader
+        match = _LINE_END.search(reader.buffer, reader.pointer)
+        if match is None:
+            # the line end is beyond the data read so far
+            srp = reader.peek
+            comment = ''
+            while True:
+                ch = srp()
+                if ch == '\0':
+                    return comment + '\n'
+                comment += ch
+                reader.forward()
+                if ch in _THE_END:
+                    return comment
+        end = match.end()
+        if match.group() == '\0':
+            end -= 1
+        comment = reader.buffer[reader.pointer : end]
+        reader.forward(len(comment))
+        if end == match.start():
+            comment += '\n'
+        return comment
+
+    def scan_line_breaks(self, line_breaks: Any) -> Text:
+        # scan the line breaks (and for empty lines spaces/tabs) as done by repeated
+        # scan_line_break() calls, as long as the data read so far allows
+        reader = self.reader
+        match = line_breaks.match(reader.buffer, reader.pointer)
+        if match.end() + 1 >= len(reader.buffer):
+            # could be followed by more, or end in a '\r' of a '\r\n'
+            return ''
+        text = match.group()
+        if not text:
+            return text
+        reader.forward(len(text))
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text.replace('\x85', '\n')
+
     def scan_line_break(self, empty_line: bool = False) -> Text:
         # Transforms:
         #   '\r\n'      :   '\n'
@@ -2229,7 +2347,7 @@ class RoundTripScannerSC(Scanner):  # RoundTripScanner Split Comments
             else:
                 self.comments.assign_pre(self.tokens[0])  # type: ignore
             self.tokens_taken += 1
-            return self.tokens.pop(0)
+            return self.tokens.popleft()
 
     def need_more_tokens(self) -> bool:
         if self.comments is None:
@@ -0,0 +1,802 @@
+"""
+loading a document into typed objects according to a schema, YAML.load(stream, schema=...)
+
+A schema is a type: a dataclass, a TypedDict, list[T], tuple[T, ...], tuple[T1, T2],
+set[T], frozenset[T], dict[K, V] (K a scalar type), Optional[T], Union[...], str, int,
+float, bool, None, datetime.date, datetime.datetime or Any (typing.List etc. and the
+collections.abc Sequence/Mapping types can be used as well).
+
+The schema is compiled into a plan once, and the values are then built directly from the
+parser events, without composing nodes, resolving tags or looking up constructors. A plain
+scalar is only checked against the implicit resolvers for the type it should have (a str
+can be any scalar except a null). Nodes with an anchor, aliases, merge keys and the values
+for Any are composed as usual, the latter are constructed by the constructor of the YAML
+instance. The structure is checked while the document is loaded, errors raise a
+SchemaError (a ConstructorError) with the position in the document. An empty stream
+gives None if the schema allows that (e.g. Optional[T]), else a SchemaError.
+"""
+
+from __future__ import annotations
+
+import collections.abc
+import dataclasses
+import datetime
+import types
+import typing
+
+from ruamel.yaml.composer import Composer, ComposerError
+from ruamel.yaml.constructor import ConstructorError, DuplicateKeyError, SafeConstructor
+from ruamel.yaml.events import (
+    ALIAS,
+    SCALAR,
+    SEQUENCE_START,
+    SEQUENCE_END,
+    MAPPING_START,
+    MAPPING_END,
+    AliasEvent,
+    ScalarEvent,
+    SequenceStartEvent,
+    SequenceEndEvent,
+    MappingStartEvent,
+    MappingEndEvent,
+    StreamEndEvent,
+)
+from ruamel.yaml.nodes import MappingNode, ScalarNode, SequenceNode
+from ruamel.yaml.tag import Tag
+
+if False:  # MYPY
+    from typing import Any, Dict, List, Optional, Tuple  # NOQA
+
+__all__ = ['SchemaError', 'SchemaLoader', 'schema_plan']
+
+
+class SchemaError(ConstructorError):
+    pass
+
+
+NULL_TAG = 'tag:yaml.org,2002:null'
+BOOL_TAG = 'tag:yaml.org,2002:bool'
+INT_TAG = 'tag:yaml.org,2002:int'
+FLOAT_TAG = 'tag:yaml.org,2002:float'
+STR_TAG = 'tag:yaml.org,2002:str'
+TIMESTAMP_TAG = 'tag:yaml.org,2002:timestamp'
+MERGE_TAG = 'tag:yaml.org,2002:merge'
+COLLECTION_TAGS = ('tag:yaml.org,2002:seq', 'tag:yaml.org,2002:map')
+
+_no_match = object()
+_unset = object()
+
+
+# Plans.
+
+
+class Plan:
+    """how to build the value of a node of a type in the schema"""
+
+    __slots__ = ('name',)
+    generic = False  # the node is composed and constructed as usual
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.name})'
+
+    def nullable(self) -> bool:
+        """is None a value of the type (e.g. for an empty stream)"""
+        return self.generic
+
+    def scalar(self, loader: SchemaLoader, event: Any) -> Any:
+        raise loader.mismatch(self, event)
+
+    def start(self, loader: SchemaLoader, event: Any) -> Frame:
+        raise loader.mismatch(self, event)
+
+
+class AnyPlan(Plan):
+    __slots__ = ()
+    generic = True
+
+
+class ScalarPlan(Plan):
+    __slots__ = ('convert',)
+
+    def __init__(self, name: str, convert: Any) -> None:
+        Plan.__init__(self, name)
+        # convert(loader, value, tag, event) gives the value, or _no_match
+        self.convert = convert
+
+    def nullable(self) -> bool:
+        return self.convert is SchemaLoader.convert_none
+
+    def scalar(self, loader: SchemaLoader, event: Any) -> Any:
+        value = self.convert(loader, event.value, loader.scalar_tag(event), event)
+        if value is _no_match:
+            raise loader.mismatch(self, event)
+        return value
+
+
+class UnionPlan(Plan):
+    """
+    the scalar types of a Union are tried in order (with str last), its sequence and
+    mapping types (at most one of each) are used for a sequence resp. mapping node
+    """
+
+    __slots__ = 'scalars', 'sequence', 'mapping'
+
+    def __init__(self, name: str, members: List[Plan]) -> None:
+        Plan.__init__(self, name)
+        scalars = [plan for plan in members if isinstance(plan, ScalarPlan)]
+        scalars.sort(key=lambda plan: plan.convert is SchemaLoader.convert_str)
+        self.scalars = tuple(scalars)
+        self.sequence: Any = None
+        self.mapping: Any = None
+        for plan in members:
+            if isinstance(plan, (SequencePlan, TuplePlan)):
+                if self.sequence is not None:
+                    raise TypeError(f'more than one sequence type in {name}')
+                self.sequence = plan
+            elif isinstance(plan, (DictPlan, ObjectPlan)):
+                if self.mapping is not None:
+                    raise TypeError(f'more than one mapping type in {name}')
+                self.mapping = plan
+
+    def nullable(self) -> bool:
+        return any(plan.nullable() for plan in self.scalars)
+
+    def scalar(self, loader: SchemaLoader, event: Any) -> Any:
+        tag = loader.scalar_tag(event)
+        for plan in self.scalars:
+            value = plan.convert(loader, event.value, tag, event)
+            if value is not _no_match:
+                return value
+        raise loader.mismatch(self, event)
+
+    def start(self, loader: SchemaLoader, event: Any) -> Frame:
+        plan = self.sequence if event.kind == SEQUENCE_START else self.mapping
+        if plan is None:
+            raise loader.mismatch(self, event)
+        return plan.start(loader, event)  # type: ignore
+
+
+class Frame:
+    """a sequence or mapping that is being built"""
+
+    __slots__ = 'plan', 'data', 'start_mark', 'key', 'item', 'merges'
+
+    def __init__(self, plan: Any, data: Any, start_mark: Any, item: Any = None) -> None:
+        self.plan = plan
+        self.data = data
+        self.start_mark = start_mark
+        self.key: Any = _unset  # the key for the value being built in a mapping
+        self.item = item  # the plan for the item or value being built
+        self.merges: List[Any] = []  # the mapping nodes to merge into a mapping
+
+
+class SequencePlan(Plan):
+    __slots__ = 'item', 'factory'
+
+    def __init__(self, name: str, item: Plan, factory: Any) -> None:
+        Plan.__init__(self, name)
+        self.item = item
+        self.factory = factory  # list, tuple, set or frozenset
+
+    def start(self, loader: SchemaLoader, event: Any) -> Frame:
+        if event.kind != SEQUENCE_START:
+            raise loader.mismatch(self, event)
+        loader.check_collection_tag(self, event)
+        return Frame(self, [], event.start_mark, self.item)
+
+    def add(self, loader: SchemaLoader, frame: Frame, value: Any) -> None:
+        frame.data.append(value)
+
+    def finish(self, loader: SchemaLoader, frame: Frame) -> Any:
+        if self.factory is list:
+            return frame.data
+        return self.factory(frame.data)
+
+
+class TuplePlan(Plan):
+    __slots__ = ('items',)
+
+    def __init__(self, name: str, items: Tuple[Plan, ...]) -> None:
+        Plan.__init__(self, name)
+        self.items = items
+
+    def start(self, loader: SchemaLoader, event: Any) -> Frame:
+        if event.kind != SEQUENCE_START:
+            raise loader.mismatch(self, event)
+        loader.check_collection_tag(self, event)
+        return Frame(self, [], event.start_mark, self.items[0] if self.items else None)
+
+    def add(self, loader: SchemaLoader, frame: Frame, value: Any) -> None:
+        frame.data.append(value)
+        index = len(frame.data)
+        frame.item = self.items[index] if index < len(self.items) else None
+
+    def finish(self, loader: SchemaLoader, frame: Frame) -> Any:
+        if len(frame.data) != len(self.items):
+            raise SchemaError(
+                f'while loading {self.name}',
+                frame.start_mark,
+                f'expected {len(self.items)} items, found {len(frame.data)}',
+                loader.end_mark,
+            )
+        return tuple(frame.data)
+
+
+class DictPlan(Plan):
+    __slots__ = 'key', 'value'
+
+    def __init__(self, name: str, key: Plan, value: Plan) -> None:
+        Plan.__init__(self, name)
+        self.key = key
+        self.value = value
+
+    def start(self, loader: SchemaLoader, event: Any) -> Frame:
+        if event.kind != MAPPING_START:
+            raise loader.mismatch(self, event)
+        loader.check_collection_tag(self, event)
+        return Frame(self, {}, event.start_mark)
+
+    def key_value(self, loader: SchemaLoader, frame: Frame, event: Any) -> Any:
+        """the key for a scalar key event, and the plan for its value"""
+        return self.key.scalar(loader, event), self.value
+
+    def add(self, loader: SchemaLoader, frame: Frame, value: Any) -> None:
+        frame.data[frame.key] = value
+
+    def finish(self, loader: SchemaLoader, frame: Frame) -> Any:
+        return frame.data
+
+
+class ObjectPlan(Plan):
+    """for a dataclass or TypedDict, loaded from a mapping with a key per field"""
+
+    __slots__ = 'fields', 'required', 'factory'
+
+    def __init__(self, name: str, factory: Any) -> None:
+        Plan.__init__(self, name)
+        self.fields: Dict[str, Plan] = {}
+        self.required: Tuple[str, ...] = ()
+        self.factory = factory
+
+    def start(self, loader: SchemaLoader, event: Any) -> Frame:
+        if event.kind != MAPPING_START:
+            raise loader.mismatch(self, event)
+        loader.check_collection_tag(self, event)
+        return Frame(self, {}, event.start_mark)
+
+    def key_value(self, loader: SchemaLoader, frame: Frame, event: Any) -> Any:
+        key = event.value
+        plan = self.fields.get(key)
+        if plan is None or loader.scalar_tag(event) not in (None, STR_TAG):
+            raise SchemaError(
+                f'while loading {self.name}',
+                frame.start_mark,
+                f'found unexpected key {key!r}',
+                event.start_mark,
+            )
+        return key, plan
+
+    def add(self, loader: SchemaLoader, frame: Frame, value: Any) -> None:
+        frame.data[frame.key] = value
+
+    def finish(self, loader: SchemaLoader, frame: Frame) -> Any:
+        data = frame.data
+        missing = [name for name in self.required if name not in data]
+        if missing:
+            raise SchemaError(
+                f'while loading {self.name}',
+                frame.start_mark,
+                f'missing required key(s) {", ".join(map(repr, missing))}',
+                loader.end_mark,
+            )
+        try:
+            return self.factory(**data)
+        except (TypeError, ValueError) as exc:
+            raise SchemaError(
+                f'while loading {self.name}', frame.start_mark, str(exc), loader.end_mark,
+            ) from exc
+
+
+# Compiling a schema into a plan.
+
+
+def _type_name(tp: Any) -> str:
+    if tp is type(None):
+        return 'None'
+    args = typing.get_args(tp)
+    if not args:
+        return getattr(tp, '__name__', None) or repr(tp).replace('typing.', '')
+    origin = typing.get_origin(tp)
+    if origin is typing.Union or (hasattr(types, 'UnionType') and origin is types.UnionType):
+        return ' | '.join(_type_name(arg) for arg in args)
+    name = getattr(tp, '__name__', None) or getattr(origin, '__name__', None) or repr(origin)
+    return f"{name}[{', '.join('...' if a is Ellipsis else _type_name(a) for a in args)}]"
+
+
+_plans: Dict[Any, Plan] = {}
+
+
+def schema_plan(schema: Any) -> Plan:
+    """the plan for loading a document according to a schema (a type), compiled once"""
+    try:
+        return _plans[schema]
+    except KeyError:
+        pass
+    plan = _plans[schema] = _compile(schema, {})
+    return plan
+
+
+def _compile(tp: Any, memo: Dict[Any, Plan]) -> Plan:
+    if tp is typing.Any or tp is object:
+        return AnyPlan('Any')
+    if tp is None:
+        tp = type(None)
+    try:
+        return _scalar_plans[tp]
+    except (KeyError, TypeError):
+        pass
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    name = _type_name(tp)
+    if origin is typing.Union or (hasattr(types, 'UnionType') and origin is types.UnionType):
+        members = [_compile(arg, memo) for arg in args]
+        if any(plan.generic for plan in members):
+            return AnyPlan(name)
+        return UnionPlan(name, members)
+    if origin is None:
+        origin = tp
+        args = ()
+    if origin in (list, collections.abc.Sequence, collections.abc.MutableSequence):
+        return SequencePlan(name, _compile(args[0] if args else typing.Any, memo), list)
+    if origin in (set, frozenset, collections.abc.Set, collections.abc.MutableSet):
+        item = _compile(args[0] if args else typing.Any, memo)
+        return SequencePlan(name, item, frozenset if origin is frozenset else set)
+    if origin is tuple:
+        if not args or (len(args) == 2 and args[1] is Ellipsis):
+            return SequencePlan(name, _compile(args[0] if args else typing.Any, memo), tuple)
+        if args == ((),):  # tuple[()]
+            args = ()
+        return TuplePlan(name, tuple(_compile(arg, memo) for arg in args))
+    if origin in (dict, collections.abc.Mapping, collections.abc.MutableMapping):
+        key = _compile(args[0] if args else str, memo)
+        if not isinstance(key, (ScalarPlan, UnionPlan)) or (
+            isinstance(key, UnionPlan) and (key.sequence or key.mapping)
+        ):
+            raise TypeError(f'the keys of {name} should have a scalar type')
+        return DictPlan(name, key, _compile(args[1] if args else typing.Any, memo))
+    if tp in memo:
+        return memo[tp]
+    if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+        plan = memo[tp] = ObjectPlan(name, tp)
+        hints = typing.get_type_hints(tp)
+        required = []
+        for field in tp.__dataclass_fields__.values():  # type: ignore
+            hint = hints.get(field.name, typing.Any)
+            if not field.init or typing.get_origin(hint) is typing.ClassVar:
+                continue
+            if isinstance(hint, dataclasses.InitVar):
+                hint = hint.type
+            plan.fields[field.name] = _compile(hint, memo)
+            if field.default is dataclasses.MISSING and (
+                field.default_factory is dataclasses.MISSING
+            ):
+                required.append(field.name)
+        plan.required = tuple(required)
+        return plan
+    if isinstance(tp, type) and issubclass(tp, dict) and hasattr(tp, '__required_keys__'):
+        # a TypedDict
+        plan = memo[tp] = ObjectPlan(name, dict)
+        for key, hint in typing.get_type_hints(tp).items():
+            plan.fields[key] = _compile(hint, memo)
+        plan.required = tuple(key for key in plan.fields if key in tp.__required_keys__)
+        return plan
+    raise TypeError(f'cannot load {name} according to a schema')
+
+
+# Building the values.
+
+
+class EventSource:
+    """the events of the document being parsed"""
+
+    def __init__(self, composer: Composer) -> None:
+        self.peek = composer.parser.peek_event
+        self.get = composer.parser.get_event
+        self.compose = composer.compose_node
+
+    def node(self) -> Any:
+        """compose the node at the current event (an alias gives the anchored node)"""
+        return self.compose(None, None)
+
+
+class NodeSource:
+    """
+    events for a composed node, the nodes in it that have an anchor are given as an
+    AliasEvent
+    """
+
+    def __init__(self, node: Any) -> None:
+        self.todo: List[Any] = [node]  # nodes and end events, the next at the end
+        self.top = node
+        self.event: Any = None  # the current event, peeked
+        self.event_node: Any = None  # the node of the current event
+
+    def peek(self) -> Any:
+        if self.event is None:
+            node = self.todo.pop()
+            self.event_node = None
+            if not isinstance(node, (ScalarNode, SequenceNode, MappingNode)):
+                self.event = node  # an end event
+                return node
+            self.event_node = node
+            if node.anchor is not None and node is not self.top:
+                self.event = AliasEvent(node.anchor, node.start_mark, node.end_mark)
+            elif isinstance(node, ScalarNode):
+                self.event = ScalarEvent(
+                    None,
+                    node.ctag,
+                    (False, False),
+                    node.value,
+                    node.start_mark,
+                    node.end_mark,
+                    style=node.style,
+                )
+            elif isinstance(node, SequenceNode):
+                self.event = SequenceStartEvent(
+                    None, node.ctag, False, node.start_mark, node.end_mark,
+                )
+            else:
+                self.event = MappingStartEvent(
+                    None, node.ctag, False, node.start_mark, node.end_mark,
+                )
+        return self.event
+
+    def get(self) -> Any:
+        event = self.peek()
+        node = self.event_node
+        if event.kind == SEQUENCE_START:
+            self.todo.append(SequenceEndEvent(node.end_mark, node.end_mark))
+            self.todo.extend(reversed(node.value))
+        elif event.kind == MAPPING_START:
+            self.todo.append(MappingEndEvent(node.end_mark, node.end_mark))
+            for key_node, value_node in reversed(node.value):
+                self.todo.append(value_node)
+                self.todo.append(key_node)
+        self.event = None
+        return event
+
+    def node(self) -> Any:
+        self.peek()
+        self.event = None
+        return self.event_node
+
+
+class SchemaLoader:
+    """
+    builds the values of the documents of a stream according to the plan of a schema,
+    from the events of the parser of a constructor
+    """
+
+    def __init__(self, constructor: Any) -> None:
+        self.constructor = constructor
+        composer = constructor.composer
+        if not isinstance(composer, Composer):
+            # the combined C level parser composes its nodes itself
+            composer = Composer(loader=constructor)
+        self.composer = composer
+        self.parser = composer.parser
+        self.end_mark: Any = None  # of the last end event
+        # (node, plan) -> value, for the nodes with an anchor
+        self.built: Dict[Any, Any] = {}
+        self.matchers: Dict[Any, Any] = {}
+
+    def get_single_data(self, plan: Plan) -> Any:
+        # Drop the STREAM-START event.
+        self.parser.get_event()
+
+        # Load a document if the stream is not empty.
+        value: Any = None
+        start_event = self.parser.peek_event()
+        if not self.parser.check_event(StreamEndEvent):
+            value = self.load_document(plan)
+        elif not plan.nullable():
+            raise SchemaError(
+                None,
+                None,
+                f'expected {plan.name}, found an empty stream',
+                start_event.start_mark,
+            )
+
+        # Ensure that the stream contains no more documents.
+        if not self.parser.check_event(StreamEndEvent):
+            event = self.parser.get_event()
+            raise ComposerError(
+                'expected a single document in the stream',
+                start_event.start_mark,
+                'but found another document',
+                event.start_mark,
+            )
+
+        # Drop the STREAM-END event.
+        self.parser.get_event()
+        return value
+
+    def load_document(self, plan: Plan) -> Any:
+        self.composer.anchors = {}
+        self.built = {}
+        self.matchers = {}
+        # Drop the DOCUMENT-START event.
+        self.parser.get_event()
+        value = self.build(plan, EventSource(self.composer))
+        # Drop the DOCUMENT-END event.
+        self.parser.get_event()
+        self.built = {}
+        return value
+
+    def build(self, plan: Plan, source: Any) -> Any:
+        """build the value of the node at the current event of source"""
+        peek = source.peek
+        get = source.get
+        stack: List[Frame] = []
+        frame: Any = None
+        while True:
+            event = peek()
+            kind = event.kind
+            if kind == SEQUENCE_END or kind == MAPPING_END:
+                get()
+                self.end_mark = event.end_mark
+                if frame.merges:
+                    self.merge(frame)
+                value = frame.plan.finish(self, frame)
+                stack.pop()
+                frame = stack[-1] if stack else None
+            else:
+                if frame is None:
+                    item = plan
+                elif frame.item is None:
+                    if frame.plan.__class__ is TuplePlan:
+                        raise SchemaError(
+                            f'while loading {frame.plan.name}',
+                            frame.start_mark,
+                            f'expected {len(frame.plan.items)} items, found more',
+                            event.start_mark,
+                        )
+                    # a key in a mapping
+                    self.read_key(frame, source)
+                    continue
+                else:
+                    item = frame.item
+                if item.generic or kind == ALIAS or event.anchor is not None:
+                    value = self.build_node(item, source.node())
+                elif kind == SCALAR:
+                    get()
+                    value = item.scalar(self, event)
+                else:
+                    child = item.start(self, event)
+                    get()
+                    stack.append(child)
+                    frame = child
+                    continue
+            if frame is None:
+                return value
+            if frame.item is not _skip:
+                frame.plan.add(self, frame, value)
+            if frame.key is not _unset:
+                frame.key = _unset
+                frame.item = None
+
+    def read_key(self, frame: Frame, source: Any) -> None:
+        """read the key of the next value in a mapping"""
+        event = source.peek()
+        if event.kind == ALIAS or event.anchor is not None:
+            node = source.node()
+            if not isinstance(node, ScalarNode):
+                raise self.mismatch(frame.plan, event, 'a scalar key')
+            event = NodeSource(node).peek()
+        elif event.kind == SCALAR:
+            source.get()
+        else:
+            raise SchemaError(
+                f'while loading {frame.plan.name}',
+                frame.start_mark,
+                'expected a scalar key',
+                event.start_mark,
+            )
+        if event.value == '<<' and self.scalar_tag(event) in (None, MERGE_TAG):
+            node = source.node()
+            merges = node.value if isinstance(node, SequenceNode) else [node]
+            for merge in merges:
+                if not isinstance(merge, MappingNode):
+                    raise SchemaError(
+                        f'while loading {frame.plan.name}',
+                        frame.start_mark,
+                        'expected a mapping or a sequence of mappings to merge',
+                        merge.start_mark,
+                    )
+                frame.merges.append(merge)
+            return
+        key, item = frame.plan.key_value(self, frame, event)
+        if key in frame.data:
+            if not self.constructor.allow_duplicate_keys:
+                raise DuplicateKeyError(
+                    f'while loading {frame.plan.name}',
+                    frame.start_mark,
+                    f'found duplicate key "{key}"',
+                    event.start_mark,
+                )
+            item = _skip  # the first value is kept
+        frame.key = key
+        frame.item = item
+
+    def merge(self, frame: Frame) -> None:
+        """add the keys of the mappings to merge that are not in a mapping yet"""
+        for merge in frame.merges:
+            SafeConstructor.flatten_mapping(self.constructor, merge)
+            for key_node, value_node in merge.value:
+                event = NodeSource(key_node).peek()
+                if not isinstance(key_node, ScalarNode):
+                    raise self.mismatch(frame.plan, event, 'a scalar key')
+                key, item = frame.plan.key_value(self, frame, event)
+                if key not in frame.data:
+                    frame.key = key
+                    frame.plan.add(self, frame, self.build_node(item, value_node))
+        frame.key = _unset
+        frame.merges = []
+
+    def build_node(self, plan: Plan, node: Any) -> Any:
+        """
+        build the value of a composed node, the same one each time for a node with an
+        anchor and the same plan
+        """
+        if node.anchor is not None:
+            key = (node, plan)
+            try:
+                value = self.built[key]
+            except KeyError:
+                pass
+            else:
+                if value is _unset:
+                    raise SchemaError(
+                        f'while loading {plan.name}',
+                        None,
+                        'found an alias to a node that contains it',
+                        node.start_mark,
+                    )
+                return value
+            self.built[key] = _unset
+        if plan.generic:
+            value = self.constructor.construct_document(node)
+        else:
+            value = self.build(plan, NodeSource(node))
+        if node.anchor is not None:
+            self.built[key] = value
+        return value
+
+    def mismatch(self, plan: Plan, event: Any, expected: Any = None) -> SchemaError:
+        if event.kind == SCALAR:
+            found = f'the scalar {event.value!r}'
+        elif event.kind == SEQUENCE_START:
+            found = 'a sequence'
+        elif event.kind == MAPPING_START:
+            found = 'a mapping'
+        else:
+            found = 'an alias'
+        tag = getattr(event, 'ctag', None)
+        if tag is not None and str(tag) != '!':
+            found += f" tagged {str(tag).replace('tag:yaml.org,2002:', '!!')}"
+        return SchemaError(
+            None, None, f'expected {expected or plan.name}, found {found}', event.start_mark,
+        )
+
+    def check_collection_tag(self, plan: Plan, event: Any) -> None:
+        tag = event.ctag
+        if tag is not None and str(tag) != '!' and str(tag) not in COLLECTION_TAGS:
+            raise self.mismatch(plan, event)
+
+    # Scalars.
+
+    @staticmethod
+    def scalar_tag(event: Any) -> Any:
+        """the tag of a scalar event, None for a plain scalar without one"""
+        tag = event.ctag
+        if tag is None or str(tag) == '!':
+            return None if event.implicit[0] else STR_TAG
+        return str(tag)
+
+    def implicit(self, tag: str, value: str) -> bool:
+        """does a plain scalar match an implicit resolver for tag (for its YAML version)"""
+        try:
+            matcher = self.matchers[tag]
+        except KeyError:
+            matcher = self.matchers[tag] = self.implicit_matcher(tag)
+        regexps = matcher.get(value[:1])
+        if regexps is None:
+            regexps = matcher[None]
+        for regexp in regexps:
+            if regexp.match(value):
+                return True
+        return False
+
+    def implicit_matcher(self, tag: str) -> Dict[Any, List[Any]]:
+        """the regexps of the implicit resolvers for a tag by first character"""
+        resolver = self.constructor.resolver  # a new one after a %YAML directive
+        if hasattr(resolver, 'version_resolver'):
+            version = resolver.processing_version
+            if isinstance(version, str):
+                version = tuple(map(int, version.split('.')))
+            resolvers = resolver.version_resolver(version)
+        else:
+            resolvers = resolver.yaml_implicit_resolvers
+        any_first = [regexp for t, regexp in resolvers.get(None, []) if t == tag]
+        matcher: Dict[Any, List[Any]] = {None: any_first}
+        for first, lst in resolvers.items():
+            if first is not None:
+                matcher[first] = [regexp for t, regexp in lst if t == tag] + any_first
+        return matcher
+
+    def scalar_node(self, tag: str, value: str, event: Any) -> Any:
+        return ScalarNode(Tag(suffix=tag), value, event.start_mark, event.end_mark)
+
+    def convert_str(self, value: str, tag: Any, event: Any) -> Any:
+        if tag is None:
+            if not value or self.implicit(NULL_TAG, value):
+                return _no_match
+            return value
+        return value if tag == STR_TAG else _no_match
+
+    def convert_none(self, value: str, tag: Any, event: Any) -> Any:
+        if tag is None:
+            return None if not value or self.implicit(NULL_TAG, value) else _no_match
+        return None if tag == NULL_TAG else _no_match
+
+    def convert_bool(self, value: str, tag: Any, event: Any) -> Any:
+        if tag == BOOL_TAG or (tag is None and self.implicit(BOOL_TAG, value)):
+            return SafeConstructor.bool_values.get(value.lower(), _no_match)
+        return _no_match
+
+    def convert_int(self, value: str, tag: Any, event: Any) -> Any:
+        if tag == INT_TAG or (tag is None and self.implicit(INT_TAG, value)):
+            if value.isdecimal() and (value[0] != '0' or value == '0'):
+                return int(value)
+            node = self.scalar_node(INT_TAG, value, event)
+            return SafeConstructor.construct_yaml_int(self.constructor, node)
+        return _no_match
+
+    def convert_float(self, value: str, tag: Any, event: Any) -> Any:
+        if tag == FLOAT_TAG or (tag is None and self.implicit(FLOAT_TAG, value)):
+            if value.replace('.', '', 1).isdecimal():
+                return float(value)
+            node = self.scalar_node(FLOAT_TAG, value, event)
+            return SafeConstructor.construct_yaml_float(self.constructor, node)
+        value = self.convert_int(value, tag, event)  # an int is a float as well
+        return value if value is _no_match else float(value)
+
+    def convert_timestamp(self, value: str, tag: Any, event: Any, tp: Any) -> Any:
+        if tag == TIMESTAMP_TAG or (tag is None and self.implicit(TIMESTAMP_TAG, value)):
+            node = self.scalar_node(TIMESTAMP_TAG, value, event)
+            value = SafeConstructor.construct_yaml_timestamp(self.constructor, node)
+            if isinstance(value, tp):
+                return value
+        return _no_match
+
+    def convert_date(self, value: str, tag: Any, event: Any) -> Any:
+        return self.convert_timestamp(value, tag, event, datetime.date)
+
+    def convert_datetime(self, value: str, tag: Any, event: Any) -> Any:
+        return self.convert_timestamp(value, tag, event, datetime.datetime)
+
+
+_skip = AnyPlan('Any')  # for the value of a duplicate key
+
+_scalar_plans: Dict[Any, Plan] = {
+    str: ScalarPlan('str', SchemaLoader.convert_str),
+    int: ScalarPlan('int', SchemaLoader.convert_int),
+    float: ScalarPlan('float', SchemaLoader.convert_float),
+    bool: ScalarPlan('bool', SchemaLoader.convert_bool),
+    type(None): ScalarPlan('None', SchemaLoader.convert_none),
+    datetime.date: ScalarPlan('date', SchemaLoader.convert_date),
+    datetime.datetime: ScalarPlan('datetime', SchemaLoader.convert_datetime),
+}
@@ -21,6 +21,8 @@ class Tag:
     """store original tag information for roundtripping"""
 
     attrib = tag_attrib
+    # a small integer for the Tags shared by intern_tag(), None for any other Tag
+    tag_id: Optional[int] = None
 
     def __init__(self, handle: Any = None, suffix: Any = None, handles: Any = None) -> None:
         self.handle = handle
@@ -124,3 +126,23 @@ class Tag:
         if self.handle is None:
             return False
         return self.handle not in self.handles
+
+
+# the shared Tag instances by tag, see intern_tag()
+_interned_tags: Dict[str, Tag] = {}
+
+
+def intern_tag(tag: str) -> Tag:
+    """
+    the Tag (without a handle) for tag that is shared by all the nodes resolved to it,
+    numbered with a small integer .tag_id. Such a Tag should not be changed.
+    """
+    try:
+        return _interned_tags[tag]
+    except KeyError:
+        pass
+    res = Tag(suffix=tag)
+    res.tag_id = len(_interned_tags)
+    str(res)  # decode the suffix once
+    _interned_tags[tag] = res
+    return res